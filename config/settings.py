@@ -1,5 +1,7 @@
 import os
+from importlib.util import find_spec
 from pathlib import Path
+from django.core.exceptions import ImproperlyConfigured
 from decouple import config, Csv
 from dj_database_url import parse as db_url
 
@@ -40,13 +42,16 @@ except ImportError:
     pass
 
 MIDDLEWARE = [
+    'gestion.instrumentation.RequestInstrumentationMiddleware',  # Métricas por request (primero para medir todo)
     'django.middleware.security.SecurityMiddleware',
+    'gestion.middleware.ReplicaRoutingMiddleware',  # Lecturas GET a la réplica (si existe)
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # CORS debe estar antes de CommonMiddleware
     'django.middleware.common.CommonMiddleware',
     'gestion.middleware.DisableCSRFForAPI',  # Deshabilitar CSRF para APIs REST
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'gestion.profiling.ProfilingMiddleware',  # Perfilado bajo demanda (solo admin)
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -71,14 +76,58 @@ TEMPLATES = [
 WSGI_APPLICATION = 'config.wsgi.application'
 
 
+# Conexiones persistentes: reutilizar la conexión entre requests en lugar de
+# abrir una nueva por cada petición (crítico en PostgreSQL).
+DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=60, cast=int)
+DB_CONN_HEALTH_CHECKS = config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool)
+
+# Pool de conexiones en proceso (solo PostgreSQL con psycopg 3 + psycopg_pool).
+# DB_POOL_MAX_SIZE=0 deshabilita el pool y se usan conexiones persistentes.
+DB_POOL_MIN_SIZE = config('DB_POOL_MIN_SIZE', default=1, cast=int)
+DB_POOL_MAX_SIZE = config('DB_POOL_MAX_SIZE', default=0, cast=int)
+DB_POOL_TIMEOUT = config('DB_POOL_TIMEOUT', default=10, cast=int)
+
+
+def database_config(url):
+    """Construye la configuración de una base de datos desde su URL"""
+    db = db_url(url, conn_max_age=DB_CONN_MAX_AGE, conn_health_checks=DB_CONN_HEALTH_CHECKS)
+    if DB_POOL_MAX_SIZE > 0 and db['ENGINE'] == 'django.db.backends.postgresql':
+        # requirements.txt instala psycopg2; el pool necesita: pip install "psycopg[binary,pool]"
+        if find_spec('psycopg') is None or find_spec('psycopg_pool') is None:
+            raise ImproperlyConfigured(
+                'DB_POOL_MAX_SIZE > 0 requiere psycopg 3 y psycopg_pool (pip install "psycopg[binary,pool]"); '
+                'use DB_POOL_MAX_SIZE=0 para conexiones persistentes'
+            )
+        # El pool de Django no admite conexiones persistentes (CONN_MAX_AGE debe ser 0)
+        db['CONN_MAX_AGE'] = 0
+        db.setdefault('OPTIONS', {})['pool'] = {
+            'min_size': DB_POOL_MIN_SIZE,
+            'max_size': DB_POOL_MAX_SIZE,
+            'timeout': DB_POOL_TIMEOUT,
+        }
+    return db
+
+
 DATABASES = {
     'default': config(
         'DATABASE_URL',
         default='sqlite:///' + str(BASE_DIR / 'db.sqlite3'),
-        cast=db_url
+        cast=database_config
     )
 }
 
+# Réplica de lectura opcional (PostgreSQL en streaming o, en local, otro archivo
+# SQLite sincronizado con `python manage.py sync_replica`)
+DATABASE_REPLICA_URL = config('DATABASE_REPLICA_URL', default='')
+if DATABASE_REPLICA_URL:
+    DATABASES['replica'] = database_config(DATABASE_REPLICA_URL)
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+
+DATABASE_ROUTERS = ['gestion.db_routers.ReadReplicaRouter']
+
+# Segundos que una sesión lee de la base principal después de escribir (read-your-writes)
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=5, cast=int)
+
 
 # Backend de autenticación personalizado que permite login con email o username
 # SOLO Firebase - Django NO se usa para autenticación
@@ -87,6 +136,14 @@ AUTHENTICATION_BACKENDS = [
     # 'django.contrib.auth.backends.ModelBackend',  # DESHABILITADO - Solo Firebase
 ]
 
+# Pruebas de carga locales (manage.py loadtest): reemplaza Firebase por un backend
+# falso que acepta cualquier usuario activo. NUNCA habilitar en producción.
+LOADTEST_FAKE_AUTH = config('LOADTEST_FAKE_AUTH', default=False, cast=bool)
+if LOADTEST_FAKE_AUTH:
+    if not DEBUG:
+        raise ImproperlyConfigured('LOADTEST_FAKE_AUTH solo puede usarse con DEBUG=True')
+    AUTHENTICATION_BACKENDS = ['gestion.backends.LocalFakeBackend']
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -152,10 +209,130 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'gestion.pagination.OptimizedPageNumberPagination',
     'PAGE_SIZE': 20,
+    # orjson si está instalado (misma salida que JSONRenderer, ver gestion/renderers.py)
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'gestion.renderers.FastJSONRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'gestion.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
     # Optimizaciones de rendimiento
     'DEFAULT_THROTTLE_CLASSES': [],
     'DEFAULT_THROTTLE_RATES': {},
 }
+
+# Instrumentación de requests (gestion/instrumentation.py)
+# Agrega el header Server-Timing con costo de conexión y consultas a la BD
+INSTRUMENTATION_SERVER_TIMING = config('INSTRUMENTATION_SERVER_TIMING', default=True, cast=bool)
+
+# Registro de consultas lentas (gestion/slow_queries.py). 0 lo deshabilita.
+SLOW_QUERY_THRESHOLD_MS = config('SLOW_QUERY_THRESHOLD_MS', default=200, cast=int)
+SLOW_QUERY_EXPLAIN = config('SLOW_QUERY_EXPLAIN', default=True, cast=bool)
+
+LOGS_DIR = Path(config('LOGS_DIR', default=str(BASE_DIR / 'logs')))
+LOGS_DIR.mkdir(parents=True, exist_ok=True)
+
+# Logging no bloqueante (gestion/logging_utils.py): los handlers async encolan
+# el registro y un hilo en segundo plano escribe en stdout/archivo.
+LOG_LEVEL = config('LOG_LEVEL', default='DEBUG' if DEBUG else 'INFO')
+LOG_JSON = config('LOG_JSON', default=not DEBUG, cast=bool)
+# Muestreo de DEBUG repetitivo: primeros N por plantilla/minuto y luego 1 de cada M
+LOG_DEBUG_BURST = config('LOG_DEBUG_BURST', default=20, cast=int)
+LOG_DEBUG_SAMPLE_RATE = config('LOG_DEBUG_SAMPLE_RATE', default=100, cast=int)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'raw': {'format': '%(message)s'},
+        'text': {'format': '%(asctime)s %(levelname)s %(name)s: %(message)s'},
+        'json': {'()': 'gestion.logging_utils.JSONFormatter'},
+    },
+    'filters': {
+        'sample_debug': {
+            '()': 'gestion.logging_utils.SamplingFilter',
+            'burst': LOG_DEBUG_BURST,
+            'rate': LOG_DEBUG_SAMPLE_RATE,
+        },
+    },
+    'handlers': {
+        'console_async': {
+            '()': 'gestion.logging_utils.AsyncHandler',
+            'stream': 'stdout',
+            'formatter': 'json' if LOG_JSON else 'text',
+            'filters': ['sample_debug'],
+        },
+        'slow_queries_file': {
+            '()': 'gestion.logging_utils.AsyncHandler',
+            'filename': str(LOGS_DIR / 'slow_queries.jsonl'),
+            'formatter': 'raw',
+        },
+    },
+    'loggers': {
+        'gestion': {
+            'handlers': ['console_async'],
+            'level': LOG_LEVEL,
+            'propagate': False,
+        },
+        'gestion.slow_queries': {
+            'handlers': ['slow_queries_file'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
+# Perfilado bajo demanda (gestion/profiling.py): header X-Profile o ?_profile=
+# con valor cprofile|sample, solo para administradores
+PROFILING_ENABLED = config('PROFILING_ENABLED', default=True, cast=bool)
+PROFILING_SUBDIR = 'profiles'
+PROFILING_MAX_FILES = config('PROFILING_MAX_FILES', default=200, cast=int)
+PROFILING_SAMPLE_INTERVAL = config('PROFILING_SAMPLE_INTERVAL', default=0.001, cast=float)
+
+# Métricas Prometheus (gestion/metrics.py, expuestas en /api/metrics/)
+METRICS_DIR = config('METRICS_DIR', default=str(LOGS_DIR / 'metrics'))
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=5, cast=float)
+# Token para el scraper (Authorization: Bearer <token>). Sin token solo admins.
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Exportaciones CSV/XLSX (gestion/exports.py): filas leídas por bloque del cursor
+EXPORT_CHUNK_SIZE = config('EXPORT_CHUNK_SIZE', default=2000, cast=int)
+
+# Tareas en segundo plano (gestion/jobs.py, worker: python manage.py run_jobs)
+JOBS_DIR = config('JOBS_DIR', default=str(BASE_DIR / 'jobs'))
+JOB_POLL_INTERVAL = config('JOB_POLL_INTERVAL', default=2, cast=float)
+# Reintentos: JOB_RETRY_BACKOFF * 2^(intento-1) segundos
+JOB_RETRY_BACKOFF = config('JOB_RETRY_BACKOFF', default=30, cast=int)
+# Una tarea en ejecución sin heartbeat por este tiempo se reencola (worker caído)
+JOB_STALE_SECONDS = config('JOB_STALE_SECONDS', default=600, cast=int)
+
+# Clasificación ABC de productos (gestion/abc_analysis.py, python manage.py abc_analysis)
+ABC_WINDOW_DAYS = config('ABC_WINDOW_DAYS', default=90, cast=int)
+# Porcentaje acumulado máximo de las clases A y B (el resto es C)
+ABC_THRESHOLDS = (
+    config('ABC_CLASS_A_PERCENT', default=80, cast=float),
+    config('ABC_CLASS_B_PERCENT', default=95, cast=float),
+)
+
+# Lotes por vencer (gestion/lots.py): días de anticipación de la alerta y del reporte
+LOT_EXPIRY_ALERT_DAYS = config('LOT_EXPIRY_ALERT_DAYS', default=7, cast=int)
+
+# Pronóstico de demanda (gestion/forecasting.py, python manage.py forecast_demand)
+FORECAST_WINDOW_DAYS = config('FORECAST_WINDOW_DAYS', default=365, cast=int)
+FORECAST_MOVING_AVERAGE_DAYS = config('FORECAST_MOVING_AVERAGE_DAYS', default=28, cast=int)
+FORECAST_ALPHA = config('FORECAST_ALPHA', default=0.3, cast=float)
+FORECAST_SERVICE_LEVEL = config('FORECAST_SERVICE_LEVEL', default=0.95, cast=float)
+# Lead time (días) de los productos sin proveedor activo
+FORECAST_DEFAULT_LEAD_TIME = config('FORECAST_DEFAULT_LEAD_TIME', default=7, cast=int)
+
+# Scorecard de proveedores (gestion/supplier_scorecard.py): lead time real usado por
+# la reposición y el pronóstico si el proveedor tiene al menos N órdenes recibidas en los últimos meses
+SUPPLIER_LEAD_TIME_MIN_ORDERS = config('SUPPLIER_LEAD_TIME_MIN_ORDERS', default=3, cast=int)
+SUPPLIER_LEAD_TIME_MONTHS = config('SUPPLIER_LEAD_TIME_MONTHS', default=12, cast=int)
+
+# Archivado de movimientos (gestion/movement_archive.py, python manage.py archive_movements):
+# meses que quedan en la tabla (incluido el en curso) y movimientos por bloque comprimido
+MOVEMENT_ARCHIVE_MONTHS = config('MOVEMENT_ARCHIVE_MONTHS', default=24, cast=int)
+MOVEMENT_ARCHIVE_CHUNK_ROWS = config('MOVEMENT_ARCHIVE_CHUNK_ROWS', default=5000, cast=int)
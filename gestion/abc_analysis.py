@@ -0,0 +1,213 @@
+# gestion/abc_analysis.py
+"""
+Clasificación ABC (Pareto) de productos por ingresos y por volumen.
+
+- Ingresos y unidades vendidas: una consulta agrupada sobre los resúmenes
+  diarios por producto (SalesRollup, ver sales_rollups.py) en la ventana.
+- Volumen por bodega: una consulta agrupada sobre las salidas de
+  ProductMovement en la ventana (bodega de la zona de origen/destino o del
+  movimiento).
+- El volumen global suma unidades vendidas y salidas.
+
+Clases: A hasta el 80% acumulado del total, B hasta el 95%, C el resto
+(ABC_THRESHOLDS). Se clasifica globalmente, dentro de cada categoría y por
+bodega. El resultado se cachea en ProductABC. refresh() no es incremental:
+las clases dependen del total, así que recalcula la tabla completa; solo se
+omite si no hay ventas ni movimientos nuevos y la ventana no cambió (AbcRun).
+Las ediciones o eliminaciones se reflejan con force o al día siguiente. Lo
+ejecutan el comando abc_analysis y la tarea reports.abc, nunca un GET.
+"""
+import time
+from collections import defaultdict
+from datetime import datetime, time as dt_time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import AbcRun, Product, ProductABC, ProductMovement, SaleItem, SalesRollup, Warehouse
+from .sales_rollups import catch_up
+
+DEFAULT_WINDOW_DAYS = getattr(settings, 'ABC_WINDOW_DAYS', 90)
+# Porcentaje acumulado máximo de las clases A y B (el resto es C)
+THRESHOLDS = getattr(settings, 'ABC_THRESHOLDS', (80, 95))
+CLASS_FIELDS = {
+    ('revenue', 'global'): 'revenue_class',
+    ('volume', 'global'): 'volume_class',
+    ('revenue', 'category'): 'category_revenue_class',
+    ('volume', 'category'): 'category_volume_class',
+    ('volume', 'warehouse'): 'volume_class',
+}
+
+
+def classify(values, thresholds=THRESHOLDS):
+    """
+    Clase A/B/C de cada clave según su participación acumulada (de mayor a
+    menor). Se usa el acumulado anterior a la clave, así la más grande siempre
+    es A; las claves sin valor son C.
+    """
+    total = sum(values.values())
+    classes = {}
+    cumulative = 0
+    for key, value in sorted(values.items(), key=lambda item: (-item[1], item[0])):
+        if value <= 0 or not total:
+            classes[key] = 'C'
+            continue
+        share = cumulative * 100 / total
+        classes[key] = 'A' if share < thresholds[0] else 'B' if share < thresholds[1] else 'C'
+        cumulative += value
+    return classes
+
+
+def _by_group(values, groups):
+    """classify() dentro de cada grupo (ej. categoría)"""
+    grouped = defaultdict(dict)
+    for key, value in values.items():
+        grouped[groups[key]][key] = value
+    classes = {}
+    for group_values in grouped.values():
+        classes.update(classify(group_values))
+    return classes
+
+
+def _window(window_days):
+    date_to = timezone.localdate()
+    return date_to - timedelta(days=window_days - 1), date_to
+
+
+def _watermarks():
+    return (
+        SaleItem.objects.aggregate(last=Max('id'))['last'] or 0,
+        ProductMovement.objects.aggregate(last=Max('id'))['last'] or 0,
+    )
+
+
+# ==================== CÁLCULO ====================
+def compute(date_from, date_to):
+    """Filas ProductABC (globales y por bodega) de los productos activos para la ventana"""
+    products = dict(Product.objects.filter(is_active=True).values_list('id', 'categoria'))
+    warehouse_ids = list(Warehouse.objects.filter(is_active=True).values_list('id', flat=True))
+
+    sold = {
+        int(row['key']): row
+        for row in SalesRollup.objects.filter(
+            dimension='product', date__gte=date_from, date__lte=date_to,
+        ).values('key').annotate(units_total=Sum('units'), revenue_total=Sum('revenue')).order_by()
+        if row['key'].isdigit()
+    }
+
+    outbound = defaultdict(dict)
+    start = timezone.make_aware(datetime.combine(date_from, dt_time.min))
+    end = timezone.make_aware(datetime.combine(date_to + timedelta(days=1), dt_time.min))
+    movements = ProductMovement.objects.filter(tipo='salida', fecha__gte=start, fecha__lt=end).annotate(
+        warehouse_key=Coalesce('origin_zone__warehouse_id', 'destination_zone__warehouse_id', 'warehouse_id'),
+    ).values('product_id', 'warehouse_key').annotate(units_total=Sum('cantidad')).order_by()
+    for row in movements:
+        outbound[row['warehouse_key']][row['product_id']] = row['units_total'] or Decimal('0')
+
+    revenue = {pk: sold[pk]['revenue_total'] if pk in sold else Decimal('0') for pk in products}
+    volume = {pk: Decimal(sold[pk]['units_total'] if pk in sold else 0) for pk in products}
+    for per_product in outbound.values():
+        for pk, units in per_product.items():
+            if pk in volume:
+                volume[pk] += units
+
+    revenue_class = classify(revenue)
+    volume_class = classify(volume)
+    category_revenue_class = _by_group(revenue, products)
+    category_volume_class = _by_group(volume, products)
+
+    rows = [
+        ProductABC(
+            product_id=pk, warehouse_id=None, categoria=categoria or '',
+            revenue=revenue[pk], units=volume[pk],
+            revenue_class=revenue_class[pk], volume_class=volume_class[pk],
+            category_revenue_class=category_revenue_class[pk], category_volume_class=category_volume_class[pk],
+        )
+        for pk, categoria in products.items()
+    ]
+    for warehouse_id in warehouse_ids:
+        units = {pk: outbound[warehouse_id].get(pk, Decimal('0')) for pk in products}
+        classes = classify(units)
+        rows += [
+            ProductABC(
+                product_id=pk, warehouse_id=warehouse_id, categoria=categoria or '',
+                units=units[pk], volume_class=classes[pk],
+            )
+            for pk, categoria in products.items()
+        ]
+    return rows
+
+
+def refresh(window_days=None, force=False):
+    """
+    Recalcula la clasificación completa si cambió la ventana o hay
+    ventas/movimientos nuevos desde el último cálculo (o con force); si no,
+    no hace nada. Retorna (AbcRun, recalculado).
+    """
+    window_days = window_days or DEFAULT_WINDOW_DAYS
+    date_from, date_to = _window(window_days)
+    last_sale_item_id, last_movement_id = _watermarks()
+    last_run = AbcRun.objects.first()
+    if not force and last_run is not None and (
+        last_run.date_from == date_from and last_run.date_to == date_to
+        and last_run.last_sale_item_id == last_sale_item_id and last_run.last_movement_id == last_movement_id
+    ):
+        return last_run, False
+
+    started = time.monotonic()
+    # Los días cerrados faltantes en los resúmenes de ventas (el día en curso lo mantiene el checkout)
+    catch_up()
+    rows = compute(date_from, date_to)
+    with transaction.atomic():
+        ProductABC.objects.all().delete()
+        ProductABC.objects.bulk_create(rows, batch_size=1000)
+        run = AbcRun.objects.create(
+            date_from=date_from, date_to=date_to,
+            last_sale_item_id=last_sale_item_id, last_movement_id=last_movement_id,
+            products=sum(1 for row in rows if row.warehouse_id is None),
+            duration_ms=int((time.monotonic() - started) * 1000),
+        )
+        # Solo se conserva el historial reciente de cálculos
+        AbcRun.objects.filter(pk__in=list(AbcRun.objects.values_list('pk', flat=True)[20:])).delete()
+    return run, True
+
+
+# ==================== CONSULTAS ====================
+def abc_summary(by='revenue', scope='global', categoria=None, warehouse_id=None, abc_class=None, limit=50):
+    """Totales por clase y productos clasificados (de mayor a menor) desde la tabla cacheada"""
+    class_field = CLASS_FIELDS[(by, scope)]
+    metric = 'revenue' if by == 'revenue' else 'units'
+    rows = ProductABC.objects.filter(warehouse_id=warehouse_id if scope == 'warehouse' else None)
+    if categoria is not None:
+        rows = rows.filter(categoria=categoria)
+
+    classes = {
+        row[class_field]: {'products': row['products'], 'total': row['total']}
+        for row in rows.values(class_field).annotate(
+            products=Count('id'), total=Coalesce(Sum(metric), Decimal('0')),
+        ).order_by()
+    }
+    grand_total = sum(item['total'] for item in classes.values())
+    for item in classes.values():
+        item['share'] = round(float(item['total'] * 100 / grand_total), 2) if grand_total else 0.0
+
+    if abc_class:
+        rows = rows.filter(**{class_field: abc_class})
+    items = [
+        {
+            'product_id': row['product_id'], 'sku': row['product__sku'], 'name': row['product__name'],
+            'categoria': row['categoria'], 'revenue': row['revenue'], 'units': row['units'], 'class': row[class_field],
+        }
+        for row in rows.order_by(f'-{metric}', 'product_id').values(
+            'product_id', 'product__sku', 'product__name', 'categoria', 'revenue', 'units', class_field,
+        )[:limit]
+    ]
+    return {
+        'by': by, 'scope': scope,
+        'classes': {key: classes.get(key, {'products': 0, 'total': Decimal('0'), 'share': 0.0}) for key in 'ABC'},
+        'results': items,
+    }
@@ -7,6 +7,12 @@ from .views.rest_views import (
     ClientViewSet, WarehouseViewSet, ZoneViewSet, current_user, api_login, api_logout, reset_password, reset_password_confirm
 )
 from .views.api_views import search_products_for_sale, get_all_products_for_sale
+from .views.diagnostics_views import metrics, profile_list, profile_download
+from .views.export_views import export_data
+from .views.job_views import job_list, job_detail, job_download
+from .views.report_views import (
+    abc_report, expiring_lots_report, inventory_valuation_report, sales_summary_report, supplier_scorecard_report,
+)
 
 router = DefaultRouter()
 router.register(r'products', ProductViewSet, basename='product')
@@ -29,5 +35,17 @@ urlpatterns = [
     path('users/change-own-password/', UserViewSet.as_view({'post': 'change_own_password'}), name='api_change_own_password'),
     path('search-products-for-sale/', search_products_for_sale, name='api_search_products_for_sale'),
     path('all-products-for-sale/', get_all_products_for_sale, name='api_all_products_for_sale'),
+    path('export/<slug:dataset>.<slug:file_format>', export_data, name='api_export'),
+    path('metrics/', metrics, name='api_metrics'),
+    path('profiles/', profile_list, name='api_profile_list'),
+    path('profiles/<str:profile_id>/', profile_download, name='api_profile_download'),
+    path('jobs/', job_list, name='api_job_list'),
+    path('jobs/<int:job_id>/', job_detail, name='api_job_detail'),
+    path('jobs/<int:job_id>/download/', job_download, name='api_job_download'),
+    path('reports/sales-summary/', sales_summary_report, name='api_report_sales_summary'),
+    path('reports/abc/', abc_report, name='api_report_abc'),
+    path('reports/valuation/', inventory_valuation_report, name='api_report_valuation'),
+    path('reports/expiring/', expiring_lots_report, name='api_report_expiring'),
+    path('reports/suppliers/', supplier_scorecard_report, name='api_report_suppliers'),
 ]
 
@@ -1,5 +1,7 @@
 # gestion/backends.py
 
+import logging
+
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import get_user_model
 from django.db.models import Q
@@ -7,6 +9,8 @@ from django.conf import settings
 
 User = get_user_model()
 
+logger = logging.getLogger(__name__)
+
 
 class EmailOrUsernameBackend(ModelBackend):
     """
@@ -47,20 +51,17 @@ class EmailOrUsernameBackend(ModelBackend):
                     user = User.objects.filter(
                         Q(username__icontains=username) | Q(email__icontains=username)
                     ).first()
-            except Exception as e:
-                if settings.DEBUG:
-                    print(f"ERROR en autenticación: Error al buscar usuario: {e}")
+            except Exception:
+                logger.exception('Error al buscar usuario para autenticación')
                 return None
             
             if not user:
-                if settings.DEBUG:
-                    print(f"DEBUG: Usuario no encontrado en Django: {username}")
+                logger.debug('Usuario no encontrado en Django: %s', username)
                 return None
             
             # Si el usuario no tiene email, no se puede verificar en Firebase
             if not user.email:
-                if settings.DEBUG:
-                    print(f"DEBUG: Usuario {user.username} no tiene email configurado")
+                logger.debug('Usuario %s no tiene email configurado', user.username)
                 return None
             
             # Normalizar el email (trim y lowercase) antes de verificar en Firebase
@@ -73,18 +74,16 @@ class EmailOrUsernameBackend(ModelBackend):
             try:
                 from gestion.firebase_service import verify_firebase_password
                 firebase_result = verify_firebase_password(email, password)
-            except Exception as e:
-                if settings.DEBUG:
-                    print(f"ERROR: Excepción al verificar contraseña en Firebase: {e}")
+            except Exception:
+                logger.exception('Excepción al verificar contraseña en Firebase')
                 # Si hay un error en Firebase, no autenticar (retornar None, no lanzar excepción)
                 return None
             
-            if settings.DEBUG:
-                if firebase_result.get('success'):
-                    print(f"DEBUG: Autenticación exitosa en Firebase para {email}")
-                else:
-                    error = firebase_result.get('error', 'Error desconocido')
-                    print(f"DEBUG: Error en autenticación Firebase para {email}: {error}")
+            if firebase_result.get('success'):
+                logger.debug('Autenticación exitosa en Firebase para %s', email)
+            else:
+                logger.debug('Error en autenticación Firebase para %s: %s',
+                             email, firebase_result.get('error', 'Error desconocido'))
             
             if firebase_result and firebase_result.get('success'):
                 # Las credenciales son correctas en Firebase
@@ -100,19 +99,35 @@ class EmailOrUsernameBackend(ModelBackend):
                     # Verificar que el usuario puede autenticarse
                     if user.is_active:
                         return user
-                except Exception as e:
-                    if settings.DEBUG:
-                        print(f"ERROR: Excepción al guardar usuario: {e}")
+                except Exception:
+                    logger.exception('Excepción al guardar usuario %s', user.username)
                     return None
             
             return None
             
-        except Exception as e:
+        except Exception:
             # Capturar cualquier excepción no esperada y retornar None en lugar de lanzarla
             # Esto previene que Django devuelva un error 400
-            if settings.DEBUG:
-                print(f"ERROR CRÍTICO en autenticación: {e}")
-                import traceback
-                traceback.print_exc()
+            logger.exception('Error crítico en autenticación')
             return None
 
+
+
+class LocalFakeBackend(ModelBackend):
+    """
+    Backend SOLO para pruebas de carga locales (LOADTEST_FAKE_AUTH=True).
+    Acepta cualquier usuario activo existente sin consultar Firebase, para que
+    la latencia del proveedor de identidad no contamine las mediciones.
+    """
+    
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if not getattr(settings, 'LOADTEST_FAKE_AUTH', False) or not username:
+            return None
+        
+        username = username.strip().lower()
+        user = User.objects.filter(
+            Q(username__iexact=username) | Q(email__iexact=username)
+        ).first()
+        if user and self.user_can_authenticate(user):
+            return user
+        return None
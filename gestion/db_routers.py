@@ -0,0 +1,78 @@
+# gestion/db_routers.py
+"""
+Router de base de datos con réplica de lectura opcional.
+
+- Las escrituras siempre van a la base principal ('default').
+- Las lecturas de modelos de 'gestion' van a la réplica solo cuando el
+  request actual lo permite (GET/HEAD sin escrituras recientes de la misma
+  sesión) o dentro de read_from_replica(), usado por reportes y comandos.
+- read_from_primary() fuerza la base principal para lecturas que deben ver
+  escrituras recientes de otros procesos (estado de las tareas en segundo
+  plano, tarea pendiente antes de encolar otra).
+- Sesiones, usuarios y demás apps de Django siempre leen de 'default' para
+  no depender del retraso de replicación al autenticar.
+- Si no hay réplica configurada, todo va a 'default'.
+"""
+import contextvars
+from contextlib import contextmanager
+
+from django.conf import settings
+
+REPLICA_ALIAS = 'replica'
+REPLICA_APP_LABELS = {'gestion'}
+
+_use_replica = contextvars.ContextVar('gestion_use_replica', default=False)
+
+
+def replica_enabled():
+    """Indica si hay una réplica configurada en DATABASES"""
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+def set_replica_reads(enabled):
+    """Habilita/deshabilita lecturas desde la réplica. Retorna un token para reset"""
+    return _use_replica.set(bool(enabled) and replica_enabled())
+
+
+def reset_replica_reads(token):
+    _use_replica.reset(token)
+
+
+@contextmanager
+def read_from_replica():
+    """Fuerza las lecturas del bloque hacia la réplica (reportes, exportaciones)"""
+    token = set_replica_reads(True)
+    try:
+        yield
+    finally:
+        reset_replica_reads(token)
+
+
+@contextmanager
+def read_from_primary():
+    """Fuerza las lecturas del bloque hacia la base principal"""
+    token = _use_replica.set(False)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+class ReadReplicaRouter:
+    """Envía lecturas seguras a la réplica y todo lo demás a 'default'"""
+
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and model._meta.app_label in REPLICA_APP_LABELS:
+            return REPLICA_ALIAS
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Ambas bases contienen los mismos datos
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # La réplica recibe el esquema por replicación (o sync_replica en local)
+        return db == 'default'
@@ -0,0 +1,435 @@
+# gestion/exports.py
+"""
+Exportación de datos a CSV y XLSX con memoria constante.
+
+Las filas se leen con `values_list(...).iterator(chunk_size=EXPORT_CHUNK_SIZE)`
+(cursor del lado del servidor en PostgreSQL), así que exportar 1k o 1M filas
+usa la misma memoria:
+- CSV: se genera por bloques y se envía con StreamingHttpResponse (los
+  primeros bytes salen de inmediato).
+- XLSX: workbook write-only de openpyxl (las filas se vuelcan a disco, no se
+  guardan en memoria) escrito a un archivo temporal.
+- JSON: objetos por bloques en un StreamingHttpResponse (iter_json).
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import router
+from django.db.models import Case, DecimalField, ExpressionWrapper, F, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from openpyxl import Workbook
+
+from .inventory_snapshots import check_stock_history, parse_moment, stock_as_of
+from .models import Inventory, Product, ProductMovement, SaleItem, Zone
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+CSV_ROWS_PER_CHUNK = 500
+
+
+class ExportDataset:
+    """Definición de una exportación: modelo, columnas (encabezado, lookup) y filtros"""
+    model = None
+    columns = ()
+    ordering = ()
+    sheet_title = None
+    # Filtros por id y por fecha que usa get_queryset (se validan antes de generar)
+    id_params = ()
+    date_params = ()
+
+    @property
+    def headers(self):
+        return [header for header, _ in self.columns]
+
+    def get_headers(self, params):
+        return self.headers
+
+    def validate(self, params):
+        """Mensaje de error si los parámetros no son válidos (antes de empezar a generar)"""
+        for name in self.id_params:
+            if params.get(name) and not str(params[name]).isdigit():
+                return f'{name} debe ser un id'
+        for name in self.date_params:
+            if params.get(name) and parse_date_param(params[name]) is None:
+                return f'{name} debe ser YYYY-MM-DD'
+        return None
+
+    def get_keys(self, params):
+        """Claves de cada fila en JSON (los lookups de las columnas)"""
+        return [lookup for _, lookup in self.columns]
+
+    def get_queryset(self, params):
+        return self.model.objects.all()
+
+    def format_row(self, row):
+        return row
+
+    def rows(self, params, using=None):
+        """Itera las filas (tuplas) sin cargar el queryset completo en memoria"""
+        queryset = self.get_queryset(params).order_by(*self.ordering)
+        queryset = queryset.values_list(*[lookup for _, lookup in self.columns])
+        queryset = queryset.using(using or router.db_for_read(self.model))
+        for row in queryset.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE):
+            yield self.format_row(row)
+
+
+def parse_date_param(value):
+    """parse_date que retorna None también con fechas bien formadas pero inexistentes (2024-02-30)"""
+    try:
+        return parse_date(value or '')
+    except ValueError:
+        return None
+
+
+def _date_range(queryset, field, params):
+    date_from = parse_date_param(params.get('date_from'))
+    date_to = parse_date_param(params.get('date_to'))
+    if date_from:
+        queryset = queryset.filter(**{f'{field}__date__gte': date_from})
+    if date_to:
+        queryset = queryset.filter(**{f'{field}__date__lte': date_to})
+    return queryset
+
+
+class ProductExport(ExportDataset):
+    model = Product
+    sheet_title = 'Productos'
+    ordering = ('sku',)
+    columns = (
+        ('SKU', 'sku'), ('EAN/UPC', 'ean_upc'), ('Nombre', 'name'), ('Categoría', 'categoria'),
+        ('Marca', 'marca'), ('UOM venta', 'uom_venta'), ('Costo estándar', 'costo_estandar'),
+        ('Costo promedio', 'costo_promedio'), ('Precio venta', 'precio_venta'), ('IVA %', 'impuesto_iva'),
+        ('Stock mínimo', 'stock_minimo'), ('Stock máximo', 'stock_maximo'),
+        ('Punto reorden', 'punto_reorden'), ('Perecedero', 'perishable'), ('Activo', 'is_active'),
+    )
+
+    def get_queryset(self, params):
+        queryset = Product.objects.all()
+        if not params.get('include_inactive'):
+            queryset = queryset.filter(is_active=True)
+        if params.get('categoria'):
+            queryset = queryset.filter(categoria=params['categoria'])
+        return queryset
+
+
+class InventoryExport(ExportDataset):
+    model = Inventory
+    sheet_title = 'Inventario'
+    ordering = ('zone__warehouse__name', 'zone__name', 'product__sku')
+    columns = (
+        ('Bodega', 'zone__warehouse__name'), ('Zona', 'zone__name'), ('SKU', 'product__sku'),
+        ('Producto', 'product__name'), ('Cantidad', 'quantity'), ('Actualizado', 'updated_at'),
+    )
+    id_params = ('warehouse', 'zone')
+
+    def get_queryset(self, params):
+        queryset = Inventory.objects.all()
+        if params.get('warehouse'):
+            queryset = queryset.filter(zone__warehouse_id=params['warehouse'])
+        if params.get('zone'):
+            queryset = queryset.filter(zone_id=params['zone'])
+        return queryset
+
+
+class MovementExport(ExportDataset):
+    """Movimientos de la tabla (los meses archivados se consultan en movements/archive/)"""
+    model = ProductMovement
+    sheet_title = 'Movimientos'
+    ordering = ('fecha', 'id')
+    columns = (
+        ('ID', 'id'), ('Fecha', 'fecha'), ('Tipo', 'tipo'), ('SKU', 'product__sku'),
+        ('Producto', 'product__name'), ('Cantidad', 'cantidad'), ('Zona origen', 'origin_zone__name'),
+        ('Zona destino', 'destination_zone__name'), ('Proveedor', 'supplier__razon_social'),
+        ('Lote', 'lote'), ('Vencimiento', 'fecha_vencimiento'), ('Documento', 'doc_referencia'),
+        ('Motivo', 'motivo'), ('Usuario', 'performed_by__username'),
+    )
+    id_params = ('product',)
+    date_params = ('date_from', 'date_to')
+
+    def get_queryset(self, params):
+        queryset = _date_range(ProductMovement.objects.all(), 'fecha', params)
+        if params.get('tipo'):
+            queryset = queryset.filter(tipo=params['tipo'])
+        if params.get('product'):
+            queryset = queryset.filter(product_id=params['product'])
+        return queryset
+
+
+class SaleExport(ExportDataset):
+    """Una fila por línea de venta"""
+    model = SaleItem
+    sheet_title = 'Ventas'
+    ordering = ('sale__sale_date', 'sale_id', 'id')
+    columns = (
+        ('Venta', 'sale_id'), ('Fecha', 'sale__sale_date'), ('Cliente', 'sale__client__name'),
+        ('Vendedor', 'sale__user__username'), ('SKU', 'product__sku'), ('Producto', 'product__name'),
+        ('Cantidad', 'quantity'), ('Precio', 'price_at_sale'), ('Total venta', 'sale__total_amount'),
+    )
+    id_params = ('client',)
+    date_params = ('date_from', 'date_to')
+
+    @property
+    def headers(self):
+        return super().headers + ['Subtotal']
+
+    def get_queryset(self, params):
+        queryset = _date_range(SaleItem.objects.all(), 'sale__sale_date', params)
+        if params.get('client'):
+            queryset = queryset.filter(sale__client_id=params['client'])
+        return queryset
+
+    def format_row(self, row):
+        quantity, price = row[6], row[7]
+        return row + (quantity * price if price is not None else None,)
+
+
+def unit_cost(prefix='product__'):
+    """Costo unitario del producto: costo promedio o, si no hay, el costo estándar"""
+    return Case(
+        When(**{f'{prefix}costo_promedio__gt': 0}, then=F(f'{prefix}costo_promedio')),
+        default=Coalesce(F(f'{prefix}costo_estandar'), Value(Decimal('0'))),
+        output_field=DecimalField(max_digits=18, decimal_places=6),
+    )
+
+
+class ValuationExport(ExportDataset):
+    """
+    Valorización de inventario (stock × costo) en una sola consulta agregada
+    sobre Inventory, Zone, Warehouse y Product. ?group_by=detail (default, una
+    fila por producto y zona), warehouse, zone, category o product.
+    Con ?as_of=YYYY-MM-DD[THH:MM] usa el stock a esa fecha (inventory_snapshots)
+    valorizado al costo actual; ese modo agrupa en memoria.
+    """
+    model = Inventory
+    sheet_title = 'Valorización'
+    GROUPINGS = {
+        'detail': (
+            ('Bodega', 'zone__warehouse__name'), ('Zona', 'zone__name'), ('SKU', 'product__sku'),
+            ('Producto', 'product__name'), ('Categoría', 'product__categoria'),
+        ),
+        'warehouse': (('Bodega ID', 'zone__warehouse_id'), ('Bodega', 'zone__warehouse__name')),
+        'zone': (('Bodega', 'zone__warehouse__name'), ('Zona ID', 'zone_id'), ('Zona', 'zone__name')),
+        'category': (('Categoría', 'product__categoria'),),
+        'product': (
+            ('Producto ID', 'product_id'), ('SKU', 'product__sku'), ('Producto', 'product__name'),
+            ('Categoría', 'product__categoria'),
+        ),
+    }
+
+    def grouping(self, params):
+        group_by = params.get('group_by') or 'detail'
+        return group_by, self.GROUPINGS.get(group_by, self.GROUPINGS['detail'])
+
+    def get_headers(self, params):
+        group_by, columns = self.grouping(params)
+        values = ['Cantidad', 'Costo unitario', 'Valor'] if group_by == 'detail' else ['Cantidad', 'Valor']
+        return [header for header, _ in columns] + values
+
+    def get_keys(self, params):
+        group_by, columns = self.grouping(params)
+        values = ['quantity', 'unit_cost', 'value'] if group_by == 'detail' else ['quantity', 'value']
+        return [lookup for _, lookup in columns] + values
+
+    id_params = ('warehouse', 'zone')
+
+    def validate(self, params):
+        error = super().validate(params)
+        if error:
+            return error
+        if params.get('as_of'):
+            moment = parse_moment(params['as_of'])
+            if moment is None:
+                return 'as_of debe ser YYYY-MM-DD o fecha y hora ISO'
+            try:
+                check_stock_history(moment)
+            except ValueError as e:
+                return str(e)
+        return None
+
+    def get_queryset(self, params):
+        queryset = Inventory.objects.all()
+        if not params.get('include_zero'):
+            queryset = queryset.filter(quantity__gt=0)
+        if params.get('warehouse'):
+            queryset = queryset.filter(zone__warehouse_id=params['warehouse'])
+        if params.get('zone'):
+            queryset = queryset.filter(zone_id=params['zone'])
+        if params.get('categoria'):
+            queryset = queryset.filter(product__categoria=params['categoria'])
+        return queryset
+
+    def rows(self, params, using=None):
+        group_by, columns = self.grouping(params)
+        if params.get('as_of'):
+            yield from self.rows_as_of(params, using, group_by)
+            return
+        lookups = [lookup for _, lookup in columns]
+        value = ExpressionWrapper(F('quantity') * unit_cost(), output_field=DecimalField(max_digits=24, decimal_places=6))
+        queryset = self.get_queryset(params).using(using or router.db_for_read(self.model))
+        if group_by == 'detail':
+            queryset = queryset.annotate(unit_cost=unit_cost(), value=value).order_by(*lookups[:3])
+            queryset = queryset.values_list(*lookups, 'quantity', 'unit_cost', 'value')
+        else:
+            names = [lookup for lookup in lookups if not lookup.endswith('_id')] or lookups
+            queryset = queryset.values(*lookups).annotate(
+                total_quantity=Sum('quantity'), total_value=Sum(value),
+            ).order_by(*names).values_list(*lookups, 'total_quantity', 'total_value')
+        cent = Decimal('0.01')
+        for row in queryset.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE):
+            yield row[:-1] + (Decimal(row[-1] or 0).quantize(cent),)
+
+    def rows_as_of(self, params, using, group_by):
+        """Mismas filas que rows() a partir del stock reconstruido a la fecha"""
+        using = using or router.db_for_read(self.model)
+        zones = Zone.objects.using(using)
+        if params.get('warehouse'):
+            zones = zones.filter(warehouse_id=params['warehouse'])
+        if params.get('zone'):
+            zones = zones.filter(id=params['zone'])
+        zones = {zone_id: (warehouse_id, warehouse, name) for zone_id, warehouse_id, warehouse, name in zones.values_list(
+            'id', 'warehouse_id', 'warehouse__name', 'name',
+        )}
+        filtered = bool(params.get('warehouse') or params.get('zone'))
+        state, _ = stock_as_of(parse_moment(params['as_of']), zone_ids=set(zones) if filtered else None, using=using)
+        include_zero = bool(params.get('include_zero'))
+        state = {key: quantity for key, quantity in state.items() if key[1] in zones and (quantity or include_zero)}
+
+        products = {}
+        product_ids = sorted({product_id for product_id, _ in state})
+        for start in range(0, len(product_ids), 1000):
+            queryset = Product.objects.using(using).filter(id__in=product_ids[start:start + 1000])
+            if params.get('categoria'):
+                queryset = queryset.filter(categoria=params['categoria'])
+            for product_id, *info in queryset.annotate(cost=unit_cost('')).values_list('id', 'sku', 'name', 'categoria', 'cost'):
+                products[product_id] = info
+
+        groups = {}
+        for (product_id, zone_id), quantity in state.items():
+            if product_id not in products:
+                continue
+            sku, name, categoria, cost = products[product_id]
+            warehouse_id, warehouse, zone = zones[zone_id]
+            cost = Decimal(cost or 0)
+            keys = {
+                'detail': (warehouse, zone, sku, name, categoria, cost),
+                'warehouse': (warehouse_id, warehouse),
+                'zone': (warehouse, zone_id, zone),
+                'category': (categoria,),
+                'product': (product_id, sku, name, categoria),
+            }
+            totals = groups.setdefault(keys[group_by], [0, Decimal('0')])
+            totals[0] += quantity
+            totals[1] += quantity * cost
+
+        sort_keys = {
+            'detail': lambda key: key[:3], 'warehouse': lambda key: (key[1], key[0]),
+            'zone': lambda key: (key[0], key[2], key[1]), 'category': lambda key: key, 'product': lambda key: (key[1], key[0]),
+        }
+        cent = Decimal('0.01')
+        for key in sorted(groups, key=lambda key: tuple('' if part is None else part for part in sort_keys[group_by](key))):
+            quantity, value = groups[key]
+            if group_by == 'detail':
+                yield key[:-1] + (quantity, key[-1], value.quantize(cent))
+            else:
+                yield key + (quantity, value.quantize(cent))
+
+
+DATASETS = {
+    'products': ProductExport(),
+    'inventory': InventoryExport(),
+    'movements': MovementExport(),
+    'sales': SaleExport(),
+    'valuation': ValuationExport(),
+}
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+def _plain_value(value):
+    """Excel no admite datetime con zona horaria: se usa la hora local sin tzinfo"""
+    if isinstance(value, datetime) and timezone.is_aware(value):
+        return timezone.localtime(value).replace(tzinfo=None)
+    return value
+
+
+def iter_csv(dataset, params, using=None):
+    """Genera el CSV por bloques de texto (con BOM para que Excel detecte UTF-8)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write('\ufeff')
+    writer.writerow(dataset.get_headers(params))
+    # Los encabezados salen antes de ejecutar la consulta
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate(0)
+    pending = 0
+    for row in dataset.rows(params, using):
+        writer.writerow([_plain_value(value) for value in row])
+        pending += 1
+        if pending >= CSV_ROWS_PER_CHUNK:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+            pending = 0
+    yield buffer.getvalue()
+
+
+def write_xlsx(dataset, params, fileobj, using=None):
+    """Escribe un workbook write-only de openpyxl en `fileobj`"""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=dataset.sheet_title)
+    sheet.append(dataset.get_headers(params))
+    for row in dataset.rows(params, using):
+        sheet.append([_plain_value(value) for value in row])
+    workbook.save(fileobj)
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} no es serializable a JSON')
+
+
+def _dumps(value):
+    if orjson is not None:
+        return orjson.dumps(value, default=_json_default).decode()
+    return json.dumps(value, default=_json_default, ensure_ascii=False, separators=(',', ':'))
+
+
+def iter_json(dataset, params, using=None, totals=(), extra=None):
+    """
+    Genera {"results": [...], "count": n, "totals": {...}} por bloques.
+    Las claves de `totals` se suman al recorrer las filas (sin otra consulta).
+    """
+    keys = dataset.get_keys(params)
+    sums = {key: 0 for key in totals}
+    head = _dumps(extra or {})[:-1]
+    yield head + (',' if len(head) > 1 else '') + '"results":['
+    count = 0
+    chunk = []
+    for row in dataset.rows(params, using):
+        item = dict(zip(keys, row))
+        for key in sums:
+            sums[key] += item[key] or 0
+        chunk.append(_dumps(item))
+        count += 1
+        if len(chunk) >= CSV_ROWS_PER_CHUNK:
+            yield ('' if count == len(chunk) else ',') + ','.join(chunk)
+            chunk = []
+    if chunk:
+        yield ('' if count == len(chunk) else ',') + ','.join(chunk)
+    yield '],"count":' + str(count) + ',"totals":' + _dumps(sums) + '}'
@@ -0,0 +1,122 @@
+# gestion/fieldsets.py
+"""
+Sparse fieldsets para los endpoints de la API.
+
+- `?fields=id,name,sku`: solo esos campos del serializer.
+- `?view=lite`: los campos de `Meta.lite_fields` del serializer.
+
+El serializer solo construye los campos pedidos y el ViewSet reduce la
+consulta con `.only()` y `select_related` a lo que esos campos necesitan.
+Los campos calculados (propiedades, SerializerMethodField) declaran lo que
+usan del modelo en `Meta.field_requires`; si un campo pedido no se puede
+resolver, la consulta no se reduce (solo la salida).
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+LITE_VIEW = 'lite'
+
+
+def requested_fields(request, serializer_class):
+    """Campos pedidos en el request o None si se quiere la representación completa"""
+    if request is None or request.method not in ('GET', 'HEAD'):
+        return None
+    params = getattr(request, 'query_params', request.GET)
+    raw = params.get('fields')
+    if raw:
+        names = {name.strip() for name in raw.split(',') if name.strip()}
+    elif params.get('view') == LITE_VIEW:
+        names = set(getattr(getattr(serializer_class, 'Meta', None), 'lite_fields', ()))
+    else:
+        return None
+    return names or None
+
+
+class SparseFieldsetSerializerMixin:
+    """Serializer que solo construye los campos pedidos con ?fields= o ?view=lite"""
+
+    def get_field_names(self, declared_fields, info):
+        names = super().get_field_names(declared_fields, info)
+        # Solo el serializer raíz (o el hijo de un many=True raíz) recibe el request en su
+        # contexto; los serializers anidados se construyen completos
+        requested = requested_fields(self._context.get('request'), type(self))
+        if requested is None:
+            return names
+        sparse = [name for name in names if name in requested]
+        return sparse or names
+
+
+def _model_paths(serializer):
+    """Rutas del modelo ('campo' o 'fk__campo') que usan los campos del serializer, o None"""
+    requires = getattr(serializer.Meta, 'field_requires', {})
+    paths = set()
+    for name, field in serializer.fields.items():
+        if name in requires:
+            paths.update(requires[name])
+        elif isinstance(field, ListSerializer):
+            # Relaciones inversas (items): el ViewSet decide el prefetch
+            continue
+        elif isinstance(field, BaseSerializer) or field.source == '*':
+            return None
+        else:
+            paths.add(field.source.replace('.', '__'))
+    return paths
+
+
+def narrow_queryset(queryset, serializer):
+    """Aplica .only()/select_related según los campos del serializer (sparse)"""
+    paths = _model_paths(serializer)
+    if paths is None:
+        return queryset
+
+    only = {queryset.model._meta.pk.name}
+    related = set()
+    for path in paths:
+        model = queryset.model
+        parts = path.split('__')
+        for index, part in enumerate(parts):
+            try:
+                field = model._meta.get_field(part)
+            except FieldDoesNotExist:
+                if index == 0 and part in queryset.query.annotations:
+                    break
+                return queryset
+            if not field.is_relation:
+                only.add('__'.join(parts[:index + 1]))
+                break
+            if not field.concrete or field.many_to_many:
+                # Relación inversa o M2M: no se carga con .only() (se resuelve con su propia consulta)
+                break
+            only.add('__'.join(parts[:index + 1]))
+            if index + 1 < len(parts):
+                related.add('__'.join(parts[:index + 1]))
+            model = field.related_model
+
+    queryset = queryset.select_related(None)
+    if related:
+        queryset = queryset.select_related(*sorted(related))
+    return queryset.only(*sorted(only))
+
+
+class SparseFieldsetViewMixin:
+    """
+    ViewSet con soporte de ?fields= / ?view=lite.
+    Los prefetch costosos deben condicionarse con `field_requested(nombre)`.
+    """
+
+    def get_sparse_fields(self):
+        """Campos que se van a serializar o None si es la representación completa"""
+        if not hasattr(self, '_sparse_fields'):
+            requested = requested_fields(getattr(self, 'request', None), self.get_serializer_class())
+            self._sparse_fields = None if requested is None else set(self.get_serializer().fields)
+        return self._sparse_fields
+
+    def field_requested(self, name):
+        fields = self.get_sparse_fields()
+        return fields is None or name in fields
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.get_sparse_fields() is None:
+            return queryset
+        return narrow_queryset(queryset, self.get_serializer())
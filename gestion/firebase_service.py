@@ -1,15 +1,46 @@
 # gestion/firebase_service.py
 
+import logging
 import os
+import time
+from contextlib import contextmanager
 import firebase_admin
 from firebase_admin import credentials, auth
 from django.conf import settings
 from decouple import config
 import requests
+from .metrics import FIREBASE_LATENCY, FIREBASE_FAILURES
+
+logger = logging.getLogger(__name__)
 
 # Variable global para verificar si Firebase está inicializado
 _firebase_initialized = False
 
+
+@contextmanager
+def _track_firebase(operation):
+    """Registra latencia y fallos de una llamada a Firebase en las métricas"""
+    start = time.perf_counter()
+    try:
+        yield
+    except auth.UserNotFoundError:
+        # Usuario inexistente es una respuesta válida, no un fallo del servicio
+        raise
+    except Exception as e:
+        FIREBASE_FAILURES.inc(operation=operation, reason=type(e).__name__)
+        raise
+    finally:
+        FIREBASE_LATENCY.observe(time.perf_counter() - start, operation=operation)
+
+
+def _firebase_rest_post(operation, url, payload):
+    """POST a la API REST de Firebase con métricas (status distinto de 200 cuenta como fallo)"""
+    with _track_firebase(operation):
+        response = requests.post(url, json=payload, timeout=10)
+    if response.status_code != 200:
+        FIREBASE_FAILURES.inc(operation=operation, reason=f'http_{response.status_code}')
+    return response
+
 def initialize_firebase():
     """
     Inicializa Firebase Admin SDK.
@@ -59,18 +90,14 @@ def initialize_firebase():
             return
         
         # Si no hay credenciales, no inicializar Firebase
-        # Solo mostrar advertencia si estamos en modo DEBUG
-        if settings.DEBUG:
-            print("ADVERTENCIA: No se encontraron credenciales de Firebase. Las funciones de Firebase no estaran disponibles.")
-            print("   Para habilitar Firebase, descarga el archivo de credenciales desde Firebase Console")
-            print("   y guardalo como 'firebase-credentials.json' en la raiz del proyecto.")
-            print("   O configura las variables de entorno FIREBASE_PROJECT_ID, FIREBASE_PRIVATE_KEY, FIREBASE_CLIENT_EMAIL")
+        logger.warning(
+            'No se encontraron credenciales de Firebase; las funciones de Firebase no estaran disponibles. '
+            'Guarda firebase-credentials.json en la raiz del proyecto o configura FIREBASE_PROJECT_ID, '
+            'FIREBASE_PRIVATE_KEY y FIREBASE_CLIENT_EMAIL.'
+        )
         
     except Exception as e:
-        # Solo mostrar error si estamos en modo DEBUG
-        if settings.DEBUG:
-            print(f"ERROR: Error al inicializar Firebase: {e}")
-            print("   Las funciones de Firebase no estaran disponibles.")
+        logger.error('Error al inicializar Firebase, las funciones de Firebase no estaran disponibles: %s', e)
 
 
 def create_firebase_user(email, password, display_name=None, disabled=False):
@@ -92,22 +119,21 @@ def create_firebase_user(email, password, display_name=None, disabled=False):
         if not _firebase_initialized:
             return None
         
-        user_record = auth.create_user(
-            email=email,
-            password=password,
-            display_name=display_name,
-            disabled=disabled
-        )
+        with _track_firebase('create_user'):
+            user_record = auth.create_user(
+                email=email,
+                password=password,
+                display_name=display_name,
+                disabled=disabled
+            )
         
         return user_record
     except auth.EmailAlreadyExistsError:
-        if settings.DEBUG:
-            print(f"ADVERTENCIA: El usuario con email {email} ya existe en Firebase")
+        logger.warning('El usuario con email %s ya existe en Firebase', email)
         # Intentar obtener el usuario existente
         return get_firebase_user_by_email(email)
     except Exception as e:
-        if settings.DEBUG:
-            print(f"ERROR: Error al crear usuario en Firebase: {e}")
+        logger.error('Error al crear usuario en Firebase: %s', e)
         return None
 
 
@@ -142,12 +168,12 @@ def update_firebase_user(uid, email=None, password=None, display_name=None, disa
             update_data['disabled'] = disabled
         
         if update_data:
-            user_record = auth.update_user(uid, **update_data)
+            with _track_firebase('update_user'):
+                user_record = auth.update_user(uid, **update_data)
             return user_record
         return None
     except Exception as e:
-        if settings.DEBUG:
-            print(f"ERROR: Error al actualizar usuario en Firebase: {e}")
+        logger.error('Error al actualizar usuario en Firebase: %s', e)
         return None
 
 
@@ -167,11 +193,11 @@ def delete_firebase_user(uid):
         if not _firebase_initialized:
             return False
         
-        auth.delete_user(uid)
+        with _track_firebase('delete_user'):
+            auth.delete_user(uid)
         return True
     except Exception as e:
-        if settings.DEBUG:
-            print(f"ERROR: Error al eliminar usuario de Firebase: {e}")
+        logger.error('Error al eliminar usuario de Firebase: %s', e)
         return False
 
 
@@ -199,13 +225,13 @@ def get_firebase_user_by_email(email):
         if not email:
             return None
         
-        user_record = auth.get_user_by_email(email)
+        with _track_firebase('get_user_by_email'):
+            user_record = auth.get_user_by_email(email)
         return user_record
     except auth.UserNotFoundError:
         return None
     except Exception as e:
-        if settings.DEBUG:
-            print(f"ERROR: Error al obtener usuario de Firebase: {e}")
+        logger.error('Error al obtener usuario de Firebase: %s', e)
         return None
 
 
@@ -230,8 +256,7 @@ def sync_django_user_to_firebase(django_user, password=None, old_email=None):
             return None
         
         if not django_user.email:
-            if settings.DEBUG:
-                print(f"ADVERTENCIA: No se puede sincronizar usuario en Firebase sin email: {django_user.username}")
+            logger.warning('No se puede sincronizar usuario en Firebase sin email: %s', django_user.username)
             return None
         
         # Normalizar emails
@@ -250,8 +275,7 @@ def sync_django_user_to_firebase(django_user, password=None, old_email=None):
         
         # 2. Si no se encuentra y hay email anterior, buscar por email anterior
         if not firebase_user and old_email_normalized and old_email_normalized != current_email:
-            if settings.DEBUG:
-                print(f"DEBUG: Usuario no encontrado con email actual {current_email}, buscando con email anterior {old_email_normalized}")
+            logger.debug('Usuario no encontrado con email actual %s, buscando con email anterior %s', current_email, old_email_normalized)
             firebase_user = get_firebase_user_by_email(old_email_normalized)
         
         if firebase_user:
@@ -279,8 +303,7 @@ def sync_django_user_to_firebase(django_user, password=None, old_email=None):
                 existing_user_with_new_email = get_firebase_user_by_email(current_email)
                 if existing_user_with_new_email and existing_user_with_new_email.uid != firebase_user.uid:
                     # El email ya está en uso por otro usuario, no actualizar el email
-                    if settings.DEBUG:
-                        print(f"ADVERTENCIA: El email {current_email} ya está en uso por otro usuario (UID: {existing_user_with_new_email.uid}). No se actualizará el email.")
+                    logger.warning('El email %s ya está en uso por otro usuario (UID: %s). No se actualizará el email.', current_email, existing_user_with_new_email.uid)
                 else:
                     # El email está disponible o pertenece al mismo usuario, actualizarlo
                     update_data['email'] = current_email
@@ -295,8 +318,7 @@ def sync_django_user_to_firebase(django_user, password=None, old_email=None):
                 error_msg = str(e)
                 # Si el error es que el email ya está en uso, no actualizar el email
                 if 'EMAIL_EXISTS' in error_msg or 'email already exists' in error_msg.lower():
-                    if settings.DEBUG:
-                        print(f"ADVERTENCIA: El email {current_email} ya está en uso por otro usuario. Actualizando solo otros campos.")
+                    logger.warning('El email %s ya está en uso por otro usuario. Actualizando solo otros campos.', current_email)
                     # Actualizar solo los campos que no son el email
                     update_data_no_email = {
                         'display_name': display_name,
@@ -306,8 +328,7 @@ def sync_django_user_to_firebase(django_user, password=None, old_email=None):
                         update_data_no_email['password'] = password
                     return update_firebase_user(firebase_user.uid, **update_data_no_email)
                 else:
-                    if settings.DEBUG:
-                        print(f"ERROR al actualizar usuario en Firebase: {error_msg}")
+                    logger.error('Error al actualizar usuario en Firebase: %s', error_msg)
                     raise
         else:
             # Usuario no existe en Firebase, crear nuevo
@@ -340,18 +361,13 @@ def sync_django_user_to_firebase(django_user, password=None, old_email=None):
                             update_data['password'] = password
                         return update_firebase_user(firebase_user.uid, **update_data)
                     else:
-                        if settings.DEBUG:
-                            print(f"ERROR: El email {current_email} ya existe pero no se pudo obtener el usuario")
+                        logger.error('El email %s ya existe pero no se pudo obtener el usuario', current_email)
                         return None
                 else:
-                    if settings.DEBUG:
-                        print(f"ERROR: Error al crear usuario en Firebase: {error_msg}")
+                    logger.error('Error al crear usuario en Firebase: %s', error_msg)
                     return None
     except Exception as e:
-        if settings.DEBUG:
-            print(f"ERROR: Error al sincronizar usuario con Firebase: {e}")
-            import traceback
-            traceback.print_exc()
+        logger.exception('Error al sincronizar usuario con Firebase')
         return None
 
 
@@ -391,15 +407,13 @@ def verify_firebase_password(email, password):
             "returnSecureToken": True
         }
         
-        if settings.DEBUG:
-            print(f"DEBUG: Intentando autenticar en Firebase con email: {email}")
+        logger.debug('Intentando autenticar en Firebase con email: %s', email)
         
-        response = requests.post(url, json=payload, timeout=10)
+        response = _firebase_rest_post('sign_in_with_password', url, payload)
         
         if response.status_code == 200:
             data = response.json()
-            if settings.DEBUG:
-                print(f"DEBUG: Autenticación exitosa en Firebase para {email}")
+            logger.debug('Autenticación exitosa en Firebase para %s', email)
             return {
                 'success': True,
                 'uid': data.get('localId'),
@@ -411,8 +425,7 @@ def verify_firebase_password(email, password):
                 error_message = error_data.get('error', {}).get('message', 'Error desconocido')
                 error_code = error_data.get('error', {}).get('code', None)
                 
-                if settings.DEBUG:
-                    print(f"DEBUG: Error en Firebase API: {error_code} - {error_message}")
+                logger.debug('Error en Firebase API: %s - %s', error_code, error_message)
                 
                 return {
                     'success': False,
@@ -422,8 +435,7 @@ def verify_firebase_password(email, password):
             except:
                 # Si no se puede parsear el JSON de error
                 error_message = f"HTTP {response.status_code}: {response.text}"
-                if settings.DEBUG:
-                    print(f"DEBUG: Error no parseable en Firebase: {error_message}")
+                logger.debug('Error no parseable en Firebase: %s', error_message)
                 return {
                     'success': False,
                     'error': error_message
@@ -431,24 +443,21 @@ def verify_firebase_password(email, password):
             
     except requests.exceptions.Timeout:
         error_msg = "Timeout al conectar con Firebase"
-        if settings.DEBUG:
-            print(f"ERROR: {error_msg}")
+        logger.error('Firebase: %s', error_msg)
         return {
             'success': False,
             'error': error_msg
         }
     except requests.exceptions.RequestException as e:
         error_msg = f"Error de conexión con Firebase: {str(e)}"
-        if settings.DEBUG:
-            print(f"ERROR: {error_msg}")
+        logger.error('Firebase: %s', error_msg)
         return {
             'success': False,
             'error': error_msg
         }
     except Exception as e:
         error_msg = f"Error inesperado: {str(e)}"
-        if settings.DEBUG:
-            print(f"ERROR: {error_msg}")
+        logger.error('Firebase: %s', error_msg)
         return {
             'success': False,
             'error': error_msg
@@ -499,20 +508,14 @@ def send_password_reset_email(email):
             "continueUrl": continue_url
         }
         
-        if settings.DEBUG:
-            print(f"DEBUG: Enviando solicitud de restablecimiento de contraseña para {email}")
-            print(f"DEBUG: URL: {url}")
-            print(f"DEBUG: Payload: {payload}")
+        logger.debug('Enviando solicitud de restablecimiento de contraseña para %s', email)
         
-        response = requests.post(url, json=payload, timeout=10)
+        response = _firebase_rest_post('send_password_reset', url, payload)
         
-        if settings.DEBUG:
-            print(f"DEBUG: Respuesta de Firebase: Status {response.status_code}")
-            print(f"DEBUG: Respuesta: {response.text}")
+        logger.debug('Respuesta de Firebase: status %s, cuerpo %s', response.status_code, response.text)
         
         if response.status_code == 200:
-            if settings.DEBUG:
-                print(f"DEBUG: Email de restablecimiento enviado exitosamente a {email}")
+            logger.debug('Email de restablecimiento enviado exitosamente a %s', email)
             return {
                 'success': True,
                 'message': 'Se ha enviado un enlace de restablecimiento de contraseña a tu correo electrónico'
@@ -523,8 +526,7 @@ def send_password_reset_email(email):
                 error_message = error_data.get('error', {}).get('message', 'Error desconocido')
                 error_code = error_data.get('error', {}).get('code', None)
                 
-                if settings.DEBUG:
-                    print(f"DEBUG: Error de Firebase: {error_code} - {error_message}")
+                logger.debug('Error de Firebase: %s - %s', error_code, error_message)
                 
                 return {
                     'success': False,
@@ -532,8 +534,7 @@ def send_password_reset_email(email):
                 }
             except:
                 error_msg = f'Error HTTP {response.status_code}: {response.text}'
-                if settings.DEBUG:
-                    print(f"DEBUG: {error_msg}")
+                logger.debug('Firebase: %s', error_msg)
                 return {
                     'success': False,
                     'error': error_msg
@@ -541,8 +542,7 @@ def send_password_reset_email(email):
                 
     except Exception as e:
         error_msg = f"Error inesperado: {str(e)}"
-        if settings.DEBUG:
-            print(f"ERROR: {error_msg}")
+        logger.error('Firebase: %s', error_msg)
         return {
             'success': False,
             'error': error_msg
@@ -578,19 +578,14 @@ def verify_password_reset_code_and_change_password(oob_code, new_password):
             "newPassword": new_password
         }
         
-        if settings.DEBUG:
-            print(f"DEBUG: Verificando código y cambiando contraseña")
-            print(f"DEBUG: URL: {url}")
+        logger.debug('Verificando código y cambiando contraseña')
         
-        response = requests.post(url, json=payload, timeout=10)
+        response = _firebase_rest_post('reset_password', url, payload)
         
-        if settings.DEBUG:
-            print(f"DEBUG: Respuesta de Firebase: Status {response.status_code}")
-            print(f"DEBUG: Respuesta: {response.text}")
+        logger.debug('Respuesta de Firebase: status %s, cuerpo %s', response.status_code, response.text)
         
         if response.status_code == 200:
-            if settings.DEBUG:
-                print(f"DEBUG: Contraseña cambiada exitosamente")
+            logger.debug('Contraseña cambiada exitosamente')
             return {
                 'success': True,
                 'message': 'Contraseña cambiada exitosamente'
@@ -601,8 +596,7 @@ def verify_password_reset_code_and_change_password(oob_code, new_password):
                 error_message = error_data.get('error', {}).get('message', 'Error desconocido')
                 error_code = error_data.get('error', {}).get('code', None)
                 
-                if settings.DEBUG:
-                    print(f"DEBUG: Error de Firebase: {error_code} - {error_message}")
+                logger.debug('Error de Firebase: %s - %s', error_code, error_message)
                 
                 return {
                     'success': False,
@@ -610,8 +604,7 @@ def verify_password_reset_code_and_change_password(oob_code, new_password):
                 }
             except:
                 error_msg = f'Error HTTP {response.status_code}: {response.text}'
-                if settings.DEBUG:
-                    print(f"DEBUG: {error_msg}")
+                logger.debug('Firebase: %s', error_msg)
                 return {
                     'success': False,
                     'error': error_msg
@@ -619,8 +612,7 @@ def verify_password_reset_code_and_change_password(oob_code, new_password):
                 
     except Exception as e:
         error_msg = f"Error inesperado: {str(e)}"
-        if settings.DEBUG:
-            print(f"ERROR: {error_msg}")
+        logger.error('Firebase: %s', error_msg)
         return {
             'success': False,
             'error': error_msg
@@ -0,0 +1,206 @@
+# gestion/forecasting.py
+"""
+Pronóstico de demanda y punto de reorden sugerido para todo el catálogo.
+
+- Demanda diaria por producto desde los resúmenes de ventas (SalesRollup,
+  dimensión product) en una sola consulta en streaming, guardada en arreglos
+  compactos (producto, día, unidades).
+- Por bloques de productos se arma la matriz densa (productos × días) y se
+  calculan con NumPy, sin ciclos por producto: promedio móvil de los
+  últimos días, suavizamiento exponencial simple (producto matricial con los
+  pesos α(1-α)^k), desviación estándar diaria y coeficiente de variación.
+- Stock de seguridad = z(nivel de servicio) × σ diaria × √lead time;
+  punto de reorden = pronóstico diario × lead time + stock de seguridad.
+  El lead time es el real del proveedor preferente (o el de menor costo)
+  según el scorecard de proveedores, o el declarado si no hay suficientes
+  órdenes recibidas.
+
+apply_suggestions() escribe punto_reorden / stock_minimo con bulk_update en
+los productos con suficiente historial.
+"""
+import time
+from array import array
+from datetime import timedelta
+from decimal import Decimal
+from statistics import NormalDist
+
+import numpy as np
+from django.conf import settings
+from django.db.models import BigIntegerField
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from .models import Product, ProductSupplier, SalesRollup
+from .sales_rollups import catch_up
+from .supplier_scorecard import actual_lead_times
+
+WINDOW_DAYS = getattr(settings, 'FORECAST_WINDOW_DAYS', 365)
+MOVING_AVERAGE_DAYS = getattr(settings, 'FORECAST_MOVING_AVERAGE_DAYS', 28)
+ALPHA = getattr(settings, 'FORECAST_ALPHA', 0.3)
+SERVICE_LEVEL = getattr(settings, 'FORECAST_SERVICE_LEVEL', 0.95)
+DEFAULT_LEAD_TIME = getattr(settings, 'FORECAST_DEFAULT_LEAD_TIME', 7)
+# Productos por bloque: la matriz de un bloque ocupa CHUNK_PRODUCTS × días × 8 bytes
+CHUNK_PRODUCTS = 5000
+LOAD_CHUNK_SIZE = 10000
+
+
+def _window(window_days):
+    """Ventana de días cerrados que termina ayer (el día en curso está incompleto)"""
+    date_to = timezone.localdate() - timedelta(days=1)
+    return date_to - timedelta(days=window_days - 1), date_to
+
+
+def _load_demand(index, date_from, date_to):
+    """Arreglos (fila del producto, día, unidades) de las ventas de los productos de `index`"""
+    rows = SalesRollup.objects.filter(
+        dimension='product', date__gte=date_from, date__lte=date_to,
+    ).exclude(key='').annotate(product_key=Cast('key', BigIntegerField())).values_list('product_key', 'date', 'units')
+
+    positions, days, units = array('q'), array('q'), array('d')
+    start = date_from.toordinal()
+    for product_id, date, quantity in rows.iterator(chunk_size=LOAD_CHUNK_SIZE):
+        position = index.get(product_id)
+        if position is not None and quantity:
+            positions.append(position)
+            days.append(date.toordinal() - start)
+            units.append(quantity)
+    positions = np.frombuffer(positions, dtype=np.int64) if positions else np.empty(0, dtype=np.int64)
+    days = np.frombuffer(days, dtype=np.int64) if days else np.empty(0, dtype=np.int64)
+    units = np.frombuffer(units, dtype=np.float64) if units else np.empty(0, dtype=np.float64)
+    order = np.argsort(positions, kind='stable')
+    return positions[order], days[order], units[order]
+
+
+def _lead_times(product_ids):
+    """Lead time (días) del proveedor preferente, o del de menor costo, por producto"""
+    relations = {}
+    for product_id, supplier_id, lead_time in ProductSupplier.objects.filter(
+        product_id__in=product_ids, supplier__estado='ACTIVO',
+    ).order_by('product_id', '-preferente', 'costo', 'id').values_list('product_id', 'supplier_id', 'lead_time_dias'):
+        relations.setdefault(product_id, (supplier_id, lead_time))
+    actual = actual_lead_times({supplier_id for supplier_id, _ in relations.values()})
+    return {
+        product_id: actual.get(supplier_id, lead_time)
+        for product_id, (supplier_id, lead_time) in relations.items()
+    }
+
+
+def smoothing_weights(days, alpha):
+    """Pesos del suavizamiento exponencial simple iniciado en el primer día"""
+    weights = alpha * (1 - alpha) ** np.arange(days - 1, -1, -1, dtype=np.float64)
+    weights[0] = (1 - alpha) ** (days - 1)
+    return weights
+
+
+def compute_block(demand, lead_time, alpha, moving_average_days, z):
+    """Estadísticas de una matriz de demanda diaria (productos × días), vectorizadas por fila"""
+    days = demand.shape[1]
+    mean = demand.mean(axis=1)
+    std = demand.std(axis=1, ddof=1) if days > 1 else np.zeros(demand.shape[0])
+    level = demand @ smoothing_weights(days, alpha)
+    safety_stock = z * std * np.sqrt(lead_time)
+    return {
+        'sale_days': np.count_nonzero(demand, axis=1),
+        'units': demand.sum(axis=1),
+        'mean': mean,
+        'moving_average': demand[:, -moving_average_days:].mean(axis=1),
+        'forecast': level,
+        'std': std,
+        'cv': np.divide(std, mean, out=np.zeros_like(std), where=mean > 0),
+        'safety_stock': np.ceil(safety_stock),
+        'reorder_point': np.ceil(level * lead_time + safety_stock),
+    }
+
+
+def forecast(window_days=None, alpha=None, moving_average_days=None, service_level=None, categoria=None):
+    """
+    Pronóstico de los productos activos (o de una categoría). Retorna
+    (resultados, resumen): un dict por producto con las estadísticas y los
+    valores sugeridos, y los parámetros y tiempos del cálculo.
+    """
+    window_days = window_days or WINDOW_DAYS
+    alpha = ALPHA if alpha is None else alpha
+    moving_average_days = min(moving_average_days or MOVING_AVERAGE_DAYS, window_days)
+    service_level = service_level or SERVICE_LEVEL
+    z = NormalDist().inv_cdf(service_level)
+    started = time.monotonic()
+
+    # Los días cerrados faltantes en los resúmenes de ventas
+    catch_up()
+    date_from, date_to = _window(window_days)
+
+    products = Product.objects.filter(is_active=True)
+    if categoria:
+        products = products.filter(categoria=categoria)
+    products = list(products.order_by('id').values_list(
+        'id', 'sku', 'name', 'punto_reorden', 'stock_minimo', 'stock_maximo',
+    ))
+    index = {product[0]: position for position, product in enumerate(products)}
+    positions, days, units = _load_demand(index, date_from, date_to)
+    lead_times = _lead_times(list(index))
+    loaded = time.monotonic()
+
+    results = []
+    for start in range(0, len(products), CHUNK_PRODUCTS):
+        block = products[start:start + CHUNK_PRODUCTS]
+        low, high = np.searchsorted(positions, [start, start + len(block)])
+        demand = np.zeros((len(block), window_days), dtype=np.float64)
+        demand[positions[low:high] - start, days[low:high]] = units[low:high]
+        lead_time = np.array([lead_times.get(product[0]) or DEFAULT_LEAD_TIME for product in block], dtype=np.float64)
+
+        stats = {key: values.tolist() for key, values in compute_block(demand, lead_time, alpha, moving_average_days, z).items()}
+        for offset, (product_id, sku, name, punto_reorden, stock_minimo, stock_maximo) in enumerate(block):
+            results.append({
+                'product_id': product_id, 'sku': sku, 'name': name,
+                'lead_time': round(float(lead_time[offset]), 2),
+                'sale_days': stats['sale_days'][offset],
+                'units': stats['units'][offset],
+                'mean': round(stats['mean'][offset], 4),
+                'moving_average': round(stats['moving_average'][offset], 4),
+                'forecast': round(stats['forecast'][offset], 4),
+                'std': round(stats['std'][offset], 4),
+                'cv': round(stats['cv'][offset], 4),
+                'punto_reorden': punto_reorden,
+                'stock_minimo': stock_minimo,
+                'stock_maximo': stock_maximo,
+                'suggested_punto_reorden': Decimal(int(stats['reorder_point'][offset])),
+                'suggested_stock_minimo': Decimal(int(stats['safety_stock'][offset])),
+            })
+
+    summary = {
+        'date_from': date_from, 'date_to': date_to, 'window_days': window_days,
+        'alpha': alpha, 'moving_average_days': moving_average_days, 'service_level': service_level,
+        'products': len(results), 'sale_rows': len(units),
+        'load_ms': int((loaded - started) * 1000),
+        'compute_ms': int((time.monotonic() - loaded) * 1000),
+    }
+    return results, summary
+
+
+def apply_suggestions(results, min_sale_days=7):
+    """
+    Escribe punto_reorden y stock_minimo sugeridos (bulk_update) en los
+    productos con al menos `min_sale_days` días con ventas y valores distintos.
+    No se escriben los que superarían su stock_maximo (ProductForm exige
+    stock_minimo <= stock_maximo): se revisan a mano.
+    Retorna (actualizados, omitidos por stock_maximo).
+    """
+    now = timezone.now()
+    changed, over_max = [], 0
+    for result in results:
+        if result['sale_days'] < min_sale_days or (
+            result['punto_reorden'] == result['suggested_punto_reorden']
+            and result['stock_minimo'] == result['suggested_stock_minimo']
+        ):
+            continue
+        if result['stock_maximo'] is not None and result['suggested_punto_reorden'] > result['stock_maximo']:
+            over_max += 1
+            continue
+        changed.append(Product(
+            pk=result['product_id'],
+            punto_reorden=result['suggested_punto_reorden'],
+            stock_minimo=result['suggested_stock_minimo'],
+            updated_at=now,
+        ))
+    Product.objects.bulk_update(changed, ['punto_reorden', 'stock_minimo', 'updated_at'], batch_size=1000)
+    return len(changed), over_max
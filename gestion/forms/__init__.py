@@ -5,7 +5,7 @@ from .supplier_forms import SupplierForm
 from .sale_forms import ClientForm
 from .user_forms import UserCreateForm, UserUpdateForm, UserPasswordChangeForm
 from .supplier_order_forms import SupplierOrderForm, SupplierOrderItemForm
-from .product_forms import ProductForm
+from .product_forms import ProductForm, BulkProductForm
 from .product_supplier_forms import ProductSupplierForm
 
 __all__ = [
@@ -18,6 +18,7 @@ __all__ = [
     'SupplierOrderForm',
     'SupplierOrderItemForm',
     'ProductForm',
+    'BulkProductForm',
     'ProductSupplierForm',
 ]
 
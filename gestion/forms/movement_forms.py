@@ -3,7 +3,7 @@
 import re
 from django import forms
 from django.core.validators import MinValueValidator
-from ..models import Product, Zone, Warehouse, Supplier, ProductMovement
+from ..models import Product, Zone, Warehouse, Supplier, ProductMovement, MovementArchiveRun
 
 class ProductMovementForm(forms.ModelForm):
     """
@@ -123,6 +123,14 @@ class ProductMovementForm(forms.ModelForm):
                     'destination_zone': 'La zona de destino debe ser diferente a la de origen.'
                 })
         
+        # Período cerrado: los movimientos anteriores al corte están archivados
+        fecha = cleaned_data.get('fecha')
+        archive = MovementArchiveRun.current()
+        if fecha and archive is not None and fecha < archive.cutoff:
+            raise forms.ValidationError({
+                'fecha': f'El período anterior a {archive.cutoff:%Y-%m-%d} está cerrado (movimientos archivados).'
+            })
+        
         # Validar cantidad positiva
         if cantidad and cantidad <= 0:
             raise forms.ValidationError({
@@ -0,0 +1,178 @@
+# gestion/instrumentation.py
+"""
+Capa de instrumentación de requests.
+
+Mide en cada request el costo de obtener la conexión a la base de datos
+(apertura, health check o checkout del pool), cuántas conexiones se abrieron
+o reutilizaron y cuántas consultas se ejecutaron. Los datos se exponen en el
+header Server-Timing y en contadores acumulados por proceso.
+"""
+import contextvars
+import logging
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from .metrics import observe_request
+from .slow_queries import slow_query_wrapper
+
+logger = logging.getLogger(__name__)
+
+_current_stats = contextvars.ContextVar('gestion_request_stats', default=None)
+
+_counters_lock = threading.Lock()
+_process_counters = {
+    'requests': 0,
+    'db_connections_opened': 0,
+    'db_connections_reused': 0,
+    'db_connect_seconds': 0.0,
+    'db_queries': 0,
+    'db_query_seconds': 0.0,
+}
+
+
+class RequestStats:
+    """Estadísticas acumuladas durante un request"""
+    __slots__ = (
+        'started', 'view', 'db_queries', 'db_time', 'db_connections_opened',
+        'db_connections_reused', 'db_connect_time',
+    )
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view = None
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.db_connections_opened = 0
+        self.db_connections_reused = 0
+        self.db_connect_time = 0.0
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+def get_request_stats():
+    """Retorna las estadísticas del request en curso (o None fuera de un request)"""
+    return _current_stats.get()
+
+
+def connection_stats():
+    """Retorna una copia de los contadores acumulados del proceso"""
+    with _counters_lock:
+        return dict(_process_counters)
+
+
+def _add_to_counters(**values):
+    with _counters_lock:
+        for key, value in values.items():
+            _process_counters[key] += value
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    """Cuenta las conexiones nuevas (incluye alias distintos a 'default')"""
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.db_connections_opened += 1
+    _add_to_counters(db_connections_opened=1)
+
+
+connection_created.connect(_on_connection_created, dispatch_uid='gestion_instrumentation_connection_created')
+
+
+def _count_query(execute, sql, params, many, context):
+    """execute_wrapper que cuenta consultas y su duración"""
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.db_queries += 1
+            stats.db_time += time.perf_counter() - start
+
+
+def view_name(view_func, method):
+    """Nombre legible de la vista; para ViewSets incluye la acción (ProductViewSet.list)"""
+    cls = getattr(view_func, 'cls', None)
+    if cls is None:
+        return getattr(view_func, '__qualname__', repr(view_func))
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(method.lower(), method.lower())
+    return f'{cls.__name__}.{action}'
+
+
+class RequestInstrumentationMiddleware:
+    """
+    Middleware que instrumenta cada request.
+    Debe ir primero en MIDDLEWARE para que el tiempo medido incluya al resto.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = RequestStats()
+        token = _current_stats.set(stats)
+        try:
+            self._acquire_default_connection(stats)
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(_count_query))
+                    stack.enter_context(conn.execute_wrapper(slow_query_wrapper))
+                response = self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+
+        self._record(request, response, stats)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.view = view_name(view_func, request.method)
+        return None
+
+    def _acquire_default_connection(self, stats):
+        """
+        Obtiene la conexión 'default' antes de la vista para medir su costo.
+        Si ya existe una conexión persistente solo se valida (health check).
+        """
+        conn = connections['default']
+        reused = conn.connection is not None
+        start = time.perf_counter()
+        conn.ensure_connection()
+        stats.db_connect_time += time.perf_counter() - start
+        if reused and conn.connection is not None:
+            stats.db_connections_reused += 1
+
+    def _record(self, request, response, stats):
+        elapsed = stats.elapsed
+        observe_request(stats, request.method, getattr(response, 'status_code', 0))
+        _add_to_counters(
+            requests=1,
+            db_connections_reused=stats.db_connections_reused,
+            db_connect_seconds=stats.db_connect_time,
+            db_queries=stats.db_queries,
+            db_query_seconds=stats.db_time,
+        )
+
+        if getattr(settings, 'INSTRUMENTATION_SERVER_TIMING', True):
+            response['Server-Timing'] = (
+                f'db-connect;dur={stats.db_connect_time * 1000:.2f};'
+                f'desc="opened={stats.db_connections_opened} reused={stats.db_connections_reused}", '
+                f'db;dur={stats.db_time * 1000:.2f};desc="{stats.db_queries} queries", '
+                f'app;dur={elapsed * 1000:.2f}'
+            )
+
+        logger.debug(
+            'request %s %s status=%s time=%.1fms db_connect=%.1fms opened=%d reused=%d queries=%d db=%.1fms',
+            request.method, request.path, getattr(response, 'status_code', None),
+            elapsed * 1000, stats.db_connect_time * 1000,
+            stats.db_connections_opened, stats.db_connections_reused,
+            stats.db_queries, stats.db_time * 1000,
+        )
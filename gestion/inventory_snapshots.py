@@ -0,0 +1,215 @@
+# gestion/inventory_snapshots.py
+"""
+Fotos periódicas del inventario y stock a una fecha pasada.
+
+- take_snapshot(): guarda en InventorySnapshot solo los (producto, zona) cuya
+  cantidad cambió desde la foto anterior (o que ya no existen, con 0) y la
+  hora exacta de la toma (InventorySnapshotRun). Programar a diario.
+- stock_as_of(momento): parte de la última foto tomada antes del momento y
+  aplica solo lo ocurrido después: las entradas del libro de stock
+  (stock_ledger.entries_sql, por created_at) y las ventas, que descuentan de
+  la zona de ventas sin registrar un movimiento. Con fotos diarias el costo es
+  a lo más un día de movimientos, no todo el historial.
+
+Los cambios de inventario hechos sin movimiento ni venta (admin, seeds) se
+reflejan desde la siguiente foto. Por eso el stock a una fecha solo se
+responde desde la primera foto (check_stock_history): antes no hay una base
+real desde la cual aplicar el libro.
+
+Con movimientos archivados (movement_archive.py) solo se responde desde
+MovementArchiveRun.stock_from: sin una foto posterior, se parte del stock de
+apertura guardado al archivar (MovementOpeningBalance.stock_quantity).
+"""
+import time
+from datetime import datetime, time as dt_time
+
+from django.db import connections, router, transaction
+from django.db.models import Exists, F, OuterRef, Q, Subquery, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Inventory, InventorySnapshot, InventorySnapshotRun, MovementArchiveRun, MovementOpeningBalance, SaleItem
+from .stock_ledger import ArchivedPeriodError, entries_sql, to_datetime, to_decimal
+
+SNAPSHOT_BATCH_SIZE = 2000
+
+
+class StockHistoryError(ValueError):
+    """Stock a una fecha anterior a la primera foto del inventario"""
+
+
+def parse_moment(value):
+    """YYYY-MM-DD (fin del día, hora local) o fecha y hora ISO; None si no es válido"""
+    if not value:
+        return None
+    try:
+        # La fecha sola va primero: parse_datetime la acepta como medianoche
+        day = parse_date(value)
+        if day is not None:
+            moment = datetime.combine(day, dt_time.max)
+        else:
+            moment = parse_datetime(value)
+    except ValueError:
+        # Bien formada pero inexistente (2024-02-30)
+        return None
+    if moment is None:
+        return None
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def latest_snapshots(until, product_id=None, zone_ids=None, using=None):
+    """Última fila de cada (producto, zona) con fecha <= until (ROW_NUMBER por clave)"""
+    rows = InventorySnapshot.objects.using(using or router.db_for_read(InventorySnapshot)).filter(date__lte=until)
+    if product_id is not None:
+        rows = rows.filter(product_id=product_id)
+    if zone_ids is not None:
+        rows = rows.filter(zone_id__in=zone_ids)
+    return rows.annotate(
+        row_number=Window(RowNumber(), partition_by=[F('product_id'), F('zone_id')], order_by=F('date').desc()),
+    ).filter(row_number=1)
+
+
+# ==================== FOTOS ====================
+def take_snapshot():
+    """Toma (o rehace) la foto de hoy con las filas que cambiaron. Retorna el InventorySnapshotRun"""
+    day = timezone.localdate()
+    started = time.monotonic()
+    with transaction.atomic():
+        InventorySnapshot.objects.filter(date=day).delete()
+        taken_at = timezone.now()
+        previous = InventorySnapshot.objects.filter(
+            product_id=OuterRef('product_id'), zone_id=OuterRef('zone_id'), date__lt=day,
+        ).order_by('-date').values('quantity')[:1]
+        changed = Inventory.objects.annotate(previous=Subquery(previous)).filter(
+            Q(previous__isnull=True, quantity__gt=0) | (Q(previous__isnull=False) & ~Q(previous=F('quantity'))),
+        ).values_list('product_id', 'zone_id', 'quantity')
+        # Filas que dejaron de existir en Inventory: se registran en 0 (la condición
+        # sobre la cantidad va después de elegir la última foto de cada clave)
+        gone = latest_snapshots(day, using=router.db_for_write(InventorySnapshot)).exclude(
+            Exists(Inventory.objects.filter(product_id=OuterRef('product_id'), zone_id=OuterRef('zone_id'))),
+        ).values_list('product_id', 'zone_id', 'quantity')
+
+        written = 0
+        batch = []
+        for product_id, zone_id, quantity in changed.iterator(chunk_size=SNAPSHOT_BATCH_SIZE):
+            batch.append(InventorySnapshot(date=day, product_id=product_id, zone_id=zone_id, quantity=quantity))
+            if len(batch) >= SNAPSHOT_BATCH_SIZE:
+                InventorySnapshot.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        batch += [
+            InventorySnapshot(date=day, product_id=product_id, zone_id=zone_id, quantity=0)
+            for product_id, zone_id, quantity in gone if quantity > 0
+        ]
+        InventorySnapshot.objects.bulk_create(batch, batch_size=SNAPSHOT_BATCH_SIZE)
+        written += len(batch)
+
+        run, _ = InventorySnapshotRun.objects.update_or_create(date=day, defaults={
+            'taken_at': taken_at, 'rows_written': written,
+            'duration_ms': int((time.monotonic() - started) * 1000),
+        })
+    return run
+
+
+# ==================== STOCK A UNA FECHA ====================
+def check_stock_history(moment, using=None):
+    """
+    Valida que haya base para el stock al momento indicado y retorna el
+    archivado vigente (o None). Lanza ArchivedPeriodError si el momento es
+    anterior al archivado vigente y StockHistoryError si, sin archivado, es
+    anterior a la primera foto.
+    """
+    using = using or router.db_for_read(InventorySnapshot)
+    archive = MovementArchiveRun.current(using)
+    if archive is not None:
+        if moment < archive.stock_from:
+            raise ArchivedPeriodError(
+                f'El stock a una fecha está disponible desde {timezone.localtime(archive.stock_from):%Y-%m-%d %H:%M} '
+                f'(movimientos anteriores archivados)'
+            )
+        return archive
+
+    first = InventorySnapshotRun.objects.using(using).order_by('taken_at').values_list('taken_at', flat=True).first()
+    if first is None:
+        raise StockHistoryError('El stock a una fecha requiere una foto del inventario (manage.py snapshot_inventory)')
+    if moment < first:
+        raise StockHistoryError(
+            f'El stock a una fecha está disponible desde {timezone.localtime(first):%Y-%m-%d %H:%M} '
+            f'(primera foto del inventario)'
+        )
+    return None
+
+
+def stock_as_of(moment, product_id=None, zone_ids=None, using=None):
+    """
+    Stock {(product_id, zone_id): cantidad} al momento indicado y la foto usada
+    (None si se parte del saldo de apertura de los movimientos archivados).
+    Lanza ArchivedPeriodError o StockHistoryError si no hay base para el
+    momento (ver check_stock_history).
+    """
+    using = using or router.db_for_read(InventorySnapshot)
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    adapt = connection.ops.adapt_datetimefield_value
+
+    archive = check_stock_history(moment, using)
+
+    runs = InventorySnapshotRun.objects.using(using).filter(taken_at__lte=moment)
+    if archive is not None:
+        # Las fotos anteriores necesitarían movimientos ya archivados
+        runs = runs.filter(taken_at__gte=archive.stock_from)
+    run = runs.order_by('-taken_at').first()
+    state = {}
+    if run is not None:
+        rows = latest_snapshots(run.date, product_id, zone_ids, using).values_list('product_id', 'zone_id', 'quantity')
+        for key_product, key_zone, quantity in rows.iterator(chunk_size=SNAPSHOT_BATCH_SIZE):
+            state[(key_product, key_zone)] = quantity
+        since = run.taken_at
+    else:
+        rows = MovementOpeningBalance.objects.using(using).exclude(stock_quantity=0)
+        if product_id is not None:
+            rows = rows.filter(product_id=product_id)
+        if zone_ids is not None:
+            rows = rows.filter(zone_id__in=zone_ids)
+        for key_product, key_zone, quantity in rows.values_list('product_id', 'zone_id', 'stock_quantity').iterator(
+            chunk_size=SNAPSHOT_BATCH_SIZE,
+        ):
+            state[(key_product, key_zone)] = quantity
+        since = archive.stock_from
+
+    # created_at está indexado; los movimientos posteriores a la foto siempre lo tienen
+    where = f"m.{qn('created_at')} > %s AND m.{qn('created_at')} <= %s"
+    params = [adapt(since), adapt(moment)]
+    if product_id is not None:
+        where += f" AND m.{qn('product_id')} = %s"
+        params.append(product_id)
+
+    sql = f"SELECT applied_at, id, leg, product_id, zone_id, delta, is_set FROM ({entries_sql(connection, where)}) e"
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        entries = [
+            (to_datetime(applied_at), 1, movement_id, leg, key_product, key_zone, to_decimal(delta), is_set)
+            for applied_at, movement_id, leg, key_product, key_zone, delta, is_set in cursor.fetchall()
+        ]
+
+    from .views.api_views import get_sales_zone
+    sales_zone = get_sales_zone()
+    if sales_zone is not None and (zone_ids is None or sales_zone.pk in zone_ids):
+        sold = SaleItem.objects.using(using).filter(sale__sale_date__gt=since, sale__sale_date__lte=moment)
+        if product_id is not None:
+            sold = sold.filter(product_id=product_id)
+        entries += [
+            (sale_date, 0, item_id, 0, key_product, sales_zone.pk, -quantity, 0)
+            for item_id, sale_date, key_product, quantity in sold.values_list('id', 'sale__sale_date', 'product_id', 'quantity')
+        ]
+
+    entries.sort(key=lambda entry: entry[:4])
+    for _, _, _, _, key_product, key_zone, delta, is_set in entries:
+        if zone_ids is not None and key_zone not in zone_ids:
+            continue
+        key = (key_product, key_zone)
+        state[key] = int(delta) if is_set else state.get(key, 0) + int(delta)
+    return state, run
@@ -0,0 +1,234 @@
+# gestion/jobs.py
+"""
+Cola de tareas en segundo plano respaldada por la base de datos (sin broker).
+
+- Las tareas se registran con @task('nombre') y reciben (ctx, **params).
+  Solo las públicas se pueden encolar desde POST /api/jobs/; las internas
+  (public=False) las encola únicamente el código (ej. la importación async).
+- enqueue() crea un Job PENDING; el worker `manage.py run_jobs` lo toma con un
+  UPDATE condicional (status=PENDING → RUNNING), seguro con varios workers y
+  en SQLite/PostgreSQL.
+- Si la tarea lanza una excepción se reintenta con backoff exponencial
+  (JOB_RETRY_BACKOFF * 2^(intento-1)) hasta max_attempts. JobError marca
+  la tarea como fallida sin reintentar (ej. datos inválidos).
+- Mientras corre una tarea, un hilo del worker renueva su heartbeat cada
+  JOB_STALE_SECONDS / 3 (ctx.progress() también lo renueva), aunque la tarea
+  no reporte avance en un paso largo. Una tarea RUNNING sin heartbeat por
+  JOB_STALE_SECONDS (worker caído) vuelve a la cola.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+
+from .metrics import JOB_DURATION, JOBS
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+# Mínimo de segundos entre escrituras de progreso a la BD
+PROGRESS_MIN_INTERVAL = 1.0
+
+
+class JobError(Exception):
+    """Error definitivo: la tarea falla sin reintentos"""
+
+
+def task(name, max_attempts=3, public=True):
+    """Registra una función como tarea en segundo plano"""
+    def decorator(func):
+        func.job_name = name
+        func.max_attempts = max_attempts
+        func.public = public
+        TASKS[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, params=None, user=None, max_attempts=None, delay=0):
+    """Encola una tarea registrada y retorna el Job"""
+    load_tasks()
+    if name not in TASKS:
+        raise KeyError(f'Tarea no registrada: {name}')
+    return Job.objects.create(
+        name=name,
+        params=params or {},
+        created_by=user if user is not None and user.is_authenticated else None,
+        max_attempts=max_attempts or TASKS[name].max_attempts,
+        run_after=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def load_tasks():
+    """Importa el módulo de tareas (las registra en TASKS)"""
+    from . import tasks  # noqa: F401
+
+
+def public_tasks():
+    """Tareas que se pueden encolar desde la API genérica"""
+    load_tasks()
+    return sorted(name for name, func in TASKS.items() if func.public)
+
+
+def job_files_dir():
+    """Directorio para archivos de entrada/salida de las tareas"""
+    path = Path(settings.JOBS_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def job_file(name):
+    """
+    Ruta de un archivo dentro de job_files_dir() a partir de su nombre; None
+    si el nombre no es un archivo simple de ese directorio (rutas, '..', enlaces).
+    """
+    base = job_files_dir().resolve()
+    if not isinstance(name, str) or not name or Path(name).name != name:
+        return None
+    path = (base / name).resolve()
+    return path if path.parent == base else None
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+class JobContext:
+    """Contexto que recibe cada tarea: el Job y el reporte de avance"""
+
+    def __init__(self, job):
+        self.job = job
+        self._last_write = 0.0
+
+    def progress(self, percent, message='', force=False):
+        """Actualiza el avance (0-100) y el heartbeat, como máximo una vez por segundo"""
+        now = time.monotonic()
+        if not force and now - self._last_write < PROGRESS_MIN_INTERVAL:
+            return
+        self._last_write = now
+        self.job.progress = max(0, min(100, int(percent)))
+        self.job.progress_message = str(message)[:255]
+        Job.objects.filter(pk=self.job.pk).update(
+            progress=self.job.progress,
+            progress_message=self.job.progress_message,
+            heartbeat_at=timezone.now(),
+        )
+
+
+# ==================== WORKER ====================
+class Heartbeat:
+    """Hilo que renueva el heartbeat de la tarea mientras el worker la ejecuta"""
+
+    def __init__(self, job, interval=None):
+        self.job = job
+        self.interval = interval or max(settings.JOB_STALE_SECONDS / 3, 1)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'job-{job.pk}-heartbeat', daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        try:
+            while not self._stop.wait(self.interval):
+                # Un error puntual (ej. SQLite bloqueada) no detiene el hilo: se reintenta en el siguiente ciclo
+                try:
+                    # Solo mientras siga tomada por este worker (no revive una tarea reencolada)
+                    Job.objects.filter(
+                        pk=self.job.pk, status=Job.STATUS_RUNNING, worker=self.job.worker,
+                    ).update(heartbeat_at=timezone.now())
+                except Exception:
+                    logger.exception('Error renovando el heartbeat de la tarea #%s', self.job.pk)
+                    connection.close_if_unusable_or_obsolete()
+        finally:
+            connection.close()
+
+
+def requeue_stale():
+    """Devuelve a la cola las tareas RUNNING cuyo worker dejó de reportar"""
+    limit = timezone.now() - timedelta(seconds=settings.JOB_STALE_SECONDS)
+    stale = Job.objects.filter(status=Job.STATUS_RUNNING, heartbeat_at__lt=limit)
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.STATUS_FAILED, error='El worker dejó de responder', finished_at=timezone.now(),
+    )
+    requeued = stale.update(status=Job.STATUS_PENDING, worker='', run_after=timezone.now())
+    if failed or requeued:
+        logger.warning('Tareas sin heartbeat: %d reencoladas, %d fallidas', requeued, failed)
+    return requeued
+
+
+def claim_next(worker):
+    """Toma la siguiente tarea pendiente; None si no hay"""
+    now = timezone.now()
+    candidates = Job.objects.filter(
+        status=Job.STATUS_PENDING, run_after__lte=now,
+    ).order_by('run_after', 'id').values_list('id', flat=True)[:10]
+    for job_id in candidates:
+        # UPDATE condicional: si otro worker la tomó primero, afecta 0 filas
+        claimed = Job.objects.filter(pk=job_id, status=Job.STATUS_PENDING).update(
+            status=Job.STATUS_RUNNING,
+            worker=worker,
+            attempts=F('attempts') + 1,
+            started_at=now,
+            heartbeat_at=now,
+        )
+        if claimed:
+            return Job.objects.get(pk=job_id)
+    return None
+
+
+def run_job(job):
+    """Ejecuta una tarea ya tomada y registra el resultado, reintento o fallo"""
+    load_tasks()
+    func = TASKS.get(job.name)
+    started = time.monotonic()
+    try:
+        if func is None:
+            raise JobError(f'Tarea no registrada: {job.name}')
+        with Heartbeat(job):
+            result = func(JobContext(job), **job.params)
+    except Exception as e:
+        retry = not isinstance(e, JobError) and job.attempts < job.max_attempts
+        fields = {'error': str(e) or e.__class__.__name__}
+        if not isinstance(e, JobError):
+            logger.exception('Error en la tarea #%s %s', job.pk, job.name)
+        if retry:
+            delay = settings.JOB_RETRY_BACKOFF * 2 ** (job.attempts - 1)
+            fields.update(status=Job.STATUS_PENDING, worker='', run_after=timezone.now() + timedelta(seconds=delay))
+            logger.warning('Tarea #%s %s falló (intento %d/%d), reintento en %ss: %s',
+                           job.pk, job.name, job.attempts, job.max_attempts, delay, e)
+        else:
+            fields.update(status=Job.STATUS_FAILED, finished_at=timezone.now())
+            logger.error('Tarea #%s %s fallida: %s', job.pk, job.name, e)
+    else:
+        fields = {
+            'status': Job.STATUS_SUCCEEDED, 'result': result, 'progress': 100,
+            'error': '', 'finished_at': timezone.now(),
+        }
+        logger.info('Tarea #%s %s completada en %.1fs', job.pk, job.name, time.monotonic() - started)
+
+    # Si la tarea se reencoló y la tomó otro worker, este resultado ya no vale
+    if not Job.objects.filter(pk=job.pk, status=Job.STATUS_RUNNING, worker=job.worker).update(**fields):
+        logger.warning('Tarea #%s %s: ya no pertenece a este worker, se descarta el resultado', job.pk, job.name)
+        job.refresh_from_db()
+        return job
+    JOBS.inc(name=job.name, status=fields['status'])
+    JOB_DURATION.observe(time.monotonic() - started, name=job.name)
+    for name, value in fields.items():
+        setattr(job, name, value)
+    return job
@@ -0,0 +1,116 @@
+# gestion/logging_utils.py
+"""
+Utilidades de logging no bloqueante.
+
+- AsyncHandler: encola los registros y un hilo en segundo plano los escribe
+  (stdout o archivo rotativo). El request nunca espera al destino; si la
+  cola se llena, el registro se descarta y se cuenta en `dropped`.
+- JSONFormatter: una línea JSON por registro.
+- SamplingFilter: limita registros DEBUG repetitivos (misma plantilla).
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+
+class JSONFormatter(logging.Formatter):
+    """Formatea cada registro como una línea JSON"""
+
+    def format(self, record):
+        payload = {
+            'ts': self.formatTime(record, '%Y-%m-%dT%H:%M:%S') + f'.{int(record.msecs):03d}',
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'line': record.lineno,
+            'process': record.process,
+        }
+        extra = getattr(record, 'data', None)
+        if extra:
+            payload['data'] = extra
+        if record.exc_info:
+            payload['exception'] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Deja pasar los primeros `burst` registros DEBUG de cada plantilla por
+    ventana de `window` segundos y luego 1 de cada `rate`. No afecta INFO+.
+    """
+
+    def __init__(self, burst=20, rate=100, window=60):
+        super().__init__()
+        self.burst = burst
+        self.rate = rate
+        self.window = window
+        self._lock = threading.Lock()
+        self._seen = {}
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG:
+            return True
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            started, count = self._seen.get(key, (now, 0))
+            if now - started > self.window:
+                started, count = now, 0
+            count += 1
+            self._seen[key] = (started, count)
+        return count <= self.burst or count % self.rate == 0
+
+
+class AsyncHandler(QueueHandler):
+    """Handler no bloqueante: el hilo del request solo encola el registro"""
+
+    def __init__(self, stream='stdout', filename=None, max_bytes=10 * 1024 * 1024,
+                 backup_count=5, queue_size=10000):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        if filename:
+            os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+            self.target = RotatingFileHandler(filename, maxBytes=max_bytes, backupCount=backup_count,
+                                              encoding='utf-8', delay=True)
+        else:
+            self.target = logging.StreamHandler(sys.stderr if stream == 'stderr' else sys.stdout)
+        self.dropped = 0
+        self._listener = None
+        self._start_listener()
+        # Si gunicorn hace fork después de configurar logging, reiniciar el hilo en el hijo
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._start_listener)
+        atexit.register(self.close)
+
+    def _start_listener(self):
+        self._listener = QueueListener(self.queue, self.target, respect_handler_level=False)
+        self._listener.start()
+
+    def setFormatter(self, fmt):
+        # El formato (JSON) se aplica en el hilo de escritura, no en el request
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # Solo resolver el mensaje; el formateo y el traceback se hacen en segundo plano
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+        self.target.close()
+        super().close()
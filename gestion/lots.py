@@ -0,0 +1,121 @@
+# gestion/lots.py
+"""
+Inventario por lote y vencimiento (InventoryLot) con asignación FEFO.
+
+- receive(): los ingresos y devoluciones con lote o fecha de vencimiento
+  suman al lote de (producto, zona, lote, vencimiento).
+- allocate(): las salidas, ventas y transferencias consumen primero lo que
+  vence antes (los lotes sin fecha al final) con una sola consulta que
+  bloquea los lotes de (producto, zona) (SELECT ... FOR UPDATE) y una
+  actualización masiva. Lo que no cubren los lotes sale del stock sin lote.
+- trim(): si un ajuste deja el total de la zona bajo la suma de sus lotes, se
+  descuenta el exceso en orden FEFO.
+- expiring(): lotes con stock que vencen hasta una fecha, leídos desde el
+  índice parcial sobre fecha_vencimiento (solo lotes con cantidad > 0).
+
+Inventory sigue siendo el total por (producto, zona); estas funciones se
+llaman dentro de la misma transacción que lo actualiza.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from django.utils import timezone
+
+from .models import InventoryLot
+
+# Días de anticipación para considerar un lote "por vencer"
+EXPIRY_ALERT_DAYS = getattr(settings, 'LOT_EXPIRY_ALERT_DAYS', 7)
+
+
+def expiring_filter(days=None, prefix=''):
+    """Q de lotes con stock que vencen en los próximos `days` días (o ya vencidos)"""
+    limit = timezone.localdate() + timedelta(days=EXPIRY_ALERT_DAYS if days is None else days)
+    return Q(**{f'{prefix}quantity__gt': 0, f'{prefix}fecha_vencimiento__lte': limit})
+
+
+def _locked_lots(product_id, zone_id, lote=None):
+    """Lotes con stock de (producto, zona) bloqueados, en orden FEFO (el lote indicado primero)"""
+    order = [F('fecha_vencimiento').asc(nulls_last=True), 'received_at', 'id']
+    lots = InventoryLot.objects.select_for_update().filter(product_id=product_id, zone_id=zone_id, quantity__gt=0)
+    if lote:
+        lots = lots.annotate(
+            preferred=Case(When(lote=lote, then=Value(0)), default=Value(1), output_field=IntegerField()),
+        )
+        order.insert(0, 'preferred')
+    return list(lots.order_by(*order))
+
+
+def _consume(lots, quantity):
+    """Descuenta `quantity` de los lotes en orden; retorna [(lote, fecha_vencimiento, cantidad)]"""
+    allocations, changed = [], []
+    now = timezone.now()
+    for lot in lots:
+        if quantity <= 0:
+            break
+        taken = min(lot.quantity, quantity)
+        lot.quantity -= taken
+        lot.updated_at = now
+        quantity -= taken
+        changed.append(lot)
+        allocations.append((lot.lote, lot.fecha_vencimiento, taken))
+    if changed:
+        InventoryLot.objects.bulk_update(changed, ['quantity', 'updated_at'])
+    if quantity > 0:
+        allocations.append(('', None, quantity))
+    return allocations
+
+
+def receive(product_id, zone_id, quantity, lote=None, fecha_vencimiento=None):
+    """Suma al lote (si el movimiento trae lote o vencimiento). Retorna el lote o None"""
+    if quantity <= 0 or not (lote or fecha_vencimiento):
+        return None
+    lot, created = InventoryLot.objects.select_for_update().get_or_create(
+        product_id=product_id, zone_id=zone_id, lote=lote or '', fecha_vencimiento=fecha_vencimiento,
+        defaults={'quantity': quantity},
+    )
+    if not created:
+        InventoryLot.objects.filter(pk=lot.pk).update(quantity=F('quantity') + quantity, updated_at=timezone.now())
+    return lot
+
+
+def allocate(product_id, zone_id, quantity, lote=None):
+    """
+    Descuenta `quantity` de (producto, zona) en orden FEFO (primero el lote
+    indicado, si hay). Retorna [(lote, fecha_vencimiento, cantidad)]; la parte
+    sin lote va como ('', None, cantidad).
+    """
+    if quantity <= 0:
+        return []
+    return _consume(_locked_lots(product_id, zone_id, lote), quantity)
+
+
+def transfer(product_id, origin_zone_id, destination_zone_id, quantity, lote=None):
+    """Mueve `quantity` entre zonas conservando lote y vencimiento (FEFO en el origen)"""
+    allocations = allocate(product_id, origin_zone_id, quantity, lote)
+    for lot_code, fecha_vencimiento, taken in allocations:
+        receive(product_id, destination_zone_id, taken, lot_code, fecha_vencimiento)
+    return allocations
+
+
+def trim(product_id, zone_id, quantity):
+    """Deja la suma de los lotes de (producto, zona) en a lo más `quantity` (tras un ajuste)"""
+    lots = _locked_lots(product_id, zone_id)
+    excess = sum(lot.quantity for lot in lots) - quantity
+    if excess <= 0:
+        return []
+    return _consume(lots, excess)
+
+
+def expiring(days=None, warehouse_id=None, zone_id=None, categoria=None, include_expired=True):
+    """Lotes con stock que vencen en los próximos `days` días, del más próximo al más lejano"""
+    lots = InventoryLot.objects.filter(expiring_filter(days))
+    if not include_expired:
+        lots = lots.filter(fecha_vencimiento__gte=timezone.localdate())
+    if warehouse_id:
+        lots = lots.filter(zone__warehouse_id=warehouse_id)
+    if zone_id:
+        lots = lots.filter(zone_id=zone_id)
+    if categoria:
+        lots = lots.filter(product__categoria=categoria)
+    return lots.order_by('fecha_vencimiento', 'product_id', 'id')
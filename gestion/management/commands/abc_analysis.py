@@ -0,0 +1,33 @@
+# gestion/management/commands/abc_analysis.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...abc_analysis import abc_summary, refresh
+
+
+class Command(BaseCommand):
+    help = (
+        'Actualiza la clasificación ABC (Pareto) de productos por ingresos y volumen. '
+        'Solo recalcula si hay ventas o movimientos nuevos o cambió la ventana (programar a diario).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Días de la ventana (default ABC_WINDOW_DAYS)')
+        parser.add_argument('--force', action='store_true', help='Recalcular aunque no haya cambios')
+
+    def handle(self, *args, **options):
+        if options['days'] is not None and options['days'] < 1:
+            raise CommandError('--days debe ser mayor que 0')
+        run, computed = refresh(window_days=options['days'], force=options['force'])
+        if not computed:
+            self.stdout.write(f'Clasificación al día ({run})')
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Clasificados {run.products} productos ({run.date_from} a {run.date_to}) en {run.duration_ms} ms'
+        ))
+        for by in ('revenue', 'volume'):
+            classes = abc_summary(by=by, limit=0)['classes']
+            self.stdout.write(f'  {by}: ' + ', '.join(
+                f"{key}={item['products']} ({item['share']}%)" for key, item in classes.items()
+            ))
@@ -0,0 +1,43 @@
+# gestion/management/commands/archive_movements.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...movement_archive import ARCHIVE_MONTHS, archive, cutoff_for, pending
+
+
+class Command(BaseCommand):
+    help = (
+        'Archiva los movimientos de los meses cerrados en bloques comprimidos (MovementArchiveChunk) '
+        'y los elimina de la tabla de movimientos. Los meses archivados no admiten movimientos nuevos '
+        'y se consultan en /api/movements/archive/. Programar mensualmente.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months', type=int, default=ARCHIVE_MONTHS,
+            help=f'Meses que quedan en la tabla, incluido el en curso (default: {ARCHIVE_MONTHS})',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Solo mostrar lo que se archivaría')
+
+    def handle(self, *args, **options):
+        if options['months'] < 1:
+            raise CommandError('--months debe ser al menos 1')
+
+        cutoff = cutoff_for(options['months'])
+        months = pending(cutoff)
+        for month, count in months:
+            self.stdout.write(f'  {month:%Y-%m}: {count} movimientos')
+        if options['dry_run']:
+            self.stdout.write(f"Corte {cutoff:%Y-%m-%d}: {sum(count for _, count in months)} movimientos por archivar")
+            return
+
+        run, archived = archive(cutoff)
+        if not archived:
+            self.stdout.write(f'Nada que archivar (corte vigente: {run})')
+            return
+        ratio = run.compressed_bytes / run.raw_bytes if run.raw_bytes else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Corte {run.cutoff:%Y-%m-%d}: {run.rows_archived} movimientos en {run.chunks_written} bloques '
+            f'({run.raw_bytes} -> {run.compressed_bytes} bytes, {ratio:.0%}) en {run.duration_ms} ms; '
+            f'stock a una fecha desde {run.stock_from:%Y-%m-%d %H:%M}'
+        ))
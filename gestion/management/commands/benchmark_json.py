@@ -0,0 +1,94 @@
+# gestion/management/commands/benchmark_json.py
+
+import io
+import json
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from ...renderers import FastJSONParser, FastJSONRenderer, orjson
+from ...views.rest_views import ProductMovementViewSet, ProductViewSet, SaleViewSet
+
+# Payloads de listado tal como los genera la API (página de page_size elementos)
+PAYLOADS = {
+    'products': ('/api/products/', ProductViewSet),
+    'movements': ('/api/movements/', ProductMovementViewSet),
+    'sales': ('/api/sales/', SaleViewSet),
+}
+
+
+class Command(BaseCommand):
+    help = 'Compara el costo de renderizar/parsear JSON con JSONRenderer (DRF) y FastJSONRenderer (orjson)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=100, help='Elementos por página (máx. 100)')
+        parser.add_argument('--iterations', type=int, default=200, help='Repeticiones por payload')
+        parser.add_argument('--username', help='Usuario con el que se listan los datos (por defecto un superusuario)')
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(self.style.WARNING('orjson no está instalado: FastJSONRenderer usa el renderer de DRF'))
+
+        user = self._get_user(options['username'])
+        factory = APIRequestFactory(SERVER_NAME='localhost')
+        iterations = options['iterations']
+
+        for name, (url, viewset) in PAYLOADS.items():
+            request = factory.get(url, {'page_size': options['page_size']})
+            force_authenticate(request, user=user)
+            response = viewset.as_view({'get': 'list'})(request)
+            if response.status_code != 200:
+                raise CommandError(f'{url} respondió {response.status_code}')
+            data = response.data
+            items = len(data.get('results', [])) if isinstance(data, dict) else len(data)
+
+            drf_bytes = JSONRenderer().render(data)
+            fast_bytes = FastJSONRenderer().render(data)
+            if json.loads(drf_bytes) != json.loads(fast_bytes):
+                raise CommandError(f'{name}: la salida de FastJSONRenderer difiere de JSONRenderer')
+
+            results = [
+                ('render DRF', self._time(lambda: JSONRenderer().render(data), iterations)),
+                ('render orjson', self._time(lambda: FastJSONRenderer().render(data), iterations)),
+                ('parse DRF', self._time(lambda: self._parse(JSONParser(), drf_bytes), iterations)),
+                ('parse orjson', self._time(lambda: self._parse(FastJSONParser(), drf_bytes), iterations)),
+            ]
+
+            self.stdout.write(self.style.SUCCESS(
+                f'\n{name}: {items} elementos, {len(drf_bytes) / 1024:.1f} KB '
+                f'(salida idéntica: {"sí" if drf_bytes == fast_bytes else "equivalente"})'
+            ))
+            for label, timings in results:
+                self.stdout.write(
+                    f'  {label:<14} mediana {statistics.median(timings) * 1000:7.3f}ms   '
+                    f'p95 {sorted(timings)[int(len(timings) * 0.95) - 1] * 1000:7.3f}ms'
+                )
+            self.stdout.write(
+                f'  speedup render x{statistics.median(results[0][1]) / statistics.median(results[1][1]):.1f}, '
+                f'parse x{statistics.median(results[2][1]) / statistics.median(results[3][1]):.1f}'
+            )
+
+    def _get_user(self, username):
+        if username:
+            user = User.objects.filter(username=username).first()
+        else:
+            user = User.objects.filter(is_superuser=True).first()
+        if user is None:
+            raise CommandError('No se encontró un usuario para listar los datos (use --username)')
+        return user
+
+    def _parse(self, parser, payload):
+        return parser.parse(io.BytesIO(payload), parser_context={'encoding': 'utf-8'})
+
+    def _time(self, func, iterations):
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return timings
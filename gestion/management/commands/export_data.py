@@ -0,0 +1,42 @@
+# gestion/management/commands/export_data.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...db_routers import read_from_replica
+from ...exports import DATASETS, iter_csv, write_xlsx
+
+
+class Command(BaseCommand):
+    help = 'Exporta productos, inventario, movimientos o ventas a CSV/XLSX con memoria constante'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(DATASETS))
+        parser.add_argument('--format', choices=['csv', 'xlsx'], default='csv')
+        parser.add_argument('--output', '-o', required=True, help='Archivo de salida')
+        parser.add_argument('--date-from', help='Desde (YYYY-MM-DD), movimientos y ventas')
+        parser.add_argument('--date-to', help='Hasta (YYYY-MM-DD), movimientos y ventas')
+        parser.add_argument('--warehouse', help='ID de bodega (inventario)')
+        parser.add_argument('--include-inactive', action='store_true', help='Incluir productos inactivos')
+
+    def handle(self, *args, **options):
+        export = DATASETS[options['dataset']]
+        params = {
+            'date_from': options['date_from'],
+            'date_to': options['date_to'],
+            'warehouse': options['warehouse'],
+            'include_inactive': options['include_inactive'],
+        }
+
+        try:
+            with read_from_replica():
+                if options['format'] == 'csv':
+                    with open(options['output'], 'w', encoding='utf-8', newline='') as fh:
+                        for chunk in iter_csv(export, params):
+                            fh.write(chunk)
+                else:
+                    with open(options['output'], 'wb') as fh:
+                        write_xlsx(export, params, fh)
+        except OSError as e:
+            raise CommandError(f'No se pudo escribir {options["output"]}: {e}')
+
+        self.stdout.write(self.style.SUCCESS(f'Exportación {options["dataset"]} escrita en {options["output"]}'))
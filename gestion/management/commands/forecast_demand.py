@@ -0,0 +1,56 @@
+# gestion/management/commands/forecast_demand.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...forecasting import apply_suggestions, forecast
+
+
+class Command(BaseCommand):
+    help = (
+        'Pronóstico de demanda de todo el catálogo (promedio móvil, suavizamiento exponencial, '
+        'variabilidad) y punto de reorden / stock mínimo sugeridos. Con --apply los escribe en los productos.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Días de historial (default FORECAST_WINDOW_DAYS)')
+        parser.add_argument('--alpha', type=float, help='Factor del suavizamiento exponencial (0-1, default FORECAST_ALPHA)')
+        parser.add_argument('--ma-days', type=int, help='Días del promedio móvil (default FORECAST_MOVING_AVERAGE_DAYS)')
+        parser.add_argument('--service-level', type=float, help='Nivel de servicio (0-1, default FORECAST_SERVICE_LEVEL)')
+        parser.add_argument('--categoria', help='Solo productos de esta categoría')
+        parser.add_argument('--apply', action='store_true', help='Escribir punto_reorden y stock_minimo sugeridos')
+        parser.add_argument('--min-sale-days', type=int, default=7,
+                            help='Días con ventas mínimos para escribir la sugerencia (default 7)')
+        parser.add_argument('--top', type=int, default=20, help='Productos a mostrar (mayor demanda pronosticada)')
+
+    def handle(self, *args, **options):
+        if options['days'] is not None and options['days'] < 2:
+            raise CommandError('--days debe ser al menos 2')
+        if options['alpha'] is not None and not 0 < options['alpha'] <= 1:
+            raise CommandError('--alpha debe estar entre 0 y 1')
+        if options['service_level'] is not None and not 0.5 <= options['service_level'] < 1:
+            raise CommandError('--service-level debe estar entre 0.5 y 1')
+        if options['ma_days'] is not None and options['ma_days'] < 1:
+            raise CommandError('--ma-days debe ser mayor que 0')
+
+        results, summary = forecast(
+            window_days=options['days'], alpha=options['alpha'], moving_average_days=options['ma_days'],
+            service_level=options['service_level'], categoria=options['categoria'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Pronóstico de {summary['products']} productos ({summary['date_from']} a {summary['date_to']}, "
+            f"{summary['sale_rows']} días-producto con ventas): carga {summary['load_ms']} ms, "
+            f"cálculo {summary['compute_ms']} ms"
+        ))
+        for result in sorted(results, key=lambda item: -item['forecast'])[:options['top']]:
+            self.stdout.write(
+                f"{result['sku']}: pronóstico {result['forecast']}/día (MA {result['moving_average']}, "
+                f"σ {result['std']}, CV {result['cv']}), lead time {result['lead_time']} -> "
+                f"punto reorden {result['suggested_punto_reorden']} (actual {result['punto_reorden']}), "
+                f"stock mínimo {result['suggested_stock_minimo']} (actual {result['stock_minimo']})"
+            )
+
+        if options['apply']:
+            updated, over_max = apply_suggestions(results, min_sale_days=options['min_sale_days'])
+            self.stdout.write(self.style.SUCCESS(f'{updated} productos actualizados'))
+            if over_max:
+                self.stdout.write(self.style.WARNING(f'{over_max} productos omitidos: la sugerencia supera su stock_maximo'))
@@ -0,0 +1,46 @@
+# gestion/management/commands/generate_reorders.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...models import Zone
+from ...reorder import create_draft_orders, reorder_suggestions
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera órdenes borrador (una por proveedor) para los productos bajo su punto de reorden. '
+        'Las órdenes quedan en DRAFT para revisión y se confirman en /api/supplier-orders/<id>/confirm/.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--zone', type=int, required=True, help='Zona destino de las órdenes')
+        parser.add_argument('--all-warehouses', action='store_true',
+                            help='Considerar el stock de todas las bodegas (default: solo la de la zona)')
+        parser.add_argument('--categoria', help='Solo productos de esta categoría')
+        parser.add_argument('--supplier', type=int, help='Solo este proveedor')
+        parser.add_argument('--dry-run', action='store_true', help='Mostrar sugerencias sin crear órdenes')
+
+    def handle(self, *args, **options):
+        zone = Zone.objects.filter(pk=options['zone'], is_active=True).first()
+        if zone is None:
+            raise CommandError('Zona no encontrada o inactiva')
+
+        suggestions, without_supplier = reorder_suggestions(
+            warehouse_id=None if options['all_warehouses'] else zone.warehouse_id,
+            categoria=options['categoria'], supplier_id=options['supplier'],
+        )
+        if without_supplier:
+            self.stdout.write(self.style.WARNING(f'{len(without_supplier)} productos bajo punto de reorden sin proveedor activo'))
+        if options['dry_run']:
+            for suggestion in suggestions:
+                self.stdout.write(
+                    f"{suggestion['sku']}: stock {suggestion['stock']} + pedido {suggestion['on_order']} "
+                    f"< {suggestion['reorder_point']} -> {suggestion['quantity']} ({suggestion['supplier']})"
+                )
+            self.stdout.write(f'{len(suggestions)} sugerencias (sin cambios)')
+            return
+
+        orders = create_draft_orders(suggestions, zone)
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(orders)} órdenes borrador con {len(suggestions)} productos'
+        ))
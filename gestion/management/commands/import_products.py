@@ -0,0 +1,46 @@
+# gestion/management/commands/import_products.py
+
+import csv
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...product_import import DEFAULT_CHUNK_SIZE, import_products
+
+
+class Command(BaseCommand):
+    help = 'Importa productos desde CSV/XLSX (upsert por SKU, validación por bloques)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='Archivo .csv o .xlsx')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Filas por bloque')
+        parser.add_argument('--dry-run', action='store_true', help='Solo validar, sin escribir')
+        parser.add_argument('--errors', help='Escribir el reporte de errores por fila en este CSV')
+
+    def handle(self, *args, **options):
+        path = options['file']
+        if not path.lower().endswith(('.csv', '.xlsx')):
+            raise CommandError('Formato no soportado (use .csv o .xlsx)')
+
+        try:
+            with open(path, 'rb') as fh:
+                report = import_products(fh, path, chunk_size=options['chunk_size'], dry_run=options['dry_run'])
+        except OSError as e:
+            raise CommandError(f'No se pudo leer {path}: {e}')
+
+        result = report.to_dict()
+        if options['errors'] and report.errors:
+            with open(options['errors'], 'w', encoding='utf-8', newline='') as fh:
+                writer = csv.writer(fh)
+                writer.writerow(['Fila', 'SKU', 'Errores'])
+                for error in report.errors:
+                    writer.writerow([error['row'], error['sku'] or '', json.dumps(error['errors'], ensure_ascii=False)])
+        elif report.errors:
+            for error in report.errors[:20]:
+                self.stdout.write(self.style.WARNING(f"Fila {error['row']} ({error['sku'] or 'sin SKU'}): {error['errors']}"))
+
+        prefix = '[dry-run] ' if options['dry_run'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}{result['rows']} filas: {result['created']} creadas, {result['updated']} actualizadas, "
+            f"{result['failed']} con error ({result['rows_per_second']} filas/s)"
+        ))
@@ -0,0 +1,283 @@
+# gestion/management/commands/loadtest.py
+
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+
+import requests
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from ...models import Inventory, Product, UserProfile, Warehouse, Zone
+from ...views.api_views import get_sales_zone
+
+
+# Mezcla de llamadas basada en frontend/src/services/api.js (peso relativo)
+DEFAULT_MIX = {
+    'products_list': 30,      # ProductList: getProducts({q, sort, page})
+    'search_for_sale': 20,    # SaleForm: searchProductsForSale por cada tecla
+    'zones_by_warehouse': 10, # MovementForm/SupplierOrderForm: getZonesByWarehouse
+    'sales_list': 8,          # SaleList: getSales
+    'movements_list': 7,      # MovementList: getMovements
+    'create_sale': 10,        # SaleForm: createSale
+    'create_movement': 10,    # MovementForm: createMovement (ingreso)
+    'current_user': 5,        # AuthContext: getCurrentUser
+}
+
+SEARCH_WORDS = ['chocolate', 'alfajor', 'torta', 'galleta', 'harina', 'manjar', 'crema', 'prod']
+PRODUCT_SORTS = ['name', '-name', 'stock', '-stock', 'price', '-price', 'sku']
+
+
+class EndpointStats:
+    """Latencias y errores acumulados de un endpoint"""
+
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.status_codes = {}
+
+    def add(self, latency, status_code, ok):
+        self.latencies.append(latency)
+        self.status_codes[status_code] = self.status_codes.get(status_code, 0) + 1
+        if not ok:
+            self.errors += 1
+
+    def percentile(self, pct):
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+
+class VirtualUser:
+    """Usuario virtual que replica las llamadas del cliente React"""
+
+    def __init__(self, base_url, username, fixtures, stats, lock):
+        self.base_url = base_url
+        self.username = username
+        self.fixtures = fixtures
+        self.stats = stats
+        self.lock = lock
+        self.http = requests.Session()
+
+    def request(self, name, method, path, **kwargs):
+        headers = kwargs.pop('headers', {})
+        csrf = self.http.cookies.get('csrftoken')
+        if csrf:
+            headers['X-CSRFToken'] = csrf
+        start = time.perf_counter()
+        status_code = 0
+        try:
+            response = self.http.request(method, urljoin(self.base_url, path), headers=headers, timeout=30, **kwargs)
+            status_code = response.status_code
+            ok = response.status_code < 400
+        except requests.RequestException:
+            ok = False
+        latency = time.perf_counter() - start
+        with self.lock:
+            self.stats.setdefault(name, EndpointStats()).add(latency, status_code, ok)
+
+    def login(self):
+        response = self.http.post(
+            urljoin(self.base_url, '/api/login/'),
+            json={'username': self.username, 'password': 'loadtest'},
+            timeout=30,
+        )
+        if response.status_code != 200:
+            raise CommandError(
+                f'Login falló ({response.status_code}). ¿El servidor corre con LOADTEST_FAKE_AUTH=True?'
+            )
+
+    # --- Escenarios ---
+    def products_list(self):
+        params = {'sort': random.choice(PRODUCT_SORTS)}
+        if random.random() < 0.3:
+            # Búsqueda con debounce: primera página de resultados
+            params['q'] = random.choice(SEARCH_WORDS)[:random.randint(3, 6)]
+        else:
+            params['page'] = random.randint(1, self.fixtures['product_pages'])
+        self.request('products_list', 'GET', '/api/products/', params=params)
+
+    def search_for_sale(self):
+        # El cliente busca en cada tecla a partir del 2° carácter
+        word = random.choice(SEARCH_WORDS)
+        for length in range(2, min(len(word), 6) + 1):
+            self.request('search_for_sale', 'GET', '/api/search-products-for-sale/', params={'q': word[:length]})
+
+    def zones_by_warehouse(self):
+        self.request('zones_by_warehouse', 'GET', '/api/zones/', params={'warehouse': random.choice(self.fixtures['warehouses'])})
+
+    def sales_list(self):
+        self.request('sales_list', 'GET', '/api/sales/', params={'page': 1})
+
+    def movements_list(self):
+        self.request('movements_list', 'GET', '/api/movements/', params={'page': 1})
+
+    def create_sale(self):
+        cart = [
+            {'id': product_id, 'quantity': random.randint(1, 3)}
+            for product_id in random.sample(self.fixtures['sale_products'], min(3, len(self.fixtures['sale_products'])))
+        ]
+        self.request('create_sale', 'POST', '/api/sales/', json={'client_id': None, 'cart': cart})
+
+    def create_movement(self):
+        zone_id, warehouse_id = random.choice(self.fixtures['zones'])
+        self.request('create_movement', 'POST', '/api/movements/', json={
+            'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'tipo': 'ingreso',
+            'product': random.choice(self.fixtures['products']),
+            'cantidad': random.randint(5, 20),
+            'destination_zone': zone_id,
+            'warehouse': warehouse_id,
+            'motivo': 'loadtest',
+        })
+
+    def current_user(self):
+        self.request('current_user', 'GET', '/api/current-user/')
+
+
+class Command(BaseCommand):
+    help = (
+        'Prueba de carga con la mezcla de llamadas del cliente React contra un servidor local. '
+        'El servidor debe correr con LOADTEST_FAKE_AUTH=True y una BD con datos (seed_data, seed_1000_products).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='URL base del servidor')
+        parser.add_argument('--users', type=int, default=10, help='Usuarios virtuales concurrentes')
+        parser.add_argument('--duration', type=int, default=30, help='Duración en segundos')
+        parser.add_argument('--think-time', type=float, default=0.0, help='Pausa entre acciones por usuario (segundos)')
+        parser.add_argument('--username', default='loadtest', help='Usuario (se crea con rol admin si no existe)')
+        parser.add_argument(
+            '--mix',
+            default='',
+            help='Pesos personalizados, ej: products_list=50,create_sale=5 (el resto usa los pesos por defecto)',
+        )
+        parser.add_argument('--json', dest='json_path', help='Guardar el resultado en un archivo JSON')
+        parser.add_argument('--seed', type=int, default=None, help='Semilla aleatoria para repetir la mezcla')
+
+    def handle(self, *args, **options):
+        if options['seed'] is not None:
+            random.seed(options['seed'])
+
+        mix = self._parse_mix(options['mix'])
+        fixtures = self._load_fixtures()
+        self._ensure_user(options['username'])
+
+        stats = {}
+        lock = threading.Lock()
+        deadline = time.monotonic() + options['duration']
+        scenarios = list(mix.keys())
+        weights = [mix[name] for name in scenarios]
+
+        def run_user(index):
+            user = VirtualUser(options['url'], options['username'], fixtures, stats, lock)
+            user.login()
+            while time.monotonic() < deadline:
+                getattr(user, random.choices(scenarios, weights)[0])()
+                if options['think_time']:
+                    time.sleep(options['think_time'])
+
+        self.stdout.write(
+            f"=== Prueba de carga: {options['users']} usuarios, {options['duration']}s contra {options['url']} ===\n"
+        )
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options['users']) as executor:
+            futures = [executor.submit(run_user, i) for i in range(options['users'])]
+            for future in futures:
+                future.result()
+        elapsed = time.monotonic() - start
+
+        report = self._build_report(stats, elapsed)
+        self._print_report(report)
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as fh:
+                json.dump(report, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"OK: Resultado guardado en {options['json_path']}"))
+
+    def _parse_mix(self, raw):
+        mix = dict(DEFAULT_MIX)
+        if not raw:
+            return mix
+        for part in raw.split(','):
+            name, _, weight = part.partition('=')
+            name = name.strip()
+            if name not in DEFAULT_MIX:
+                raise CommandError(f'Escenario desconocido: {name}. Opciones: {", ".join(DEFAULT_MIX)}')
+            try:
+                mix[name] = float(weight)
+            except ValueError:
+                raise CommandError(f'Peso inválido para {name}: {weight}')
+        return {name: weight for name, weight in mix.items() if weight > 0}
+
+    def _load_fixtures(self):
+        products = list(Product.objects.filter(is_active=True).values_list('id', flat=True)[:500])
+        zones = list(Zone.objects.filter(is_active=True).values_list('id', 'warehouse_id'))
+        warehouses = list(Warehouse.objects.filter(is_active=True).values_list('id', flat=True))
+        if not products or not zones:
+            raise CommandError('La BD no tiene datos. Ejecuta primero: python manage.py seed_data y seed_1000_products')
+
+        # Las ventas descuentan de la zona de ventas: usar productos con stock ahí
+        sales_zone = get_sales_zone()
+        sale_products = list(
+            Inventory.objects.filter(zone=sales_zone, quantity__gte=50, product__is_active=True)
+            .values_list('product_id', flat=True)[:500]
+        ) if sales_zone else []
+        return {
+            'products': products,
+            'sale_products': sale_products or products,
+            'product_pages': max(1, Product.objects.filter(is_active=True).count() // 20),
+            'zones': zones,
+            'warehouses': warehouses,
+        }
+
+    def _ensure_user(self, username):
+        user, created = User.objects.get_or_create(username=username, defaults={'email': f'{username}@loadtest.local'})
+        if created:
+            UserProfile.objects.create(user=user, nombres='Load', apellidos='Test', role='admin')
+            self.stdout.write(f'Usuario de prueba creado: {username}')
+
+    def _build_report(self, stats, elapsed):
+        endpoints = {}
+        total = errors = 0
+        for name, endpoint in sorted(stats.items()):
+            count = len(endpoint.latencies)
+            total += count
+            errors += endpoint.errors
+            endpoints[name] = {
+                'requests': count,
+                'rps': round(count / elapsed, 2) if elapsed else 0,
+                'p50_ms': round(endpoint.percentile(50) * 1000, 1),
+                'p95_ms': round(endpoint.percentile(95) * 1000, 1),
+                'p99_ms': round(endpoint.percentile(99) * 1000, 1),
+                'max_ms': round(max(endpoint.latencies) * 1000, 1) if endpoint.latencies else 0,
+                'error_rate': round(endpoint.errors / count, 4) if count else 0,
+                'status_codes': {str(code): n for code, n in sorted(endpoint.status_codes.items())},
+            }
+        return {
+            'duration_s': round(elapsed, 2),
+            'requests': total,
+            'rps': round(total / elapsed, 2) if elapsed else 0,
+            'error_rate': round(errors / total, 4) if total else 0,
+            'endpoints': endpoints,
+        }
+
+    def _print_report(self, report):
+        header = f"{'Endpoint':<20}{'Req':>8}{'RPS':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}{'Err%':>8}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for name, row in report['endpoints'].items():
+            self.stdout.write(
+                f"{name:<20}{row['requests']:>8}{row['rps']:>9}{row['p50_ms']:>9}{row['p95_ms']:>9}"
+                f"{row['p99_ms']:>9}{row['max_ms']:>9}{row['error_rate'] * 100:>7.1f}%"
+            )
+        self.stdout.write('-' * len(header))
+        style = self.style.SUCCESS if report['error_rate'] < 0.01 else self.style.WARNING
+        self.stdout.write(style(
+            f"Total: {report['requests']} requests en {report['duration_s']}s "
+            f"({report['rps']} req/s), errores {report['error_rate'] * 100:.2f}%"
+        ))
@@ -0,0 +1,37 @@
+# gestion/management/commands/rollup_sales.py
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from ...sales_rollups import catch_up, rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        'Actualiza los resúmenes diarios de ventas. Sin opciones recalcula los días cerrados '
+        'desde la marca de agua (programar a diario, ej. cron 00:10). '
+        'Con --rebuild recalcula un rango (carga inicial: --rebuild --from <primer día> --to <hoy>).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help='Recalcular el rango --from/--to')
+        parser.add_argument('--from', dest='date_from', help='Desde (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='date_to', help='Hasta (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        if not options['rebuild']:
+            result = catch_up()
+            if result['from'] is None:
+                self.stdout.write('Resúmenes al día')
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Recalculados {result['from']} a {result['to']}: {result['rows']} filas"
+                ))
+            return
+
+        date_from = parse_date(options['date_from'] or '')
+        date_to = parse_date(options['date_to'] or '')
+        if not date_from or not date_to or date_from > date_to:
+            raise CommandError('--rebuild requiere --from y --to válidos (YYYY-MM-DD)')
+        rows = rebuild(date_from, date_to)
+        self.stdout.write(self.style.SUCCESS(f'Recalculados {date_from} a {date_to}: {rows} filas'))
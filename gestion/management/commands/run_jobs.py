@@ -0,0 +1,57 @@
+# gestion/management/commands/run_jobs.py
+
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from ...jobs import claim_next, load_tasks, requeue_stale, run_job, worker_name
+
+
+class Command(BaseCommand):
+    help = 'Worker de tareas en segundo plano (cola en la base de datos)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Procesar las tareas pendientes y salir')
+        parser.add_argument('--max-jobs', type=int, default=0, help='Salir después de N tareas (0 = sin límite)')
+        parser.add_argument('--sleep', type=float, default=None, help='Segundos de espera sin tareas')
+
+    def handle(self, *args, **options):
+        load_tasks()
+        worker = worker_name()
+        sleep = options['sleep'] if options['sleep'] is not None else settings.JOB_POLL_INTERVAL
+        self._stop = False
+        # Terminar la tarea en curso antes de salir (systemctl stop / Ctrl+C)
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+
+        self.stdout.write(f'Worker {worker} iniciado')
+        processed = 0
+        last_stale_check = 0.0
+        while not self._stop:
+            close_old_connections()
+            if time.monotonic() - last_stale_check >= 60:
+                requeue_stale()
+                last_stale_check = time.monotonic()
+
+            job = claim_next(worker)
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(sleep)
+                continue
+
+            self.stdout.write(f'Tarea #{job.pk} {job.name} (intento {job.attempts}/{job.max_attempts})')
+            job = run_job(job)
+            style = self.style.SUCCESS if job.status == job.STATUS_SUCCEEDED else self.style.WARNING
+            self.stdout.write(style(f'Tarea #{job.pk} {job.name}: {job.get_status_display()}'))
+            processed += 1
+            if options['max_jobs'] and processed >= options['max_jobs']:
+                break
+
+        self.stdout.write(f'Worker {worker} detenido ({processed} tareas)')
+
+    def _request_stop(self, signum, frame):
+        self._stop = True
@@ -0,0 +1,78 @@
+# gestion/management/commands/slow_query_report.py
+
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Resume el registro de consultas lentas agrupando por fingerprint (SQL normalizado)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            default=str(Path(settings.LOGS_DIR) / 'slow_queries.jsonl'),
+            help='Archivo JSONL generado por gestion.slow_queries',
+        )
+        parser.add_argument('--top', type=int, default=10, help='Cantidad de consultas a mostrar')
+        parser.add_argument('--view', help='Filtrar por vista (ej: ProductViewSet.list)')
+        parser.add_argument('--no-plan', action='store_true', help='No mostrar el plan de ejecución')
+
+    def handle(self, *args, **options):
+        path = Path(options['file'])
+        if not path.exists():
+            raise CommandError(f'No existe el archivo {path}. ¿SLOW_QUERY_THRESHOLD_MS está habilitado?')
+
+        from ...slow_queries import normalize_sql
+
+        groups = {}
+        with path.open(encoding='utf-8') as fh:
+            for line in fh:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if options['view'] and entry.get('view') != options['view']:
+                    continue
+                group = groups.setdefault(entry['fingerprint'], {
+                    'sql': normalize_sql(entry['sql']),
+                    'durations': [],
+                    'views': set(),
+                    'locations': set(),
+                    'plan': None,
+                    'sample_params': None,
+                })
+                group['durations'].append(entry['duration_ms'])
+                if entry.get('view'):
+                    group['views'].add(entry['view'])
+                if entry.get('location'):
+                    group['locations'].add(entry['location'])
+                if entry.get('plan'):
+                    group['plan'] = entry['plan']
+                    group['sample_params'] = entry.get('params')
+
+        if not groups:
+            self.stdout.write('No hay consultas lentas registradas.')
+            return
+
+        ranked = sorted(groups.items(), key=lambda item: sum(item[1]['durations']), reverse=True)
+        for fingerprint, group in ranked[:options['top']]:
+            durations = sorted(group['durations'])
+            p95 = durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+            self.stdout.write(self.style.WARNING(
+                f"[{fingerprint}] {len(durations)} veces | total {sum(durations):.0f}ms | "
+                f"p95 {p95:.0f}ms | max {durations[-1]:.0f}ms"
+            ))
+            self.stdout.write(f"  SQL: {group['sql'][:500]}")
+            if group['views']:
+                self.stdout.write(f"  Vistas: {', '.join(sorted(group['views']))}")
+            for location in sorted(group['locations'])[:3]:
+                self.stdout.write(f"  Origen: {location}")
+            if group['plan'] and not options['no_plan']:
+                self.stdout.write(f"  Parámetros: {group['sample_params']}")
+                self.stdout.write('  Plan:')
+                for row in group['plan']:
+                    self.stdout.write(f'    {row}')
+            self.stdout.write('')
@@ -0,0 +1,19 @@
+# gestion/management/commands/snapshot_inventory.py
+
+from django.core.management.base import BaseCommand
+
+from ...inventory_snapshots import take_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        'Toma la foto diaria del inventario (solo filas que cambiaron desde la anterior). '
+        'Programar a diario (ej. cron 23:55); el stock a una fecha parte de la última foto. '
+        'La foto refleja el inventario actual: volver a ejecutarla el mismo día la rehace.'
+    )
+
+    def handle(self, *args, **options):
+        run = take_snapshot()
+        self.stdout.write(self.style.SUCCESS(
+            f'Foto {run.date}: {run.rows_written} filas cambiadas en {run.duration_ms} ms'
+        ))
@@ -0,0 +1,33 @@
+# gestion/management/commands/supplier_scorecard.py
+
+from django.core.management.base import BaseCommand
+
+from ...supplier_scorecard import refresh, scorecard
+
+
+class Command(BaseCommand):
+    help = (
+        'Actualiza el scorecard de proveedores (lead time real vs declarado, fill rate, cancelaciones, gasto). '
+        'Incremental: solo los meses con órdenes modificadas (programar cada hora; /api/reports/suppliers/ '
+        'solo lee la tabla cacheada); --force recalcula todo (programar a diario).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Recalcular todo (refleja órdenes eliminadas)')
+
+    def handle(self, *args, **options):
+        run, computed = refresh(force=options['force'])
+        if not computed:
+            self.stdout.write(f'Scorecard al día ({run})')
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Scorecard {'completo' if run.full else 'incremental'}: {run.rows_written} meses-proveedor "
+            f"en {run.duration_ms} ms"
+        ))
+        for result in scorecard()[:20]:
+            self.stdout.write(
+                f"  {result['supplier']}: {result['orders']} órdenes, lead time {result['actual_lead_time']} "
+                f"(declarado {result['declared_lead_time']}), fill rate {result['fill_rate']}, "
+                f"a tiempo {result['on_time_rate']}, cancelación {result['cancellation_rate']}, gasto {result['spend']}"
+            )
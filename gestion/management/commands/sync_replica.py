@@ -0,0 +1,39 @@
+# gestion/management/commands/sync_replica.py
+
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from ...db_routers import REPLICA_ALIAS
+
+
+class Command(BaseCommand):
+    help = 'Copia la base SQLite principal a la réplica local (simula la replicación en desarrollo)'
+
+    def handle(self, *args, **options):
+        if REPLICA_ALIAS not in settings.DATABASES:
+            raise CommandError('No hay réplica configurada. Define DATABASE_REPLICA_URL, por ejemplo: sqlite:///db_replica.sqlite3')
+
+        primary = settings.DATABASES['default']
+        replica = settings.DATABASES[REPLICA_ALIAS]
+        sqlite_engine = 'django.db.backends.sqlite3'
+        if primary['ENGINE'] != sqlite_engine or replica['ENGINE'] != sqlite_engine:
+            raise CommandError(
+                'sync_replica solo aplica a SQLite. En PostgreSQL configura la réplica con streaming replication.'
+            )
+
+        # Cerrar conexiones abiertas a la réplica antes de sobrescribirla
+        connections[REPLICA_ALIAS].close()
+
+        source = sqlite3.connect(str(primary['NAME']))
+        target = sqlite3.connect(str(replica['NAME']))
+        try:
+            # La API de backup de SQLite copia esquema y datos de forma consistente
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+
+        self.stdout.write(self.style.SUCCESS(f"OK: Réplica sincronizada en {replica['NAME']}"))
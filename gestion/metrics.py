@@ -0,0 +1,217 @@
+# gestion/metrics.py
+"""
+Métricas estilo Prometheus, seguras con varios procesos (gunicorn --workers N).
+
+Cada proceso acumula sus métricas en memoria y las vuelca periódicamente a
+METRICS_DIR/metrics_<pid>.json. El endpoint /api/metrics/ une los archivos
+de todos los procesos (sumando contadores y buckets) y genera el formato de
+exposición de texto de Prometheus. METRICS_DIR debe limpiarse al reiniciar
+el servicio (ver lilis-backend.service).
+"""
+import json
+import math
+import os
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+_lock = threading.Lock()
+_registry = {}
+_values = {}
+_last_flush = 0.0
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), buckets=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets) if buckets else None
+        _registry[name] = self
+
+    def _key(self, labels):
+        return json.dumps([self.name, [str(labels.get(label, '')) for label in self.labelnames]])
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with _lock:
+            _values[key] = _values.get(key, 0) + amount
+        _maybe_flush()
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames, buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with _lock:
+            entry = _values.get(key)
+            if entry is None:
+                entry = _values[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry['buckets'][index] += 1
+                    break
+            entry['sum'] += value
+            entry['count'] += 1
+        _maybe_flush()
+
+
+# --- Métricas de la aplicación ---
+REQUEST_LATENCY = Histogram(
+    'lilis_http_request_duration_seconds', 'Latencia de requests por vista/acción y status',
+    ['view', 'method', 'status'],
+)
+REQUEST_DB_QUERIES = Histogram(
+    'lilis_http_request_db_queries', 'Consultas a la BD por request',
+    ['view'], buckets=COUNT_BUCKETS,
+)
+DB_CONNECT_LATENCY = Histogram(
+    'lilis_db_connect_duration_seconds', 'Costo de obtener la conexión a la BD por request',
+)
+DB_CONNECTIONS = Counter(
+    'lilis_db_connections_total', 'Conexiones a la BD abiertas o reutilizadas', ['state'],
+)
+FIREBASE_LATENCY = Histogram(
+    'lilis_firebase_request_duration_seconds', 'Latencia de llamadas REST a Firebase', ['operation'],
+)
+FIREBASE_FAILURES = Counter(
+    'lilis_firebase_failures_total', 'Fallos de llamadas a Firebase', ['operation', 'reason'],
+)
+CHECKOUT_LINES = Histogram(
+    'lilis_checkout_lines', 'Líneas por carrito en ventas', buckets=COUNT_BUCKETS,
+)
+MOVEMENTS = Counter(
+    'lilis_inventory_movements_total', 'Movimientos de inventario registrados', ['tipo'],
+)
+INVENTORY_CONFLICTS = Counter(
+    'lilis_inventory_conflicts_total',
+    'Conflictos de stock detectados dentro de la transacción (stock cambió tras la validación)',
+    ['operation'],
+)
+JOBS = Counter(
+    'lilis_jobs_total', 'Tareas en segundo plano terminadas o reintentadas', ['name', 'status'],
+)
+JOB_DURATION = Histogram(
+    'lilis_job_duration_seconds', 'Duración de las tareas en segundo plano', ['name'],
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600),
+)
+
+
+def observe_request(stats, method, status_code):
+    """Registra las métricas de un request terminado (llamado por la instrumentación)"""
+    view = stats.view or 'unmatched'
+    REQUEST_LATENCY.observe(stats.elapsed, view=view, method=method, status=status_code)
+    REQUEST_DB_QUERIES.observe(stats.db_queries, view=view)
+    DB_CONNECT_LATENCY.observe(stats.db_connect_time)
+    if stats.db_connections_opened:
+        DB_CONNECTIONS.inc(stats.db_connections_opened, state='opened')
+    if stats.db_connections_reused:
+        DB_CONNECTIONS.inc(stats.db_connections_reused, state='reused')
+
+
+# --- Persistencia multiproceso ---
+def _metrics_dir():
+    path = Path(settings.METRICS_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def flush():
+    """Escribe las métricas de este proceso de forma atómica"""
+    global _last_flush
+    with _lock:
+        snapshot = json.dumps(_values)
+        _last_flush = time.monotonic()
+    path = _metrics_dir() / f'metrics_{os.getpid()}.json'
+    tmp_path = path.with_suffix('.tmp')
+    tmp_path.write_text(snapshot, encoding='utf-8')
+    os.replace(tmp_path, path)
+
+
+def _maybe_flush():
+    if time.monotonic() - _last_flush >= settings.METRICS_FLUSH_INTERVAL:
+        try:
+            flush()
+        except OSError:
+            pass
+
+
+def _merged_values():
+    merged = {}
+    for path in _metrics_dir().glob('metrics_*.json'):
+        try:
+            values = json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            continue
+        for key, value in values.items():
+            if isinstance(value, dict):
+                entry = merged.setdefault(key, {'buckets': [0] * len(value['buckets']), 'sum': 0.0, 'count': 0})
+                entry['buckets'] = [a + b for a, b in zip(entry['buckets'], value['buckets'])]
+                entry['sum'] += value['sum']
+                entry['count'] += value['count']
+            else:
+                merged[key] = merged.get(key, 0) + value
+    return merged
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [(name, value) for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = [
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in pairs
+    ]
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_number(value):
+    if isinstance(value, float) and math.isinf(value):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_exposition():
+    """Genera el texto de exposición de Prometheus con las métricas de todos los procesos"""
+    flush()
+    series = {}
+    for key, value in _merged_values().items():
+        name, label_values = json.loads(key)
+        series.setdefault(name, []).append((label_values, value))
+
+    lines = []
+    for name, metric in sorted(_registry.items()):
+        lines.append(f'# HELP {name} {metric.documentation}')
+        lines.append(f'# TYPE {name} {metric.kind}')
+        for label_values, value in sorted(series.get(name, []), key=lambda item: item[0]):
+            if metric.kind == 'counter':
+                lines.append(f'{name}{_format_labels(metric.labelnames, label_values)} {_format_number(value)}')
+                continue
+            cumulative = 0
+            for bound, count in zip(metric.buckets, value['buckets']):
+                cumulative += count
+                labels = _format_labels(metric.labelnames, label_values, ('le', _format_number(float(bound))))
+                lines.append(f'{name}_bucket{labels} {cumulative}')
+            labels = _format_labels(metric.labelnames, label_values, ('le', '+Inf'))
+            lines.append(f'{name}_bucket{labels} {value["count"]}')
+            labels = _format_labels(metric.labelnames, label_values)
+            lines.append(f'{name}_sum{labels} {_format_number(float(value["sum"]))}')
+            lines.append(f'{name}_count{labels} {value["count"]}')
+    return '\n'.join(lines) + '\n'
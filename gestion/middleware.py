@@ -1,4 +1,5 @@
 # gestion/middleware.py
+from django.conf import settings
 from django.utils.deprecation import MiddlewareMixin
 
 class DisableCSRFForAPI(MiddlewareMixin):
@@ -10,3 +11,40 @@ class DisableCSRFForAPI(MiddlewareMixin):
             setattr(request, '_dont_enforce_csrf_checks', True)
         return None
 
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Decide si las lecturas del request pueden ir a la réplica.
+
+    Los requests GET/HEAD leen de la réplica, salvo que la sesión haya hecho
+    una escritura hace menos de REPLICA_PIN_SECONDS (read-your-writes). Las
+    escrituras marcan la sesión con una cookie que la fija a la base principal.
+    """
+    PIN_COOKIE = 'db_primary_pin'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        from .db_routers import replica_enabled, set_replica_reads, reset_replica_reads
+
+        if not replica_enabled():
+            return self.get_response(request)
+
+        safe = request.method in ('GET', 'HEAD', 'OPTIONS')
+        pinned = self.PIN_COOKIE in request.COOKIES
+        token = set_replica_reads(safe and not pinned)
+        try:
+            response = self.get_response(request)
+        finally:
+            reset_replica_reads(token)
+
+        if not safe:
+            response.set_cookie(
+                self.PIN_COOKIE, '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-18 22:33
+
+import re
+
+from django.db import migrations, models
+
+
+def seed_sku_sequence(apps, schema_editor):
+    """Inicializa el contador PROD con el mayor SKU PROD-N existente"""
+    Product = apps.get_model('gestion', 'Product')
+    SkuSequence = apps.get_model('gestion', 'SkuSequence')
+    db_alias = schema_editor.connection.alias
+    last_value = 0
+    skus = Product.objects.using(db_alias).filter(sku__startswith='PROD-').values_list('sku', flat=True)
+    for sku in skus.iterator():
+        match = re.fullmatch(r'PROD-(\d+)', sku)
+        if match:
+            last_value = max(last_value, int(match.group(1)))
+    SkuSequence.objects.using(db_alias).create(prefix='PROD', last_value=last_value)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0014_add_indexes_for_performance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SkuSequence',
+            fields=[
+                ('prefix', models.CharField(max_length=20, primary_key=True, serialize=False)),
+                ('last_value', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Secuencia de SKU',
+                'verbose_name_plural': 'Secuencias de SKU',
+            },
+        ),
+        migrations.RunPython(seed_sku_sequence, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-18 22:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0016_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('last_date', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('day', 'Día'), ('product', 'Producto'), ('category', 'Categoría'), ('user', 'Vendedor'), ('client', 'Cliente')], max_length=10)),
+                ('date', models.DateField()),
+                ('key', models.CharField(blank=True, default='', max_length=100)),
+                ('sales', models.IntegerField(default=0, help_text='Ventas (boletas) que incluyen la clave')),
+                ('units', models.BigIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'verbose_name': 'Resumen de ventas',
+                'verbose_name_plural': 'Resúmenes de ventas',
+                'constraints': [models.UniqueConstraint(fields=('dimension', 'date', 'key'), name='sales_rollup_unique_key')],
+            },
+        ),
+    ]
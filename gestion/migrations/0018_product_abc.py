@@ -0,0 +1,53 @@
+# Generated by Django 5.2.7 on 2026-10-18 22:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0017_sales_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AbcRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('computed_at', models.DateTimeField(auto_now_add=True)),
+                ('date_from', models.DateField()),
+                ('date_to', models.DateField()),
+                ('last_sale_item_id', models.BigIntegerField(default=0)),
+                ('last_movement_id', models.BigIntegerField(default=0)),
+                ('products', models.PositiveIntegerField(default=0)),
+                ('duration_ms', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Cálculo ABC',
+                'verbose_name_plural': 'Cálculos ABC',
+                'ordering': ['-computed_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductABC',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('categoria', models.CharField(blank=True, default='', max_length=100)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('units', models.DecimalField(decimal_places=4, default=0, max_digits=18)),
+                ('revenue_class', models.CharField(blank=True, choices=[('A', 'A'), ('B', 'B'), ('C', 'C')], default='', max_length=1)),
+                ('volume_class', models.CharField(choices=[('A', 'A'), ('B', 'B'), ('C', 'C')], default='C', max_length=1)),
+                ('category_revenue_class', models.CharField(blank=True, choices=[('A', 'A'), ('B', 'B'), ('C', 'C')], default='', max_length=1)),
+                ('category_volume_class', models.CharField(blank=True, choices=[('A', 'A'), ('B', 'B'), ('C', 'C')], default='', max_length=1)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='abc_rows', to='gestion.product')),
+                ('warehouse', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='abc_rows', to='gestion.warehouse')),
+            ],
+            options={
+                'verbose_name': 'Clasificación ABC',
+                'verbose_name_plural': 'Clasificaciones ABC',
+                'indexes': [models.Index(fields=['warehouse', 'revenue_class'], name='gestion_pro_warehou_9365a3_idx'), models.Index(fields=['warehouse', 'volume_class'], name='gestion_pro_warehou_857fa8_idx')],
+                'constraints': [models.UniqueConstraint(fields=('product', 'warehouse'), name='product_abc_unique_product_warehouse')],
+            },
+        ),
+    ]
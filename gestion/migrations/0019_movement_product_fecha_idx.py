@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 22:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0018_product_abc'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='productmovement',
+            index=models.Index(fields=['product', 'fecha', 'id'], name='movement_product_fecha_idx'),
+        ),
+    ]
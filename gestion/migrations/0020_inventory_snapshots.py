@@ -0,0 +1,65 @@
+# Generated by Django 5.2.7 on 2026-10-18 22:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0019_movement_product_fecha_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventorySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('quantity', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Foto de inventario',
+                'verbose_name_plural': 'Fotos de inventario',
+            },
+        ),
+        migrations.CreateModel(
+            name='InventorySnapshotRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('taken_at', models.DateTimeField()),
+                ('rows_written', models.PositiveIntegerField(default=0)),
+                ('duration_ms', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Toma de foto de inventario',
+                'verbose_name_plural': 'Tomas de foto de inventario',
+                'ordering': ['-taken_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='productmovement',
+            index=models.Index(fields=['created_at'], name='movement_created_at_idx'),
+        ),
+        migrations.AddField(
+            model_name='inventorysnapshot',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='gestion.product'),
+        ),
+        migrations.AddField(
+            model_name='inventorysnapshot',
+            name='zone',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='gestion.zone'),
+        ),
+        migrations.AddIndex(
+            model_name='inventorysnapshot',
+            index=models.Index(fields=['date'], name='gestion_inv_date_c9ca31_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='inventorysnapshot',
+            constraint=models.UniqueConstraint(fields=('product', 'zone', 'date'), name='inventory_snapshot_unique_day'),
+        ),
+    ]
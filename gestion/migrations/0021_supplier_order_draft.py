@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 22:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0020_inventory_snapshots'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='supplierorder',
+            name='expected_delivery_date',
+            field=models.DateField(blank=True, help_text='Fecha estimada de entrega (según lead time del proveedor)', null=True),
+        ),
+        migrations.AlterField(
+            model_name='supplierorder',
+            name='status',
+            field=models.CharField(choices=[('DRAFT', 'Borrador'), ('PENDING', 'Pendiente'), ('RECEIVED', 'Recibida'), ('CANCELLED', 'Cancelada')], default='PENDING', max_length=20),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-18 22:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0021_supplier_order_draft'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryLot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lote', models.CharField(blank=True, default='', max_length=100)),
+                ('fecha_vencimiento', models.DateField(blank=True, null=True)),
+                ('quantity', models.PositiveIntegerField(default=0)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lots', to='gestion.product')),
+                ('zone', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lots', to='gestion.zone')),
+            ],
+            options={
+                'verbose_name': 'Lote de inventario',
+                'verbose_name_plural': 'Lotes de inventario',
+                'indexes': [models.Index(fields=['product', 'zone', 'fecha_vencimiento'], name='inventory_lot_fefo_idx'), models.Index(condition=models.Q(('quantity__gt', 0)), fields=['fecha_vencimiento', 'product'], name='inventory_lot_expiry_idx')],
+                'constraints': [models.UniqueConstraint(fields=('product', 'zone', 'lote', 'fecha_vencimiento'), name='inventory_lot_unique')],
+            },
+        ),
+    ]
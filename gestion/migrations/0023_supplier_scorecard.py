@@ -0,0 +1,83 @@
+# Generated by Django 5.2.7 on 2026-10-18 23:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0022_inventory_lots'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SupplierScorecardRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('refreshed_at', models.DateTimeField(auto_now_add=True)),
+                ('last_updated_at', models.DateTimeField(blank=True, null=True)),
+                ('full', models.BooleanField(default=False)),
+                ('rows_written', models.PositiveIntegerField(default=0)),
+                ('duration_ms', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Actualización de scorecard de proveedores',
+                'verbose_name_plural': 'Actualizaciones de scorecard de proveedores',
+                'ordering': ['-refreshed_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SupplierScoreMonth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='Primer día del mes de emisión de las órdenes')),
+                ('orders', models.PositiveIntegerField(default=0)),
+                ('received_orders', models.PositiveIntegerField(default=0)),
+                ('cancelled_orders', models.PositiveIntegerField(default=0)),
+                ('orders_with_expected', models.PositiveIntegerField(default=0)),
+                ('on_time_orders', models.PositiveIntegerField(default=0)),
+                ('lead_time_days_total', models.DecimalField(decimal_places=4, default=0, max_digits=14)),
+                ('units_ordered', models.BigIntegerField(default=0, help_text='Unidades pedidas en las órdenes recibidas')),
+                ('units_received', models.BigIntegerField(default=0)),
+                ('spend', models.DecimalField(decimal_places=2, default=0, help_text='Valor recibido', max_digits=16)),
+            ],
+            options={
+                'verbose_name': 'Desempeño mensual de proveedor',
+                'verbose_name_plural': 'Desempeño mensual de proveedores',
+            },
+        ),
+        migrations.AddField(
+            model_name='supplierorder',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='supplierorderitem',
+            name='received_quantity',
+            field=models.PositiveIntegerField(blank=True, help_text='Cantidad recibida (al recibir la orden)', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='supplierorder',
+            index=models.Index(fields=['updated_at'], name='gestion_sup_updated_50d8ae_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='supplierorder',
+            index=models.Index(fields=['supplier', 'order_date'], name='gestion_sup_supplie_2c0795_idx'),
+        ),
+        migrations.AddField(
+            model_name='supplierscoremonth',
+            name='supplier',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_months', to='gestion.supplier'),
+        ),
+        migrations.AddIndex(
+            model_name='supplierscoremonth',
+            index=models.Index(fields=['month'], name='gestion_sup_month_f790b1_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='supplierscoremonth',
+            constraint=models.UniqueConstraint(fields=('supplier', 'month'), name='supplier_score_month_unique'),
+        ),
+    ]
@@ -0,0 +1,100 @@
+# Generated by Django 5.2.7 on 2026-10-18 23:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gestion', '0023_supplier_scorecard'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovementArchiveChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.DateField(help_text='Primer día del mes de los movimientos')),
+                ('seq', models.PositiveIntegerField(default=0)),
+                ('product_min', models.BigIntegerField()),
+                ('product_max', models.BigIntegerField()),
+                ('fecha_min', models.DateTimeField(blank=True, null=True)),
+                ('fecha_max', models.DateTimeField(blank=True, null=True)),
+                ('id_min', models.BigIntegerField()),
+                ('id_max', models.BigIntegerField()),
+                ('row_count', models.PositiveIntegerField(default=0)),
+                ('raw_bytes', models.PositiveIntegerField(default=0, help_text='Tamaño sin comprimir')),
+                ('data', models.BinaryField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Bloque de movimientos archivados',
+                'verbose_name_plural': 'Bloques de movimientos archivados',
+                'ordering': ['period', 'seq'],
+            },
+        ),
+        migrations.CreateModel(
+            name='MovementArchiveRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cutoff', models.DateTimeField(help_text='Inicio del primer mes que sigue en la tabla de movimientos')),
+                ('stock_from', models.DateTimeField(help_text='Momento del saldo de apertura de stock (stock a una fecha desde aquí)')),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('rows_archived', models.PositiveIntegerField(default=0)),
+                ('chunks_written', models.PositiveIntegerField(default=0)),
+                ('raw_bytes', models.BigIntegerField(default=0)),
+                ('compressed_bytes', models.BigIntegerField(default=0)),
+                ('duration_ms', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Archivado de movimientos',
+                'verbose_name_plural': 'Archivados de movimientos',
+                'ordering': ['-cutoff', '-archived_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='MovementOpeningBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ledger_quantity', models.DecimalField(decimal_places=4, default=0, max_digits=18)),
+                ('stock_quantity', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Saldo de apertura de movimientos',
+                'verbose_name_plural': 'Saldos de apertura de movimientos',
+            },
+        ),
+        migrations.AlterModelOptions(
+            name='productmovement',
+            options={'ordering': ['-fecha', '-id'], 'verbose_name': 'Movimiento de Producto', 'verbose_name_plural': 'Movimientos de Productos'},
+        ),
+        migrations.AddIndex(
+            model_name='productmovement',
+            index=models.Index(fields=['fecha', 'id'], name='movement_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movementarchivechunk',
+            index=models.Index(fields=['product_min', 'product_max'], name='movement_archive_product_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='movementarchivechunk',
+            constraint=models.UniqueConstraint(fields=('period', 'seq'), name='movement_archive_chunk_unique'),
+        ),
+        migrations.AddField(
+            model_name='movementopeningbalance',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='opening_balances', to='gestion.product'),
+        ),
+        migrations.AddField(
+            model_name='movementopeningbalance',
+            name='zone',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='opening_balances', to='gestion.zone'),
+        ),
+        migrations.AddConstraint(
+            model_name='movementopeningbalance',
+            constraint=models.UniqueConstraint(fields=('product', 'zone'), name='movement_opening_balance_unique'),
+        ),
+    ]
@@ -15,6 +15,14 @@ from .client import Client
 from .sale import Sale
 from .sale_item import SaleItem
 from .supplier_order import SupplierOrder, SupplierOrderItem
+from .sku_sequence import SkuSequence
+from .job import Job
+from .sales_rollup import SalesRollup, RollupWatermark
+from .abc_analysis import ProductABC, AbcRun
+from .inventory_snapshot import InventorySnapshot, InventorySnapshotRun
+from .inventory_lot import InventoryLot
+from .supplier_scorecard import SupplierScoreMonth, SupplierScorecardRun
+from .movement_archive import MovementArchiveChunk, MovementArchiveRun, MovementOpeningBalance
 
 
 __all__ = [
@@ -33,4 +41,18 @@ __all__ = [
     'SaleItem',
     'SupplierOrder',
     'SupplierOrderItem',
+    'SkuSequence',
+    'Job',
+    'SalesRollup',
+    'RollupWatermark',
+    'ProductABC',
+    'AbcRun',
+    'InventorySnapshot',
+    'InventorySnapshotRun',
+    'InventoryLot',
+    'SupplierScoreMonth',
+    'SupplierScorecardRun',
+    'MovementArchiveChunk',
+    'MovementArchiveRun',
+    'MovementOpeningBalance',
 ]
\ No newline at end of file
@@ -0,0 +1,57 @@
+# gestion/models/abc_analysis.py
+from django.db import models
+
+from .product import Product
+from .warehouse import Warehouse
+
+ABC_CLASSES = [('A', 'A'), ('B', 'B'), ('C', 'C')]
+
+
+class ProductABC(models.Model):
+    """
+    Clasificación ABC (Pareto) cacheada de un producto (ver gestion/abc_analysis.py).
+    warehouse=None es la clasificación global (ingresos y volumen, y dentro de
+    su categoría); con bodega es la clasificación por volumen en esa bodega.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='abc_rows')
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, null=True, blank=True, related_name='abc_rows')
+    categoria = models.CharField(max_length=100, blank=True, default='')
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    units = models.DecimalField(max_digits=18, decimal_places=4, default=0)
+    revenue_class = models.CharField(max_length=1, choices=ABC_CLASSES, blank=True, default='')
+    volume_class = models.CharField(max_length=1, choices=ABC_CLASSES, default='C')
+    category_revenue_class = models.CharField(max_length=1, choices=ABC_CLASSES, blank=True, default='')
+    category_volume_class = models.CharField(max_length=1, choices=ABC_CLASSES, blank=True, default='')
+
+    class Meta:
+        verbose_name = "Clasificación ABC"
+        verbose_name_plural = "Clasificaciones ABC"
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'warehouse'], name='product_abc_unique_product_warehouse'),
+        ]
+        indexes = [
+            models.Index(fields=['warehouse', 'revenue_class']),
+            models.Index(fields=['warehouse', 'volume_class']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} {self.warehouse_id or 'global'}: {self.revenue_class}/{self.volume_class}"
+
+
+class AbcRun(models.Model):
+    """Cálculo ABC realizado: ventana y marcas de agua para evitar recálculos sin cambios"""
+    computed_at = models.DateTimeField(auto_now_add=True)
+    date_from = models.DateField()
+    date_to = models.DateField()
+    last_sale_item_id = models.BigIntegerField(default=0)
+    last_movement_id = models.BigIntegerField(default=0)
+    products = models.PositiveIntegerField(default=0)
+    duration_ms = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-computed_at']
+        verbose_name = "Cálculo ABC"
+        verbose_name_plural = "Cálculos ABC"
+
+    def __str__(self):
+        return f"ABC {self.date_from} a {self.date_to} ({self.computed_at:%Y-%m-%d %H:%M})"
@@ -0,0 +1,42 @@
+# gestion/models/inventory_lot.py
+from django.db import models
+from django.db.models import Q
+
+from .product import Product
+from .zone import Zone
+
+
+class InventoryLot(models.Model):
+    """
+    Desglose por lote y vencimiento del stock de un producto en una zona (ver
+    gestion/lots.py). Inventory sigue siendo el total de (producto, zona): la
+    suma de los lotes nunca lo supera y la diferencia es stock sin lote.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='lots')
+    zone = models.ForeignKey(Zone, on_delete=models.CASCADE, related_name='lots')
+    lote = models.CharField(max_length=100, blank=True, default='')
+    fecha_vencimiento = models.DateField(null=True, blank=True)
+    quantity = models.PositiveIntegerField(default=0)
+    received_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Lote de inventario"
+        verbose_name_plural = "Lotes de inventario"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['product', 'zone', 'lote', 'fecha_vencimiento'], name='inventory_lot_unique',
+            ),
+        ]
+        indexes = [
+            # Asignación FEFO dentro de (producto, zona)
+            models.Index(fields=['product', 'zone', 'fecha_vencimiento'], name='inventory_lot_fefo_idx'),
+            # Lotes con stock por vencer (parcial: los lotes agotados no se recorren)
+            models.Index(
+                fields=['fecha_vencimiento', 'product'], condition=Q(quantity__gt=0),
+                name='inventory_lot_expiry_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}@{self.zone_id} lote {self.lote or '-'} ({self.fecha_vencimiento}): {self.quantity}"
@@ -0,0 +1,48 @@
+# gestion/models/inventory_snapshot.py
+from django.db import models
+
+from .product import Product
+from .zone import Zone
+
+
+class InventorySnapshot(models.Model):
+    """
+    Cantidad de un producto en una zona al tomar la foto del día (ver
+    gestion/inventory_snapshots.py). Solo se guardan las filas que cambiaron
+    respecto a la foto anterior: el stock de un día es la última fila de cada
+    (producto, zona) con fecha menor o igual.
+    """
+    date = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='snapshots')
+    zone = models.ForeignKey(Zone, on_delete=models.CASCADE, related_name='snapshots')
+    quantity = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Foto de inventario"
+        verbose_name_plural = "Fotos de inventario"
+        constraints = [
+            # También es el índice de "última foto de (producto, zona) hasta una fecha"
+            models.UniqueConstraint(fields=['product', 'zone', 'date'], name='inventory_snapshot_unique_day'),
+        ]
+        indexes = [
+            models.Index(fields=['date']),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.product_id}@{self.zone_id}: {self.quantity}"
+
+
+class InventorySnapshotRun(models.Model):
+    """Foto del inventario tomada en un día: hora exacta (los deltas se aplican desde ella) y conteos"""
+    date = models.DateField(unique=True)
+    taken_at = models.DateTimeField()
+    rows_written = models.PositiveIntegerField(default=0)
+    duration_ms = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-taken_at']
+        verbose_name = "Toma de foto de inventario"
+        verbose_name_plural = "Tomas de foto de inventario"
+
+    def __str__(self):
+        return f"{self.date} ({self.rows_written} filas)"
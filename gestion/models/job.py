@@ -0,0 +1,55 @@
+# gestion/models/job.py
+
+from django.db import models
+from django.contrib.auth.models import User
+
+
+class Job(models.Model):
+    """
+    Tarea en segundo plano (cola en base de datos, ver gestion/jobs.py).
+    El worker `manage.py run_jobs` toma las tareas pendientes y las ejecuta
+    fuera de los workers de gunicorn.
+    """
+    STATUS_PENDING = 'PENDING'
+    STATUS_RUNNING = 'RUNNING'
+    STATUS_SUCCEEDED = 'SUCCEEDED'
+    STATUS_FAILED = 'FAILED'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pendiente'),
+        (STATUS_RUNNING, 'En ejecución'),
+        (STATUS_SUCCEEDED, 'Completada'),
+        (STATUS_FAILED, 'Fallida'),
+    ]
+
+    name = models.CharField(max_length=100, help_text="Nombre de la tarea registrada")
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(help_text="No ejecutar antes de esta fecha (reintentos con backoff)")
+    progress = models.PositiveSmallIntegerField(default=0, help_text="Avance 0-100")
+    progress_message = models.CharField(max_length=255, blank=True, default='')
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+    worker = models.CharField(max_length=100, blank=True, default='', help_text="Worker que la ejecuta")
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Tarea"
+        verbose_name_plural = "Tareas"
+        indexes = [
+            models.Index(fields=['status', 'run_after']),
+            models.Index(fields=['created_by', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Tarea #{self.id} {self.name} ({self.get_status_display()})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_SUCCEEDED, self.STATUS_FAILED)
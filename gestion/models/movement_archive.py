@@ -0,0 +1,93 @@
+# gestion/models/movement_archive.py
+from django.db import models
+
+from .product import Product
+from .zone import Zone
+
+
+class MovementArchiveChunk(models.Model):
+    """
+    Bloque de movimientos archivados de un mes (ver gestion/movement_archive.py):
+    hasta MOVEMENT_ARCHIVE_CHUNK_ROWS filas ordenadas por (producto, fecha, id),
+    en JSON por línea comprimido con zlib. Los rangos de producto, fecha e id
+    permiten leer solo los bloques que pueden contener lo consultado.
+    """
+    period = models.DateField(help_text="Primer día del mes de los movimientos")
+    seq = models.PositiveIntegerField(default=0)
+    product_min = models.BigIntegerField()
+    product_max = models.BigIntegerField()
+    fecha_min = models.DateTimeField(null=True, blank=True)
+    fecha_max = models.DateTimeField(null=True, blank=True)
+    id_min = models.BigIntegerField()
+    id_max = models.BigIntegerField()
+    row_count = models.PositiveIntegerField(default=0)
+    raw_bytes = models.PositiveIntegerField(default=0, help_text="Tamaño sin comprimir")
+    data = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['period', 'seq']
+        verbose_name = "Bloque de movimientos archivados"
+        verbose_name_plural = "Bloques de movimientos archivados"
+        constraints = [
+            models.UniqueConstraint(fields=['period', 'seq'], name='movement_archive_chunk_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['product_min', 'product_max'], name='movement_archive_product_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.period:%Y-%m} #{self.seq} ({self.row_count} movimientos)"
+
+
+class MovementOpeningBalance(models.Model):
+    """
+    Saldo de apertura de un (producto, zona) al corte del último archivado:
+    - ledger_quantity: saldo del libro de movimientos (Kardex) con los
+      movimientos archivados, sin ventas.
+    - stock_quantity: stock real (con ventas) al momento desde el que se
+      puede consultar el stock a una fecha (MovementArchiveRun.stock_from).
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='opening_balances')
+    zone = models.ForeignKey(Zone, on_delete=models.CASCADE, related_name='opening_balances')
+    ledger_quantity = models.DecimalField(max_digits=18, decimal_places=4, default=0)
+    stock_quantity = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Saldo de apertura de movimientos"
+        verbose_name_plural = "Saldos de apertura de movimientos"
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'zone'], name='movement_opening_balance_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}@{self.zone_id}: {self.ledger_quantity}"
+
+
+class MovementArchiveRun(models.Model):
+    """
+    Archivado de movimientos: corte (los movimientos con fecha anterior están
+    archivados y el período queda cerrado), desde cuándo vale el stock a una
+    fecha y conteos. El último define el corte vigente.
+    """
+    cutoff = models.DateTimeField(help_text="Inicio del primer mes que sigue en la tabla de movimientos")
+    stock_from = models.DateTimeField(help_text="Momento del saldo de apertura de stock (stock a una fecha desde aquí)")
+    archived_at = models.DateTimeField(auto_now_add=True)
+    rows_archived = models.PositiveIntegerField(default=0)
+    chunks_written = models.PositiveIntegerField(default=0)
+    raw_bytes = models.BigIntegerField(default=0)
+    compressed_bytes = models.BigIntegerField(default=0)
+    duration_ms = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-cutoff', '-archived_at']
+        verbose_name = "Archivado de movimientos"
+        verbose_name_plural = "Archivados de movimientos"
+
+    @classmethod
+    def current(cls, using=None):
+        """Archivado vigente (el de corte más reciente) o None si nunca se archivó"""
+        return cls.objects.using(using).first()
+
+    def __str__(self):
+        return f"Corte {self.cutoff:%Y-%m-%d} ({self.rows_archived} movimientos)"
@@ -3,6 +3,8 @@ from django.db import models
 from django.db.models import Sum, Q
 from django.core.validators import MinValueValidator
 
+from .sku_sequence import SkuSequence
+
 class Product(models.Model):
     """
     Modelo de Producto según especificación del proyecto Lili's
@@ -179,29 +181,12 @@ class Product(models.Model):
         return f"{self.name} ({self.sku})"
     
     def save(self, *args, **kwargs):
-        # Generar SKU automáticamente si no se proporciona
+        # Generar SKU automáticamente si no se proporciona (PROD-XXXX).
+        # El contador SkuSequence lo asigna en una sola sentencia, seguro con escritores concurrentes.
         if not self.sku:
-            # Obtener el último número de producto
-            last_product = Product.objects.order_by('-id').first()
-            if last_product:
-                # Intentar extraer el número del último SKU
-                try:
-                    last_number = int(last_product.sku.split('-')[-1]) if '-' in last_product.sku else 0
-                except (ValueError, AttributeError):
-                    last_number = 0
-                next_number = last_number + 1
-            else:
-                next_number = 1
-            
-            # Generar SKU con formato PROD-XXXX
-            self.sku = f"PROD-{next_number:04d}"
-            
-            # Asegurar que el SKU sea único
-            counter = 1
-            original_sku = self.sku
-            while Product.objects.filter(sku=self.sku).exclude(pk=self.pk).exists():
-                self.sku = f"{original_sku}-{counter}"
-                counter += 1
+            self.sku = SkuSequence.next_sku()
+        elif self._state.adding:
+            SkuSequence.advance_past([self.sku])
         
         super().save(*args, **kwargs)
     
@@ -221,6 +206,12 @@ class Product(models.Model):
     @property
     def total_quantity(self):
         """Stock actual total (calculado desde Inventory)"""
+        # Anotado por el queryset (stock_alerts.annotate_stock) o desde el prefetch de stock
+        annotated = self.__dict__.get('total_stock')
+        if annotated is not None:
+            return annotated
+        if 'stock' in getattr(self, '_prefetched_objects_cache', {}):
+            return sum(item.quantity for item in self.stock.all())
         result = self.stock.aggregate(total=Sum('quantity'))
         return result['total'] or 0
     
@@ -241,8 +232,12 @@ class Product(models.Model):
         """Indica si hay productos próximos a vencer (si es perecedero)"""
         if not self.perishable:
             return False
-        # TODO: Implementar lógica cuando se agregue el modelo de lotes con fechas
-        return False
+        # Anotado por ProductViewSet (Exists sobre InventoryLot) o una consulta al índice de vencimientos
+        annotated = self.__dict__.get('expiring_soon')
+        if annotated is not None:
+            return annotated
+        from ..lots import expiring_filter
+        return self.lots.filter(expiring_filter()).exists()
     
     def get_punto_reorden_efectivo(self):
         """Retorna el punto de reorden efectivo (punto_reorden o stock_minimo)"""
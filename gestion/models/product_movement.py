@@ -129,7 +129,8 @@ class ProductMovement(models.Model):
         help_text="Usuario que realizó el movimiento"
     )
     
-    # Compatibilidad con campos antiguos
+    # Compatibilidad con campos antiguos: ya no se escriben (la API los expone desde
+    # tipo, cantidad, fecha y motivo); solo los movimientos antiguos los tienen
     movement_type = models.CharField(
         max_length=20,
         blank=True,
@@ -159,19 +160,15 @@ class ProductMovement(models.Model):
         tipo_display = self.get_tipo_display()
         return f"{tipo_display} - {self.product.name} ({self.cantidad})"
     
-    def save(self, *args, **kwargs):
-        # Mantener compatibilidad con campos antiguos
-        if not self.movement_type:
-            self.movement_type = self.tipo
-        if not self.movement_date:
-            self.movement_date = self.fecha
-        if not self.quantity and self.cantidad:
-            self.quantity = int(self.cantidad)
-        if not self.reason:
-            self.reason = self.motivo
-        super().save(*args, **kwargs)
-    
     class Meta:
         verbose_name = "Movimiento de Producto"
         verbose_name_plural = "Movimientos de Productos"
-        ordering = ['-fecha', '-created_at']
+        ordering = ['-fecha', '-id']
+        indexes = [
+            # Listado: movimientos más recientes primero (recorrido inverso del índice)
+            models.Index(fields=['fecha', 'id'], name='movement_fecha_idx'),
+            # Kardex y saldos históricos: movimientos de un producto en orden cronológico
+            models.Index(fields=['product', 'fecha', 'id'], name='movement_product_fecha_idx'),
+            # Stock a una fecha: movimientos aplicados después de la última foto de inventario
+            models.Index(fields=['created_at'], name='movement_created_at_idx'),
+        ]
@@ -0,0 +1,46 @@
+# gestion/models/sales_rollup.py
+from django.db import models
+
+
+class SalesRollup(models.Model):
+    """
+    Ventas agregadas por día y dimensión (ver gestion/sales_rollups.py).
+    Una fila por (dimensión, fecha, clave): la clave es el id del producto,
+    usuario o cliente, el nombre de la categoría, o '' para el total del día.
+    """
+    DIMENSION_CHOICES = [
+        ('day', 'Día'),
+        ('product', 'Producto'),
+        ('category', 'Categoría'),
+        ('user', 'Vendedor'),
+        ('client', 'Cliente'),
+    ]
+
+    dimension = models.CharField(max_length=10, choices=DIMENSION_CHOICES)
+    date = models.DateField()
+    key = models.CharField(max_length=100, blank=True, default='')
+    # Enteros con signo: al eliminar una venta se aplican deltas negativos (upsert)
+    sales = models.IntegerField(default=0, help_text="Ventas (boletas) que incluyen la clave")
+    units = models.BigIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = "Resumen de ventas"
+        verbose_name_plural = "Resúmenes de ventas"
+        constraints = [
+            # También es el índice de las consultas por dimensión y rango de fechas
+            models.UniqueConstraint(fields=['dimension', 'date', 'key'], name='sales_rollup_unique_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.dimension} {self.date} {self.key}: {self.revenue}"
+
+
+class RollupWatermark(models.Model):
+    """Último día recalculado por el proceso de catch-up de cada resumen"""
+    name = models.CharField(max_length=50, primary_key=True)
+    last_date = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.last_date}"
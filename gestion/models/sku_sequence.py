@@ -0,0 +1,96 @@
+# gestion/models/sku_sequence.py
+import re
+
+from django.db import IntegrityError, connections, models, router, transaction
+from django.db.models import F
+
+SKU_PREFIX = 'PROD'
+
+
+class SkuSequence(models.Model):
+    """
+    Contador de SKU por prefijo (PROD-0001, PROD-0002, ...).
+
+    Reservar números es una sola sentencia atómica
+    (UPDATE ... SET last_value = last_value + n RETURNING last_value): el lock de
+    la fila serializa a los escritores concurrentes y un rango completo se
+    reserva de una vez para importaciones masivas.
+    """
+    prefix = models.CharField(max_length=20, primary_key=True)
+    last_value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.prefix}: {self.last_value}"
+
+    class Meta:
+        verbose_name = "Secuencia de SKU"
+        verbose_name_plural = "Secuencias de SKU"
+
+    @staticmethod
+    def format(number, prefix=SKU_PREFIX):
+        return f"{prefix}-{number:04d}"
+
+    @staticmethod
+    def parse(sku, prefix=SKU_PREFIX):
+        """Número de un SKU generado (PROD-0042 → 42), o None si no sigue el formato"""
+        match = re.fullmatch(rf'{re.escape(prefix)}-(\d+)', sku or '')
+        return int(match.group(1)) if match else None
+
+    @classmethod
+    def reserve(cls, count=1, prefix=SKU_PREFIX):
+        """Reserva `count` números consecutivos y retorna el range reservado"""
+        using = router.db_for_write(cls)
+        connection = connections[using]
+        table = connection.ops.quote_name(cls._meta.db_table)
+        for _ in range(2):
+            if connection.vendor in ('postgresql', 'sqlite'):
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f'UPDATE {table} SET last_value = last_value + %s WHERE prefix = %s RETURNING last_value',
+                        [count, prefix],
+                    )
+                    row = cursor.fetchone()
+                last_value = row[0] if row else None
+            else:
+                with transaction.atomic(using=using):
+                    updated = cls.objects.using(using).filter(prefix=prefix).update(last_value=F('last_value') + count)
+                    last_value = cls.objects.using(using).get(prefix=prefix).last_value if updated else None
+            if last_value is not None:
+                return range(last_value - count + 1, last_value + 1)
+            cls._initialize(prefix, using)
+        raise RuntimeError(f'No se pudo reservar SKU para el prefijo {prefix}')
+
+    @classmethod
+    def next_sku(cls, prefix=SKU_PREFIX):
+        return cls.format(cls.reserve(1, prefix)[0], prefix)
+
+    @classmethod
+    def reserve_skus(cls, count, prefix=SKU_PREFIX):
+        return [cls.format(number, prefix) for number in cls.reserve(count, prefix)]
+
+    @classmethod
+    def advance_past(cls, skus, prefix=SKU_PREFIX):
+        """
+        Adelanta el contador si se guardaron SKU explícitos con el formato generado
+        (ej. PROD-5000 ingresado a mano), para que no se vuelvan a generar.
+        """
+        numbers = [number for number in (cls.parse(sku, prefix) for sku in skus) if number is not None]
+        if numbers:
+            highest = max(numbers)
+            using = router.db_for_write(cls)
+            cls.objects.using(using).filter(prefix=prefix, last_value__lt=highest).update(last_value=highest)
+
+    @classmethod
+    def _initialize(cls, prefix, using):
+        """Crea el contador a partir del mayor SKU existente con el formato del prefijo"""
+        from .product import Product
+
+        skus = Product.objects.using(using).filter(sku__startswith=f'{prefix}-').values_list('sku', flat=True)
+        numbers = (cls.parse(sku, prefix) for sku in skus.iterator())
+        last_value = max((number for number in numbers if number is not None), default=0)
+        try:
+            with transaction.atomic(using=using):
+                cls.objects.using(using).create(prefix=prefix, last_value=last_value)
+        except IntegrityError:
+            # Otro proceso lo creó primero
+            pass
@@ -11,6 +11,7 @@ class SupplierOrder(models.Model):
     Orden de compra/pedido a un proveedor.
     """
     STATUS_CHOICES = [
+        ('DRAFT', 'Borrador'),
         ('PENDING', 'Pendiente'),
         ('RECEIVED', 'Recibida'),
         ('CANCELLED', 'Cancelada'),
@@ -25,14 +26,22 @@ class SupplierOrder(models.Model):
                                      related_name='supplier_orders',
                                      help_text="Usuario que realizó la solicitud")
     order_date = models.DateTimeField(auto_now_add=True)
+    expected_delivery_date = models.DateField(null=True, blank=True,
+                                              help_text="Fecha estimada de entrega (según lead time del proveedor)")
     received_date = models.DateTimeField(null=True, blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
     notes = models.TextField(blank=True, null=True, help_text="Notas adicionales")
+    # Marca de agua de la actualización incremental del scorecard de proveedores
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-order_date']
         verbose_name = "Orden a Proveedor"
         verbose_name_plural = "Órdenes a Proveedores"
+        indexes = [
+            models.Index(fields=['updated_at']),
+            models.Index(fields=['supplier', 'order_date']),
+        ]
 
     def __str__(self):
         supplier_name = self.supplier.razon_social or self.supplier.nombre_fantasia or 'N/A'
@@ -57,6 +66,8 @@ class SupplierOrderItem(models.Model):
     order = models.ForeignKey(SupplierOrder, on_delete=models.CASCADE, related_name='items')
     product = models.ForeignKey('Product', on_delete=models.CASCADE, related_name='supplier_order_items')
     quantity = models.PositiveIntegerField(help_text="Cantidad solicitada")
+    received_quantity = models.PositiveIntegerField(null=True, blank=True,
+                                                    help_text="Cantidad recibida (al recibir la orden)")
     unit_price = models.DecimalField(max_digits=10, decimal_places=2, default=0.00, 
                                      help_text="Precio unitario (se toma del producto)")
     
@@ -0,0 +1,55 @@
+# gestion/models/supplier_scorecard.py
+from django.db import models
+
+from .supplier import Supplier
+
+
+class SupplierScoreMonth(models.Model):
+    """
+    Desempeño de un proveedor en las órdenes emitidas en un mes (ver
+    gestion/supplier_scorecard.py). Solo guarda conteos y sumas, así los
+    indicadores de cualquier rango de meses se obtienen sumando filas.
+    Las órdenes en borrador no cuentan.
+    """
+    supplier = models.ForeignKey(Supplier, on_delete=models.CASCADE, related_name='score_months')
+    month = models.DateField(help_text="Primer día del mes de emisión de las órdenes")
+    orders = models.PositiveIntegerField(default=0)
+    received_orders = models.PositiveIntegerField(default=0)
+    cancelled_orders = models.PositiveIntegerField(default=0)
+    # Recibidas con fecha estimada de entrega y, de ellas, las recibidas a tiempo
+    orders_with_expected = models.PositiveIntegerField(default=0)
+    on_time_orders = models.PositiveIntegerField(default=0)
+    lead_time_days_total = models.DecimalField(max_digits=14, decimal_places=4, default=0)
+    units_ordered = models.BigIntegerField(default=0, help_text="Unidades pedidas en las órdenes recibidas")
+    units_received = models.BigIntegerField(default=0)
+    spend = models.DecimalField(max_digits=16, decimal_places=2, default=0, help_text="Valor recibido")
+
+    class Meta:
+        verbose_name = "Desempeño mensual de proveedor"
+        verbose_name_plural = "Desempeño mensual de proveedores"
+        constraints = [
+            models.UniqueConstraint(fields=['supplier', 'month'], name='supplier_score_month_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['month']),
+        ]
+
+    def __str__(self):
+        return f"{self.supplier_id} {self.month:%Y-%m}: {self.orders} órdenes"
+
+
+class SupplierScorecardRun(models.Model):
+    """Actualización del scorecard: marca de agua (SupplierOrder.updated_at) y meses recalculados"""
+    refreshed_at = models.DateTimeField(auto_now_add=True)
+    last_updated_at = models.DateTimeField(null=True, blank=True)
+    full = models.BooleanField(default=False)
+    rows_written = models.PositiveIntegerField(default=0)
+    duration_ms = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-refreshed_at']
+        verbose_name = "Actualización de scorecard de proveedores"
+        verbose_name_plural = "Actualizaciones de scorecard de proveedores"
+
+    def __str__(self):
+        return f"Scorecard {self.refreshed_at:%Y-%m-%d %H:%M} ({'completo' if self.full else 'incremental'})"
@@ -0,0 +1,254 @@
+# gestion/movement_archive.py
+"""
+Archivado mensual del libro de movimientos (ProductMovement).
+
+La tabla de movimientos conserva solo los meses recientes
+(MOVEMENT_ARCHIVE_MONTHS). archive() cierra los meses anteriores al corte:
+- Los movimientos pasan a MovementArchiveChunk: por mes, bloques de hasta
+  MOVEMENT_ARCHIVE_CHUNK_ROWS filas ordenadas por (producto, fecha, id), en
+  JSON por línea comprimido con zlib, con los nombres de producto, zonas,
+  proveedor y usuario al momento de archivar (el bloque se lee solo).
+- MovementOpeningBalance guarda por (producto, zona) el saldo del libro al
+  corte (entrada 'apertura' del Kardex, ver stock_ledger.py) y el stock real
+  al momento desde el que vale el stock a una fecha (inventory_snapshots.py).
+- Los movimientos archivados se eliminan de la tabla con un solo DELETE
+  (ningún modelo referencia ProductMovement).
+
+Los períodos cerrados no admiten movimientos nuevos (ProductMovementForm) y
+se consultan con archived_movements(), que descomprime solo los bloques cuyo
+rango de producto y fecha puede contener lo pedido.
+"""
+import json
+import time
+import zlib
+from datetime import datetime
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, router, transaction
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .inventory_snapshots import stock_as_of, take_snapshot
+from .models import (
+    InventorySnapshotRun, MovementArchiveChunk, MovementArchiveRun, MovementOpeningBalance, ProductMovement,
+)
+from .stock_ledger import entries_sql, to_decimal
+
+# Meses que quedan en la tabla de movimientos (el mes en curso cuenta)
+ARCHIVE_MONTHS = getattr(settings, 'MOVEMENT_ARCHIVE_MONTHS', 24)
+CHUNK_ROWS = getattr(settings, 'MOVEMENT_ARCHIVE_CHUNK_ROWS', 5000)
+COMPRESSION_LEVEL = 6
+BATCH_SIZE = 2000
+
+# Clave en el archivo -> lookup (mismas claves que ProductMovementSerializer)
+ROW_FIELDS = {
+    'id': 'id', 'fecha': 'fecha', 'tipo': 'tipo', 'cantidad': 'cantidad',
+    'product': 'product_id', 'product_sku': 'product__sku', 'product_name': 'product__name',
+    'origin_zone': 'origin_zone_id', 'origin_zone_name': 'origin_zone__name',
+    'destination_zone': 'destination_zone_id', 'destination_zone_name': 'destination_zone__name',
+    'supplier': 'supplier_id', 'supplier_name': 'supplier__razon_social',
+    'warehouse': 'warehouse_id', 'warehouse_name': 'warehouse__name',
+    'lote': 'lote', 'serie': 'serie', 'fecha_vencimiento': 'fecha_vencimiento',
+    'doc_referencia': 'doc_referencia', 'motivo': 'motivo', 'observaciones': 'observaciones',
+    'performed_by': 'performed_by_id', 'user_name': 'performed_by__username',
+    'created_at': 'created_at', 'updated_at': 'updated_at',
+}
+
+
+def cutoff_for(months=None):
+    """Inicio (hora local) del mes más antiguo que se conserva: el corte del archivado"""
+    months = ARCHIVE_MONTHS if months is None else months
+    today = timezone.localdate()
+    total = today.year * 12 + today.month - 1 - (months - 1)
+    return timezone.make_aware(datetime(total // 12, total % 12 + 1, 1))
+
+
+def _next_month(moment):
+    return moment.replace(year=moment.year + moment.month // 12, month=moment.month % 12 + 1)
+
+
+def _archivable(cutoff):
+    """Movimientos anteriores al corte (por fecha; los sin fecha, por created_at)"""
+    return Q(fecha__lt=cutoff) | Q(fecha__isnull=True, created_at__lt=cutoff)
+
+
+def pending(cutoff):
+    """[(mes, movimientos)] que archivaría archive(cutoff)"""
+    return [
+        (row['month'], row['count'])
+        for row in ProductMovement.objects.filter(_archivable(cutoff)).annotate(
+            month=TruncMonth(Coalesce('fecha', 'created_at')),
+        ).values('month').annotate(
+            count=Count('id'),
+        ).order_by('month')
+    ]
+
+
+# ==================== ARCHIVADO ====================
+def _ledger_balances(cutoff, last_id, using):
+    """Saldo del libro por (producto, zona): apertura vigente + movimientos a archivar en orden del Kardex"""
+    balances = {
+        (product_id, zone_id): quantity
+        for product_id, zone_id, quantity in MovementOpeningBalance.objects.using(using).values_list(
+            'product_id', 'zone_id', 'ledger_quantity',
+        )
+    }
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    adapt = connection.ops.adapt_datetimefield_value
+    # Misma condición que _archivable()
+    where = (
+        f"m.{qn('id')} <= %s AND (m.{qn('fecha')} < %s "
+        f"OR (m.{qn('fecha')} IS NULL AND m.{qn('created_at')} < %s))"
+    )
+    sql = f"SELECT product_id, zone_id, delta, is_set FROM ({entries_sql(connection, where)}) e ORDER BY fecha, id, leg"
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [last_id, adapt(cutoff), adapt(cutoff)])
+        while True:
+            rows = cursor.fetchmany(BATCH_SIZE)
+            if not rows:
+                break
+            for product_id, zone_id, delta, is_set in rows:
+                key = (product_id, zone_id)
+                delta = to_decimal(delta)
+                balances[key] = delta if is_set else balances.get(key, 0) + delta
+    return balances
+
+
+def _write_chunks(movements, month, seq):
+    """Bloques comprimidos del mes. Retorna (bloques, filas, bytes sin comprimir, bytes comprimidos)"""
+    rows = movements.annotate(moment=Coalesce('fecha', 'created_at')).filter(
+        moment__gte=month, moment__lt=_next_month(month),
+    ).order_by(
+        'product_id', 'fecha', 'id',
+    ).values(*ROW_FIELDS.values())
+    chunks, totals = [], [0, 0, 0]
+
+    def flush(batch):
+        raw = '\n'.join(json.dumps(row, cls=DjangoJSONEncoder, separators=(',', ':')) for row in batch).encode()
+        data = zlib.compress(raw, COMPRESSION_LEVEL)
+        dates = [row['fecha'] for row in batch if row['fecha'] is not None]
+        chunks.append(MovementArchiveChunk(
+            period=month.date(), seq=seq + len(chunks),
+            product_min=batch[0]['product'], product_max=batch[-1]['product'],
+            fecha_min=min(dates, default=None), fecha_max=max(dates, default=None),
+            id_min=min(row['id'] for row in batch), id_max=max(row['id'] for row in batch),
+            row_count=len(batch), raw_bytes=len(raw), data=data,
+        ))
+        totals[0] += len(batch)
+        totals[1] += len(raw)
+        totals[2] += len(data)
+
+    batch = []
+    for row in rows.iterator(chunk_size=BATCH_SIZE):
+        batch.append({key: row[lookup] for key, lookup in ROW_FIELDS.items()})
+        if len(batch) >= CHUNK_ROWS:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+    MovementArchiveChunk.objects.bulk_create(chunks, batch_size=50)
+    return len(chunks), *totals
+
+
+def archive(cutoff):
+    """
+    Archiva los movimientos anteriores al corte (inicio de un mes). Retorna
+    (MovementArchiveRun, archivado); no hace nada si el corte no avanza.
+    """
+    started = time.monotonic()
+    using = router.db_for_write(ProductMovement)
+    current = MovementArchiveRun.current(using)
+    if current is not None and cutoff <= current.cutoff:
+        return current, False
+
+    with transaction.atomic(using=using):
+        # Los movimientos creados durante el archivado quedan en la tabla
+        last_id = ProductMovement.objects.using(using).aggregate(last=Max('id'))['last'] or 0
+        movements = ProductMovement.objects.using(using).filter(_archivable(cutoff), id__lte=last_id)
+        # El stock a una fecha vale desde que se aplicó el último movimiento archivado
+        last_applied = movements.aggregate(last=Max(Coalesce('created_at', 'fecha')))['last']
+        stock_from = max(cutoff, last_applied) if last_applied else cutoff
+        if current is not None:
+            stock_from = max(stock_from, current.stock_from)
+        else:
+            # El primer archivado parte de una foto real del inventario (ver inventory_snapshots.py)
+            first = InventorySnapshotRun.objects.using(using).order_by('taken_at').first() or take_snapshot()
+            stock_from = max(stock_from, first.taken_at)
+
+        stock, _ = stock_as_of(stock_from, using=using)
+        ledger = _ledger_balances(cutoff, last_id, using)
+
+        chunks_written = rows_archived = raw_bytes = compressed_bytes = 0
+        for month, _ in pending(cutoff):
+            seq = MovementArchiveChunk.objects.using(using).filter(period=month.date()).aggregate(
+                last=Max('seq'),
+            )['last']
+            written, rows, raw, compressed = _write_chunks(movements, month, 0 if seq is None else seq + 1)
+            chunks_written += written
+            rows_archived += rows
+            raw_bytes += raw
+            compressed_bytes += compressed
+
+        MovementOpeningBalance.objects.using(using).all().delete()
+        MovementOpeningBalance.objects.using(using).bulk_create([
+            MovementOpeningBalance(
+                product_id=product_id, zone_id=zone_id,
+                ledger_quantity=ledger.get((product_id, zone_id), 0),
+                stock_quantity=stock.get((product_id, zone_id), 0),
+            )
+            for product_id, zone_id in set(ledger) | set(stock)
+            if ledger.get((product_id, zone_id)) or stock.get((product_id, zone_id))
+        ], batch_size=BATCH_SIZE)
+
+        # Sin modelos que lo referencien ni señales, Django lo ejecuta como un solo DELETE
+        movements.delete()
+
+        run = MovementArchiveRun.objects.using(using).create(
+            cutoff=cutoff, stock_from=stock_from, rows_archived=rows_archived,
+            chunks_written=chunks_written, raw_bytes=raw_bytes, compressed_bytes=compressed_bytes,
+            duration_ms=int((time.monotonic() - started) * 1000),
+        )
+    return run, True
+
+
+# ==================== CONSULTAS ====================
+def archived_periods():
+    """Meses archivados con sus bloques, movimientos y tamaño sin comprimir"""
+    return list(
+        MovementArchiveChunk.objects.values('period').annotate(
+            chunks=Count('id'), movements=Sum('row_count'), raw_bytes=Sum('raw_bytes'),
+        ).order_by('-period')
+    )
+
+
+def archived_movements(period=None, product_id=None, tipo=None, date_from=None, date_to=None):
+    """
+    Itera los movimientos archivados (dicts con las claves de la API) que
+    cumplen los filtros; date_from / date_to son datetimes (date_to exclusivo).
+    """
+    chunks = MovementArchiveChunk.objects.all()
+    if period:
+        chunks = chunks.filter(period=period)
+    if product_id:
+        chunks = chunks.filter(product_min__lte=product_id, product_max__gte=product_id)
+    if date_from:
+        chunks = chunks.filter(Q(fecha_max__gte=date_from) | Q(fecha_max__isnull=True))
+    if date_to:
+        chunks = chunks.filter(Q(fecha_min__lt=date_to) | Q(fecha_min__isnull=True))
+
+    for data in chunks.order_by('period', 'seq').values_list('data', flat=True).iterator(chunk_size=10):
+        for line in zlib.decompress(bytes(data)).splitlines():
+            row = json.loads(line)
+            if product_id and row['product'] != product_id:
+                continue
+            if tipo and row['tipo'] != tipo:
+                continue
+            if date_from or date_to:
+                fecha = parse_datetime(row['fecha']) if row['fecha'] else None
+                if fecha is None or (date_from and fecha < date_from) or (date_to and fecha >= date_to):
+                    continue
+            yield row
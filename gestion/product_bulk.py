@@ -0,0 +1,191 @@
+# gestion/product_bulk.py
+"""
+Operaciones masivas sobre productos (POST /api/products/bulk/).
+
+Cada operación es {"op": "update" | "create" | "deactivate", "id" o "sku", "data": {...}}.
+Todo el lote se valida en una pasada con BulkProductForm (las mismas reglas
+que ProductForm) y se escribe con un número fijo de consultas:
+- 1 consulta para cargar los productos referenciados (por id o SKU)
+- 1 consulta para validar EAN/UPC y SKU contra otros productos
+- bulk_update solo de los campos que cambiaron, bulk_create para las altas y
+  un UPDATE para las desactivaciones
+"""
+from django.db import transaction
+from django.db.models import Q
+from django.forms.models import model_to_dict
+from django.utils import timezone
+
+from .forms.product_forms import BulkProductForm
+from .models import Product, SkuSequence
+from .product_import import MODEL_DEFAULTS
+
+BULK_MAX_OPERATIONS = 1000
+BULK_BATCH_SIZE = 500
+OPERATIONS = ('update', 'create', 'deactivate')
+FORM_FIELDS = [name for name in BulkProductForm.Meta.fields if name != 'sku']
+
+
+def _lookup_key(item):
+    if item.get('id') not in (None, ''):
+        return ('id', str(item['id']))
+    if item.get('sku'):
+        return ('sku', str(item['sku']))
+    return None
+
+
+def apply_bulk_operations(operations, atomic=False):
+    """
+    Valida y aplica las operaciones. Retorna (resultados por ítem, resumen).
+    Con atomic=True no se escribe nada si alguna operación tiene errores.
+    """
+    results = [None] * len(operations)
+    summary = {'created': 0, 'updated': 0, 'unchanged': 0, 'deactivated': 0, 'failed': 0}
+
+    def fail(index, errors):
+        results[index] = {'index': index, 'status': 'error', 'errors': errors}
+        summary['failed'] += 1
+
+    # 1. Estructura de cada operación y productos referenciados (una consulta)
+    pending = []
+    ids, skus = set(), set()
+    for index, item in enumerate(operations):
+        if not isinstance(item, dict) or item.get('op') not in OPERATIONS:
+            fail(index, {'op': [f'Operación inválida (use {", ".join(OPERATIONS)})']})
+            continue
+        data = item.get('data') or {}
+        if not isinstance(data, dict):
+            fail(index, {'data': ['Debe ser un objeto']})
+            continue
+        key = _lookup_key(item) if item['op'] != 'create' else None
+        if item['op'] != 'create':
+            if key is None:
+                fail(index, {'id': ['Debe indicar id o sku']})
+                continue
+            (ids if key[0] == 'id' else skus).add(key[1])
+        pending.append((index, item['op'], key, data))
+
+    products = {}
+    if ids or skus:
+        valid_ids = [value for value in ids if value.isdigit()]
+        for product in Product.objects.filter(Q(id__in=valid_ids) | Q(sku__in=skus)):
+            products[('id', str(product.id))] = product
+            products[('sku', product.sku)] = product
+
+    # 2. Validación con el formulario (una instancia reutilizada)
+    form = BulkProductForm()
+    updates, creates, deactivations = [], [], []
+    touched, create_skus = set(), set()
+    for index, op, key, data in pending:
+        product = products.get(key) if key else None
+        if op != 'create':
+            if product is None:
+                fail(index, {'id': ['Producto no encontrado']})
+                continue
+            if product.pk in touched:
+                fail(index, {'id': ['El producto aparece más de una vez en el lote']})
+                continue
+            touched.add(product.pk)
+
+        if op == 'deactivate':
+            deactivations.append((index, product))
+            continue
+
+        unknown = sorted(set(data) - set(FORM_FIELDS) - ({'sku'} if op == 'create' else set()))
+        if unknown:
+            fail(index, {name: ['Campo no editable'] for name in unknown})
+            continue
+
+        if op == 'update':
+            original = model_to_dict(product, fields=BulkProductForm.Meta.fields)
+            form.bind({**original, **data}, instance=product)
+        else:
+            form.bind({**MODEL_DEFAULTS, **data})
+        if not form.is_valid():
+            fail(index, {field: list(errors) for field, errors in form.errors.items()})
+            continue
+
+        if op == 'update':
+            # construct_instance ya aplicó los valores validados sobre `product`
+            changed = [name for name in data if getattr(product, name) != original[name]]
+            updates.append((index, product, changed))
+        else:
+            product = form.instance
+            product.sku = (data.get('sku') or '').strip()
+            product.ean_upc = product.ean_upc or None
+            if product.sku and product.sku in create_skus:
+                fail(index, {'sku': ['SKU repetido en el lote']})
+                continue
+            create_skus.add(product.sku)
+            creates.append((index, product))
+
+    # 3. EAN/UPC y SKU contra el resto del catálogo (una consulta)
+    written_eans = {}
+    for index, product, *_ in updates + creates:
+        if product.ean_upc:
+            written_eans.setdefault(product.ean_upc, []).append((index, product))
+    new_skus = {product.sku: index for index, product in creates if product.sku}
+    if written_eans or new_skus:
+        conflicts = Product.objects.filter(
+            Q(ean_upc__in=list(written_eans)) | Q(sku__in=list(new_skus))
+        ).values_list('id', 'sku', 'ean_upc')
+        failed = set()
+        for product_id, sku, ean in conflicts:
+            if sku in new_skus:
+                failed.add(new_skus[sku])
+                fail(new_skus[sku], {'sku': ['Ya existe un producto con este SKU']})
+            for index, product in written_eans.get(ean, []):
+                if product.pk != product_id and index not in failed:
+                    failed.add(index)
+                    fail(index, {'ean_upc': [f'El EAN/UPC ya está asignado al producto {sku}']})
+        for ean, owners in written_eans.items():
+            for index, product in owners[1:]:
+                if index not in failed:
+                    failed.add(index)
+                    fail(index, {'ean_upc': ['EAN/UPC repetido en el lote']})
+        updates = [entry for entry in updates if entry[0] not in failed]
+        creates = [entry for entry in creates if entry[0] not in failed]
+
+    if atomic and summary['failed']:
+        for entry in updates + creates + deactivations:
+            results[entry[0]] = {'index': entry[0], 'status': 'skipped'}
+        return results, summary
+
+    # 4. Escritura
+    now = timezone.now()
+    with transaction.atomic():
+        changed_products, changed_fields = [], set()
+        for index, product, changed in updates:
+            status = 'updated' if changed else 'unchanged'
+            if changed:
+                product.updated_at = now
+                changed_products.append(product)
+                changed_fields.update(changed)
+            summary[status] += 1
+            results[index] = {'index': index, 'status': status, 'id': product.pk, 'sku': product.sku, 'changed': changed}
+        if changed_products:
+            Product.objects.bulk_update(changed_products, sorted(changed_fields) + ['updated_at'], batch_size=BULK_BATCH_SIZE)
+
+        if creates:
+            new_products = [product for _, product in creates]
+            SkuSequence.advance_past([product.sku for product in new_products if product.sku])
+            missing = [product for product in new_products if not product.sku]
+            if missing:
+                for product, sku in zip(missing, SkuSequence.reserve_skus(len(missing))):
+                    product.sku = sku
+            Product.objects.bulk_create(new_products, batch_size=BULK_BATCH_SIZE)
+            # PostgreSQL y SQLite retornan los ids; en otros motores se resuelven por SKU
+            if any(product.pk is None for product in new_products):
+                created_ids = dict(Product.objects.filter(sku__in=[p.sku for p in new_products]).values_list('sku', 'id'))
+                for product in new_products:
+                    product.pk = created_ids.get(product.sku)
+            for index, product in creates:
+                summary['created'] += 1
+                results[index] = {'index': index, 'status': 'created', 'id': product.pk, 'sku': product.sku}
+
+        if deactivations:
+            Product.objects.filter(pk__in=[product.pk for _, product in deactivations]).update(is_active=False, updated_at=now)
+            for index, product in deactivations:
+                summary['deactivated'] += 1
+                results[index] = {'index': index, 'status': 'deactivated', 'id': product.pk, 'sku': product.sku}
+
+    return results, summary
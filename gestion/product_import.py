@@ -0,0 +1,251 @@
+# gestion/product_import.py
+"""
+Importación masiva de productos desde CSV/XLSX.
+
+El archivo se lee en streaming (csv / openpyxl read-only) y se procesa por
+bloques de `chunk_size` filas:
+1. Los productos existentes del bloque se cargan con una consulta (por SKU)
+   y cada fila se valida con las reglas de ProductForm sobre sus valores
+   actuales: un archivo parcial (sku,precio_venta) solo cambia esas columnas.
+2. Los EAN del bloque se resuelven con una sola consulta (duplicados en el
+   archivo y EAN usados por otro producto).
+3. Se hace upsert por SKU con bulk_create(update_conflicts=True). En las
+   filas existentes solo se actualizan las columnas presentes en el archivo.
+
+Los encabezados aceptan el nombre del campo (sku, precio_venta) o el de la
+exportación (SKU, Precio venta), así que una exportación se puede reimportar.
+"""
+import csv
+import io
+import time
+from itertools import islice
+
+from django.db import transaction
+from openpyxl import load_workbook
+
+from .exports import ProductExport
+from .forms.product_forms import BulkProductForm
+from .models import Product, SkuSequence
+
+DEFAULT_CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+
+BOOLEAN_FIELDS = BulkProductForm.BOOLEAN_FIELDS
+TRUE_VALUES = {'1', 'true', 'si', 'sí', 's', 'yes', 'y', 'x', 'verdadero'}
+
+# Valores por defecto del modelo para columnas ausentes (filas nuevas)
+MODEL_DEFAULTS = {
+    'categoria': 'General', 'uom_compra': 'UN', 'uom_venta': 'UN', 'factor_conversion': '1',
+    'impuesto_iva': '19', 'stock_minimo': '0', 'perishable': False, 'control_por_lote': False,
+    'control_por_serie': False, 'is_active': True,
+}
+
+
+IMPORT_FIELDS = list(BulkProductForm.Meta.fields)
+HEADER_ALIASES = {header.lower(): lookup for header, lookup in ProductExport.columns}
+HEADER_ALIASES.update({name: name for name in IMPORT_FIELDS})
+
+
+class ImportReport:
+    """Resultado de una importación: contadores, errores por fila y throughput"""
+
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors = []
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def add_error(self, row_number, sku, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row_number, 'sku': sku or None, 'errors': errors})
+
+    def to_dict(self):
+        return {
+            'rows': self.rows,
+            'created': self.created,
+            'updated': self.updated,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+            'elapsed_seconds': round(self.elapsed, 3),
+            'rows_per_second': round(self.rows / self.elapsed, 1) if self.elapsed else None,
+        }
+
+
+# ==================== LECTURA ====================
+def _normalize_header(headers):
+    return [HEADER_ALIASES.get(str(header or '').strip().lower()) for header in headers]
+
+
+def read_rows(fileobj, filename):
+    """
+    Itera (número de fila, dict campo→valor) sin cargar el archivo completo.
+    Retorna (columnas reconocidas, iterador, close). close() suelta el archivo
+    sin cerrarlo (es del llamador), aunque el iterador no se haya recorrido.
+    """
+    workbook = text = None
+    if filename.lower().endswith('.xlsx'):
+        workbook = load_workbook(fileobj, read_only=True, data_only=True)
+        values = workbook.active.iter_rows(values_only=True)
+    else:
+        text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+        values = csv.reader(text)
+
+    headers = _normalize_header(next(values, []))
+    columns = [name for name in headers if name]
+
+    def close():
+        nonlocal text, workbook
+        # El archivo es del llamador: el wrapper de texto no debe cerrarlo (al
+        # recolectarse sin detach() cerraría también el archivo)
+        if text is not None:
+            text.detach()
+            text = None
+        if workbook is not None:
+            workbook.close()
+            workbook = None
+
+    def iterator():
+        try:
+            for row_number, row in enumerate(values, start=2):
+                if not any(cell not in (None, '') for cell in row):
+                    continue
+                yield row_number, {name: value for name, value in zip(headers, row) if name}
+        finally:
+            close()
+
+    return columns, iterator(), close
+
+
+def _form_data(raw, base):
+    """Valores del archivo sobre `base` (el producto existente o los valores por defecto)"""
+    data = dict(base)
+    for name, value in raw.items():
+        if isinstance(value, str):
+            value = value.strip()
+        if name in BOOLEAN_FIELDS:
+            value = value if isinstance(value, bool) else str(value or '').lower() in TRUE_VALUES
+        elif value is None:
+            value = ''
+        data[name] = value
+    return data
+
+
+# ==================== SKU ====================
+def _assign_skus(products):
+    """
+    Asigna SKU a los productos nuevos sin SKU reservando el rango completo en
+    SkuSequence (una sentencia por bloque) y adelanta el contador con los SKU
+    explícitos del bloque.
+    """
+    SkuSequence.advance_past([product.sku for product in products if product.sku])
+    pending = [product for product in products if not product.sku]
+    if pending:
+        for product, sku in zip(pending, SkuSequence.reserve_skus(len(pending))):
+            product.sku = sku
+
+
+# ==================== IMPORTACIÓN ====================
+def _process_chunk(chunk, columns, report, dry_run):
+    # Valores actuales de los productos existentes del bloque (una consulta)
+    chunk_skus = {str(raw.get('sku') or '').strip() for _, raw in chunk} - {''}
+    current = {
+        row['sku']: row for row in Product.objects.filter(sku__in=chunk_skus).values(*IMPORT_FIELDS)
+    }
+
+    valid = []
+    seen_skus, seen_eans = {}, {}
+    form = BulkProductForm()
+    for row_number, raw in chunk:
+        sku = str(raw.get('sku') or '').strip()
+        form.bind(_form_data(raw, current.get(sku, MODEL_DEFAULTS)))
+        if not form.is_valid():
+            report.add_error(row_number, sku, {field: list(errors) for field, errors in form.errors.items()})
+            continue
+        data = dict(form.cleaned_data)
+        data['sku'] = sku
+        data['ean_upc'] = data.get('ean_upc') or None
+        if sku and sku in seen_skus:
+            report.add_error(row_number, sku, {'sku': [f'SKU repetido en la fila {seen_skus[sku]}']})
+            continue
+        if data['ean_upc'] and data['ean_upc'] in seen_eans:
+            report.add_error(row_number, sku, {'ean_upc': [f'EAN repetido en la fila {seen_eans[data["ean_upc"]]}']})
+            continue
+        if sku:
+            seen_skus[sku] = row_number
+        if data['ean_upc']:
+            seen_eans[data['ean_upc']] = row_number
+        valid.append((row_number, data))
+
+    if not valid:
+        return
+
+    # Una consulta por bloque para los EAN usados por otros productos
+    ean_owner = dict(Product.objects.filter(
+        ean_upc__in=[data['ean_upc'] for _, data in valid if data['ean_upc']],
+    ).values_list('ean_upc', 'sku'))
+
+    products, saved, created, updated = [], [], 0, 0
+    for row_number, data in valid:
+        owner = ean_owner.get(data['ean_upc'])
+        if owner and owner != data['sku']:
+            report.add_error(row_number, data['sku'], {'ean_upc': [f'El EAN/UPC ya está asignado al producto {owner}']})
+            continue
+        products.append(Product(**{name: data[name] for name in IMPORT_FIELDS if name in data}))
+        saved.append((row_number, data))
+        if data['sku'] in current:
+            updated += 1
+        else:
+            created += 1
+
+    if products and not dry_run:
+        update_fields = [name for name in columns if name in IMPORT_FIELDS and name != 'sku'] + ['updated_at']
+        try:
+            # Reservar fuera de la transacción del bloque para no retener el lock del
+            # contador durante el insert (si el bloque falla quedan números sin usar)
+            _assign_skus(products)
+            with transaction.atomic():
+                Product.objects.bulk_create(
+                    products,
+                    update_conflicts=True,
+                    unique_fields=['sku'],
+                    update_fields=update_fields,
+                )
+        except Exception as e:
+            # Solo las filas del insert (las rechazadas por EAN ya se contaron)
+            for row_number, data in saved:
+                report.add_error(row_number, data['sku'], {'__all__': [f'Error al guardar el bloque: {e}']})
+            return
+    report.created += created
+    report.updated += updated
+
+
+def import_products(fileobj, filename, chunk_size=DEFAULT_CHUNK_SIZE, dry_run=False, progress=None):
+    """
+    Importa productos desde un archivo CSV/XLSX y retorna un ImportReport.
+    `progress(report)` se llama después de cada bloque (tareas en segundo plano).
+    """
+    report = ImportReport()
+    columns, rows, close = read_rows(fileobj, filename)
+    try:
+        if 'name' not in columns and 'sku' not in columns:
+            report.add_error(1, None, {'__all__': ['El archivo debe tener al menos las columnas sku o name']})
+            return report
+
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            report.rows += len(chunk)
+            _process_chunk(chunk, columns, report, dry_run)
+            if progress:
+                progress(report)
+    finally:
+        close()
+
+    report.elapsed = time.perf_counter() - report.started
+    return report
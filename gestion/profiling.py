@@ -0,0 +1,176 @@
+# gestion/profiling.py
+"""
+Perfilado bajo demanda de un request (solo administradores).
+
+Se activa con el header `X-Profile: cprofile|sample` o el parámetro
+`?_profile=cprofile|sample`. El resultado se guarda en
+MEDIA_ROOT/PROFILING_SUBDIR:
+- cprofile: archivo .prof (pstats, abrir con snakeviz o pstats)
+- sample:   archivo .collapsed (stacks colapsados para flamegraph.pl/speedscope)
+Junto a cada perfil se guarda un .json con los metadatos del request.
+"""
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+from .auth_utils import is_admin
+
+PROFILE_MODES = ('cprofile', 'sample')
+PROFILE_EXTENSIONS = {'cprofile': '.prof', 'sample': '.collapsed'}
+
+
+def profiles_dir():
+    path = Path(settings.MEDIA_ROOT) / settings.PROFILING_SUBDIR
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def list_profiles():
+    """Metadatos de los perfiles guardados, del más reciente al más antiguo"""
+    items = []
+    for meta_path in profiles_dir().glob('*.json'):
+        try:
+            with meta_path.open(encoding='utf-8') as fh:
+                items.append(json.load(fh))
+        except (OSError, ValueError):
+            continue
+    return sorted(items, key=lambda item: item.get('created_at', ''), reverse=True)
+
+
+def get_profile_path(profile_id):
+    """Ruta del archivo de un perfil o None (valida el id para evitar path traversal)"""
+    try:
+        uuid.UUID(profile_id.split('_')[-1])
+    except (ValueError, AttributeError):
+        return None
+    for extension in PROFILE_EXTENSIONS.values():
+        path = profiles_dir() / f'{profile_id}{extension}'
+        if path.exists():
+            return path
+    return None
+
+
+def _prune_old_profiles():
+    """Mantiene como máximo PROFILING_MAX_FILES perfiles"""
+    metas = sorted(profiles_dir().glob('*.json'), key=os.path.getmtime, reverse=True)
+    for meta_path in metas[settings.PROFILING_MAX_FILES:]:
+        for extension in ('.json', *PROFILE_EXTENSIONS.values()):
+            meta_path.with_suffix(extension).unlink(missing_ok=True)
+
+
+class StackSampler:
+    """Profiler por muestreo: captura el stack del hilo del request cada `interval` segundos"""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='gestion-stack-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def write_collapsed(self, path):
+        with open(path, 'w', encoding='utf-8') as fh:
+            for stack, count in self.samples.most_common():
+                fh.write(f'{stack} {count}\n')
+
+
+class ProfilingMiddleware:
+    """
+    Perfila el request si lo pide un administrador.
+    Debe ir después de AuthenticationMiddleware.
+    """
+    HEADER = 'HTTP_X_PROFILE'
+    QUERY_PARAM = '_profile'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = self._requested_mode(request)
+        if mode is None:
+            return self.get_response(request)
+
+        profile_id = f"{timezone.now().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4()}"
+        path = profiles_dir() / f'{profile_id}{PROFILE_EXTENSIONS[mode]}'
+        start = time.perf_counter()
+
+        if mode == 'cprofile':
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+            profiler.dump_stats(str(path))
+        else:
+            sampler = StackSampler(threading.get_ident(), settings.PROFILING_SAMPLE_INTERVAL)
+            sampler.start()
+            try:
+                response = self.get_response(request)
+            finally:
+                sampler.stop()
+            sampler.write_collapsed(path)
+
+        from .instrumentation import get_request_stats
+        stats = get_request_stats()
+        metadata = {
+            'id': profile_id,
+            'mode': mode,
+            'file': path.name,
+            'method': request.method,
+            'path': request.get_full_path(),
+            'view': getattr(stats, 'view', None),
+            'status': response.status_code,
+            'duration_ms': round((time.perf_counter() - start) * 1000, 2),
+            'user': request.user.username,
+            'created_at': timezone.now().isoformat(),
+        }
+        with path.with_suffix('.json').open('w', encoding='utf-8') as fh:
+            json.dump(metadata, fh, ensure_ascii=False)
+        _prune_old_profiles()
+
+        response['X-Profile-Id'] = profile_id
+        return response
+
+    def _requested_mode(self, request):
+        if not getattr(settings, 'PROFILING_ENABLED', False):
+            return None
+        mode = request.META.get(self.HEADER) or request.GET.get(self.QUERY_PARAM)
+        if not mode:
+            return None
+        mode = mode.strip().lower()
+        if mode in ('1', 'true'):
+            mode = 'cprofile'
+        if mode not in PROFILE_MODES:
+            return None
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated or not is_admin(user):
+            return None
+        return mode
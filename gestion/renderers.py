@@ -0,0 +1,83 @@
+# gestion/renderers.py
+"""
+Renderer y parser JSON rápidos para la API REST.
+
+Usan orjson si está instalado y, si no, el JSONRenderer/JSONParser de DRF.
+La salida es la misma que la de DRF: datetime, Decimal, UUID y cadenas
+lazy se convierten con el mismo encoder (rest_framework.utils.encoders).
+"""
+import io
+
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_drf_default = encoders.JSONEncoder().default
+
+
+def _default(obj):
+    """
+    Subclases de str/int/dict/list (SafeString, ReturnDict, ErrorList...) y
+    tipos no nativos. Las subclases se convierten al tipo base recorriéndolas:
+    ErrorList, por ejemplo, guarda sus mensajes fuera de la lista base.
+    """
+    if isinstance(obj, str):
+        return str(obj)
+    if isinstance(obj, int):
+        return int(obj)
+    if isinstance(obj, dict):
+        return dict(obj)
+    if isinstance(obj, (list, tuple)):
+        return list(obj)
+    return _drf_default(obj)
+
+
+if orjson is not None:
+    # Los datetime pasan por el encoder de DRF (milisegundos y sufijo 'Z'); las
+    # subclases de tipos nativos por _default, como las recorre el encoder de DRF
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_SUBCLASS | orjson.OPT_NON_STR_KEYS
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer con orjson (sin indentación; si se pide indent usa el de DRF)"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=_default, option=ORJSON_OPTIONS)
+        except TypeError:
+            # Tipos que orjson no acepta (ej: enteros de más de 64 bits)
+            return super().render(data, accepted_media_type, renderer_context)
+        # Igual que DRF: escapar separadores de línea Unicode (inválidos en JavaScript)
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    """JSONParser con orjson; ante un error re-intenta con DRF para el mismo mensaje"""
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', 'utf-8')
+        data = stream.read()
+        try:
+            if encoding.lower().replace('-', '') != 'utf8':
+                return orjson.loads(data.decode(encoding))
+            return orjson.loads(data)
+        except (orjson.JSONDecodeError, UnicodeDecodeError):
+            # Enteros de más de 64 bits o JSON inválido: DRF decide y genera el ParseError
+            return super().parse(io.BytesIO(data), media_type, parser_context)
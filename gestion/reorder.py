@@ -0,0 +1,151 @@
+# gestion/reorder.py
+"""
+Sugerencias de reposición y generación masiva de órdenes borrador.
+
+- Una consulta: productos activos con stock (Inventory) + cantidad ya pedida
+  (ítems de órdenes DRAFT/PENDING) bajo su punto de reorden efectivo
+  (punto_reorden o stock_minimo).
+- Una consulta: proveedor de cada producto (el preferente o, si no hay, el de
+  menor costo) entre los proveedores activos.
+- Cantidad sugerida: hasta stock_maximo (o el doble del punto de reorden si no
+  hay máximo), redondeada hacia arriba a múltiplos de min_lote y sin superar
+  stock_maximo.
+- Lead time: el real del proveedor (scorecard cacheado, ver
+  supplier_scorecard.py) si tiene suficientes órdenes recibidas; si no, el
+  declarado en ProductSupplier.
+
+create_draft_orders() agrupa por proveedor y crea las órdenes DRAFT y sus
+ítems con bulk_create.
+"""
+import math
+from collections import defaultdict
+from datetime import timedelta
+from decimal import ROUND_CEILING, ROUND_FLOOR, Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Inventory, Product, ProductSupplier, SupplierOrder, SupplierOrderItem
+from .supplier_scorecard import actual_lead_times
+
+OPEN_ORDER_STATUSES = ('DRAFT', 'PENDING')
+
+
+def _sum_subquery(queryset, field):
+    return Coalesce(
+        Subquery(queryset.values('product_id').annotate(total=Sum(field)).values('total')[:1]),
+        Value(0), output_field=IntegerField(),
+    )
+
+
+def _round_quantity(needed, lot, position, maximum):
+    """Cantidad a pedir: múltiplo de `lot` que cubre `needed`, sin pasar `maximum`"""
+    lot = lot if lot and lot > 0 else Decimal('1')
+    quantity = (needed / lot).to_integral_value(ROUND_CEILING) * lot
+    if maximum is not None and position + quantity > maximum:
+        quantity = ((maximum - position) / lot).to_integral_value(ROUND_FLOOR) * lot
+    return int(quantity.to_integral_value(ROUND_FLOOR)) if quantity > 0 else 0
+
+
+def reorder_suggestions(warehouse_id=None, categoria=None, supplier_id=None):
+    """
+    Productos bajo su punto de reorden con la cantidad y el proveedor sugeridos.
+    Con warehouse_id se considera solo el stock y lo pedido para esa bodega.
+    Retorna (sugerencias, productos sin proveedor activo).
+    """
+    stock = Inventory.objects.filter(product_id=OuterRef('pk'))
+    on_order = SupplierOrderItem.objects.filter(product_id=OuterRef('pk'), order__status__in=OPEN_ORDER_STATUSES)
+    if warehouse_id:
+        stock = stock.filter(zone__warehouse_id=warehouse_id)
+        on_order = on_order.filter(order__warehouse_id=warehouse_id)
+
+    decimal = DecimalField(max_digits=18, decimal_places=4)
+    products = Product.objects.filter(is_active=True).annotate(
+        stock_total=_sum_subquery(stock, 'quantity'),
+        on_order_total=_sum_subquery(on_order, 'quantity'),
+        reorder_point=Coalesce('punto_reorden', 'stock_minimo', output_field=decimal),
+    ).annotate(
+        position=F('stock_total') + F('on_order_total'),
+    ).filter(reorder_point__gt=0, position__lt=F('reorder_point'))
+    if categoria:
+        products = products.filter(categoria=categoria)
+
+    relations = ProductSupplier.objects.filter(
+        product__in=products.values('pk'), supplier__estado='ACTIVO',
+    )
+    if supplier_id:
+        relations = relations.filter(supplier_id=supplier_id)
+    suppliers = {}
+    for relation in relations.order_by('product_id', '-preferente', 'costo', 'id').values(
+        'product_id', 'supplier_id', 'supplier__razon_social', 'costo', 'min_lote', 'lead_time_dias', 'preferente',
+    ):
+        suppliers.setdefault(relation['product_id'], relation)
+    actual = actual_lead_times({relation['supplier_id'] for relation in suppliers.values()})
+
+    suggestions, without_supplier = [], []
+    for product in products.order_by('sku').values(
+        'id', 'sku', 'name', 'categoria', 'stock_total', 'on_order_total', 'reorder_point', 'stock_maximo',
+    ).iterator(chunk_size=2000):
+        relation = suppliers.get(product['id'])
+        if relation is None:
+            if not supplier_id:
+                without_supplier.append({'product_id': product['id'], 'sku': product['sku'], 'name': product['name']})
+            continue
+        position = Decimal(product['stock_total'] + product['on_order_total'])
+        maximum = product['stock_maximo']
+        target = maximum if maximum is not None and maximum > product['reorder_point'] else product['reorder_point'] * 2
+        quantity = _round_quantity(target - position, relation['min_lote'], position, maximum)
+        if quantity <= 0:
+            continue
+        suggestions.append({
+            'product_id': product['id'],
+            'sku': product['sku'],
+            'name': product['name'],
+            'categoria': product['categoria'],
+            'stock': product['stock_total'],
+            'on_order': product['on_order_total'],
+            'reorder_point': product['reorder_point'],
+            'stock_maximo': maximum,
+            'quantity': quantity,
+            'supplier_id': relation['supplier_id'],
+            'supplier': relation['supplier__razon_social'],
+            'preferente': relation['preferente'],
+            'unit_cost': relation['costo'],
+            'lead_time_dias': relation['lead_time_dias'],
+            'actual_lead_time': round(actual[relation['supplier_id']], 2) if relation['supplier_id'] in actual else None,
+            'lead_time': math.ceil(actual.get(relation['supplier_id'], relation['lead_time_dias'])),
+        })
+    return suggestions, without_supplier
+
+
+def create_draft_orders(suggestions, zone, user=None):
+    """Una orden DRAFT por proveedor con sus ítems (bulk_create). Retorna las órdenes creadas"""
+    by_supplier = defaultdict(list)
+    for suggestion in suggestions:
+        by_supplier[suggestion['supplier_id']].append(suggestion)
+    if not by_supplier:
+        return []
+
+    today = timezone.localdate()
+    cent = Decimal('0.01')
+    with transaction.atomic():
+        orders = SupplierOrder.objects.bulk_create([
+            SupplierOrder(
+                supplier_id=supplier_id, warehouse_id=zone.warehouse_id, zone=zone, requested_by=user,
+                status='DRAFT',
+                expected_delivery_date=today + timedelta(days=max(item['lead_time'] for item in items)),
+                notes=f'Reposición automática: {len(items)} productos bajo punto de reorden',
+            )
+            for supplier_id, items in by_supplier.items()
+        ])
+        SupplierOrderItem.objects.bulk_create([
+            SupplierOrderItem(
+                order=order, product_id=item['product_id'], quantity=item['quantity'],
+                unit_price=Decimal(item['unit_cost']).quantize(cent),
+            )
+            for order, items in zip(orders, by_supplier.values())
+            for item in items
+        ], batch_size=1000)
+    return orders
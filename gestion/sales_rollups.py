@@ -0,0 +1,220 @@
+# gestion/sales_rollups.py
+"""
+Resúmenes diarios de ventas (tabla SalesRollup) para reportes.
+
+Se mantienen de dos formas:
+- Incremental: cada venta suma sus deltas (día, producto, categoría, vendedor,
+  cliente) dentro de la misma transacción del checkout, con un solo
+  INSERT ... ON CONFLICT DO UPDATE. Eliminar una venta resta sus deltas.
+- Catch-up: recalcula desde SaleItem los días cerrados posteriores a la
+  marca de agua (RollupWatermark 'sales') hasta ayer. Es idempotente y corrige
+  cualquier diferencia (ventas editadas desde el admin, datos anteriores).
+
+Los reportes (/api/reports/sales-summary) leen solo SalesRollup, así que su
+costo depende de los días consultados y no del historial de ventas.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import connections, router, transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Min, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .models import RollupWatermark, Sale, SaleItem, SalesRollup
+
+DIMENSIONS = ('day', 'product', 'category', 'user', 'client')
+WATERMARK = 'sales'
+# Días recalculados por bloque en el catch-up
+REBUILD_CHUNK_DAYS = 31
+
+
+def _key(value):
+    return '' if value is None else str(value)
+
+
+# ==================== INCREMENTAL ====================
+def sale_deltas(sale, items, sign=1):
+    """Deltas (sales, units, revenue) por (dimensión, fecha, clave) de una venta"""
+    day = timezone.localdate(sale.sale_date)
+    deltas = defaultdict(lambda: [0, 0, Decimal('0')])
+    units_total, revenue_total = 0, Decimal('0')
+    counted = set()
+    for item in items:
+        revenue = Decimal(item.quantity) * item.price_at_sale
+        units_total += item.quantity
+        revenue_total += revenue
+        category = item.product.categoria if item.product is not None else ''
+        for key in (('product', _key(item.product_id)), ('category', category)):
+            delta = deltas[(key[0], day, key[1])]
+            if key not in counted:
+                # Una venta cuenta una vez por producto/categoría aunque tenga varias líneas
+                delta[0] += sign
+                counted.add(key)
+            delta[1] += sign * item.quantity
+            delta[2] += sign * revenue
+
+    for dimension, key in (('day', ''), ('user', _key(sale.user_id)), ('client', _key(sale.client_id))):
+        deltas[(dimension, day, key)] = [sign, sign * units_total, sign * revenue_total]
+    return deltas
+
+
+def apply_deltas(deltas, using=None):
+    """Suma los deltas a SalesRollup (un solo upsert en PostgreSQL/SQLite)"""
+    if not deltas:
+        return
+    using = using or router.db_for_write(SalesRollup)
+    connection = connections[using]
+    if connection.vendor in ('postgresql', 'sqlite'):
+        qn = connection.ops.quote_name
+        table = qn(SalesRollup._meta.db_table)
+        columns = ['dimension', 'date', 'key', 'sales', 'units', 'revenue']
+        placeholders = ', '.join(['(%s, %s, %s, %s, %s, %s)'] * len(deltas))
+        params = []
+        for (dimension, day, key), (sales, units, revenue) in deltas.items():
+            params += [
+                dimension, connection.ops.adapt_datefield_value(day), key, sales, units,
+                connection.ops.adapt_decimalfield_value(revenue, 14, 2),
+            ]
+        increments = ', '.join(f'{qn(c)} = {table}.{qn(c)} + EXCLUDED.{qn(c)}' for c in columns[3:])
+        sql = (
+            f'INSERT INTO {table} ({", ".join(qn(c) for c in columns)}) VALUES {placeholders} '
+            f'ON CONFLICT ({qn("dimension")}, {qn("date")}, {qn("key")}) DO UPDATE SET {increments}'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+        return
+
+    with transaction.atomic(using=using):
+        for (dimension, day, key), (sales, units, revenue) in deltas.items():
+            rollup, _ = SalesRollup.objects.using(using).select_for_update().get_or_create(
+                dimension=dimension, date=day, key=key,
+            )
+            SalesRollup.objects.using(using).filter(pk=rollup.pk).update(
+                sales=F('sales') + sales, units=F('units') + units, revenue=F('revenue') + revenue,
+            )
+
+
+def record_sale(sale, items, sign=1):
+    """Actualiza los resúmenes con una venta (sign=-1 al eliminarla)"""
+    apply_deltas(sale_deltas(sale, items, sign))
+
+
+# ==================== RECÁLCULO ====================
+def _aggregate(date_from, date_to):
+    """Resúmenes calculados desde SaleItem para el rango de días (5 consultas agregadas)"""
+    start = timezone.make_aware(datetime.combine(date_from, time.min))
+    end = timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min))
+    revenue = ExpressionWrapper(F('quantity') * F('price_at_sale'), output_field=DecimalField(max_digits=14, decimal_places=2))
+    items = SaleItem.objects.filter(sale__sale_date__gte=start, sale__sale_date__lt=end).annotate(
+        day=TruncDate('sale__sale_date'),
+    )
+    lookups = {
+        'day': None,
+        'product': 'product_id',
+        'category': 'product__categoria',
+        'user': 'sale__user_id',
+        'client': 'sale__client_id',
+    }
+    rows = []
+    for dimension, lookup in lookups.items():
+        group = ['day'] + ([lookup] if lookup else [])
+        values = items.values(*group).annotate(
+            sales=Count('sale_id', distinct=True),
+            units=Coalesce(Sum('quantity'), 0),
+            total=Coalesce(Sum(revenue), Decimal('0')),
+        ).order_by()
+        for row in values:
+            rows.append(SalesRollup(
+                dimension=dimension, date=row['day'], key=_key(row[lookup]) if lookup else '',
+                sales=row['sales'], units=row['units'], revenue=row['total'],
+            ))
+    return rows
+
+
+def rebuild(date_from, date_to):
+    """Recalcula (reemplaza) los resúmenes de los días indicados"""
+    written = 0
+    chunk_start = date_from
+    while chunk_start <= date_to:
+        chunk_end = min(date_to, chunk_start + timedelta(days=REBUILD_CHUNK_DAYS - 1))
+        rows = _aggregate(chunk_start, chunk_end)
+        with transaction.atomic():
+            SalesRollup.objects.filter(date__gte=chunk_start, date__lte=chunk_end).delete()
+            SalesRollup.objects.bulk_create(rows, batch_size=1000)
+        written += len(rows)
+        chunk_start = chunk_end + timedelta(days=1)
+    return written
+
+
+def catch_up(until=None):
+    """
+    Recalcula los días cerrados posteriores a la marca de agua hasta `until`
+    (por defecto ayer; el día en curso lo mantiene el checkout).
+    """
+    until = until or timezone.localdate() - timedelta(days=1)
+    watermark, _ = RollupWatermark.objects.get_or_create(name=WATERMARK)
+    if watermark.last_date:
+        start = watermark.last_date + timedelta(days=1)
+    else:
+        first_sale = Sale.objects.aggregate(first=Min('sale_date'))['first']
+        if first_sale is None:
+            return {'from': None, 'to': None, 'rows': 0}
+        start = timezone.localdate(first_sale)
+    if start > until:
+        return {'from': None, 'to': None, 'rows': 0}
+
+    written = rebuild(start, until)
+    watermark.last_date = until
+    watermark.save(update_fields=['last_date', 'updated_at'])
+    return {'from': start.isoformat(), 'to': until.isoformat(), 'rows': written}
+
+
+# ==================== CONSULTAS ====================
+def _labels(dimension, keys):
+    from django.contrib.auth.models import User
+
+    from .models import Client, Product
+
+    ids = [int(key) for key in keys if key.isdigit()]
+    if dimension == 'product':
+        return {str(pk): f'{name} ({sku})' for pk, sku, name in Product.objects.filter(pk__in=ids).values_list('pk', 'sku', 'name')}
+    if dimension == 'user':
+        return {str(pk): username for pk, username in User.objects.filter(pk__in=ids).values_list('pk', 'username')}
+    if dimension == 'client':
+        labels = {str(pk): name for pk, name in Client.objects.filter(pk__in=ids).values_list('pk', 'name')}
+        labels[''] = 'Cliente Varios'
+        return labels
+    return {key: key or 'Sin categoría' for key in keys}
+
+
+def sales_summary(date_from, date_to, group_by='day', limit=20):
+    """Totales del rango y serie agrupada por día o por una dimensión (top `limit` por ingresos)"""
+    totals_rows = SalesRollup.objects.filter(dimension='day', date__gte=date_from, date__lte=date_to)
+    totals = totals_rows.aggregate(
+        sales=Coalesce(Sum('sales'), 0), units=Coalesce(Sum('units'), 0), revenue=Coalesce(Sum('revenue'), Decimal('0')),
+    )
+    totals['average_ticket'] = (totals['revenue'] / totals['sales']).quantize(Decimal('0.01')) if totals['sales'] else Decimal('0')
+
+    if group_by == 'day':
+        rows = [
+            {'date': row['date'], 'sales': row['sales'], 'units': row['units'], 'revenue': row['revenue']}
+            for row in totals_rows.order_by('date').values('date', 'sales', 'units', 'revenue')
+        ]
+    else:
+        grouped = SalesRollup.objects.filter(
+            dimension=group_by, date__gte=date_from, date__lte=date_to,
+        ).values('key').annotate(
+            sales_total=Sum('sales'), units_total=Sum('units'), revenue_total=Sum('revenue'),
+        ).order_by('-revenue_total', 'key')[:limit]
+        grouped = list(grouped)
+        labels = _labels(group_by, [row['key'] for row in grouped])
+        rows = [
+            {
+                'key': row['key'], 'label': labels.get(row['key'], row['key']),
+                'sales': row['sales_total'], 'units': row['units_total'], 'revenue': row['revenue_total'],
+            }
+            for row in grouped
+        ]
+    return {'totals': totals, 'group_by': group_by, 'results': rows}
@@ -1,13 +1,20 @@
 # gestion/serializers.py
+from decimal import Decimal
+
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from .models import (
     Product, Supplier, UserProfile, ProductMovement, 
     Sale, SaleItem, SupplierOrder, SupplierOrderItem,
-    Client, Warehouse, Zone, Inventory, ProductSupplier
+    Client, Warehouse, Zone, Inventory, ProductSupplier, Job
 )
+from .fieldsets import SparseFieldsetSerializerMixin
+
+# Los serializers de los ViewSets aceptan ?fields=a,b y ?view=lite (ver gestion/fieldsets.py).
+# Meta.lite_fields: campos de la vista lite (selectores y tablas del frontend).
+# Meta.field_requires: campos del modelo que usan los campos calculados.
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     total_stock = serializers.ReadOnlyField()
     stock_actual = serializers.ReadOnlyField(source='total_quantity')
     alerta_bajo_stock = serializers.ReadOnlyField()
@@ -26,6 +33,13 @@ class ProductSerializer(serializers.ModelSerializer):
             'total_stock', 'stock_actual', 'alerta_bajo_stock', 'alerta_por_vencer', 'supplier_name'
         ]
         read_only_fields = ['costo_promedio', 'total_stock', 'stock_actual', 'alerta_bajo_stock', 'alerta_por_vencer']
+        lite_fields = ['id', 'sku', 'name', 'categoria', 'uom_venta', 'precio_venta', 'total_stock']
+        field_requires = {
+            'stock_actual': ['stock'],
+            'alerta_bajo_stock': ['stock', 'punto_reorden', 'stock_minimo'],
+            'alerta_por_vencer': ['perishable'],
+            'supplier_name': ['supplier_relations'],
+        }
     
     def get_supplier_name(self, obj):
         # OPTIMIZACIÓN: Usar select_related en el queryset en lugar de hacer consulta aquí
@@ -36,7 +50,7 @@ class ProductSerializer(serializers.ModelSerializer):
             supplier = obj.supplier_preferente
         return supplier.nombre_display if supplier else None
 
-class SupplierSerializer(serializers.ModelSerializer):
+class SupplierSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     nombre_display = serializers.ReadOnlyField()
     
     class Meta:
@@ -49,18 +63,22 @@ class SupplierSerializer(serializers.ModelSerializer):
             'estado', 'observaciones', 'is_active', 'created_at', 'updated_at',
             'nombre_display'
         ]
+        lite_fields = ['id', 'rut_nif', 'razon_social', 'nombre_display', 'is_active']
+        field_requires = {'nombre_display': ['nombre_fantasia', 'razon_social']}
 
-class WarehouseSerializer(serializers.ModelSerializer):
+class WarehouseSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Warehouse
         fields = ['id', 'name', 'address', 'is_active']
+        lite_fields = ['id', 'name']
 
-class ZoneSerializer(serializers.ModelSerializer):
+class ZoneSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     warehouse_name = serializers.CharField(source='warehouse.name', read_only=True)
     
     class Meta:
         model = Zone
         fields = ['id', 'name', 'warehouse', 'warehouse_name', 'is_active']
+        lite_fields = ['id', 'name', 'warehouse']
 
 class InventorySerializer(serializers.ModelSerializer):
     product_name = serializers.CharField(source='product.name', read_only=True)
@@ -91,7 +109,7 @@ class UserProfileSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['ultimo_acceso', 'sesiones_activas']
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     profile = UserProfileSerializer(read_only=True)
     
     class Meta:
@@ -100,8 +118,9 @@ class UserSerializer(serializers.ModelSerializer):
             'id', 'username', 'email', 'first_name', 'last_name',
             'is_active', 'date_joined', 'last_login', 'profile'
         ]
+        lite_fields = ['id', 'username', 'email', 'first_name', 'last_name', 'is_active']
 
-class ProductMovementSerializer(serializers.ModelSerializer):
+class ProductMovementSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     product_name = serializers.CharField(source='product.name', read_only=True)
     product_sku = serializers.CharField(source='product.sku', read_only=True)
     origin_zone_name = serializers.CharField(source='origin_zone.name', read_only=True, allow_null=True)
@@ -109,6 +128,10 @@ class ProductMovementSerializer(serializers.ModelSerializer):
     supplier_name = serializers.CharField(source='supplier.razon_social', read_only=True, allow_null=True)
     warehouse_name = serializers.CharField(source='warehouse.name', read_only=True, allow_null=True)
     user_name = serializers.CharField(source='performed_by.username', read_only=True, allow_null=True)
+    # Nombres antiguos (compatibilidad), desde los campos vigentes: las columnas ya no se escriben
+    movement_type = serializers.CharField(source='tipo', read_only=True)
+    quantity = serializers.IntegerField(source='cantidad', read_only=True)
+    reason = serializers.CharField(source='motivo', read_only=True, allow_null=True)
     
     class Meta:
         model = ProductMovement
@@ -127,11 +150,13 @@ class ProductMovementSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
         read_only_fields = ['created_at', 'updated_at']
+        lite_fields = ['id', 'product', 'product_name', 'product_sku', 'tipo', 'cantidad', 'fecha', 'user_name']
 
-class ClientSerializer(serializers.ModelSerializer):
+class ClientSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Client
         fields = ['id', 'name', 'email', 'phone', 'address', 'rut_nif', 'is_active']
+        lite_fields = ['id', 'name']
 
 class SaleItemSerializer(serializers.ModelSerializer):
     product_name = serializers.CharField(source='product.name', read_only=True)
@@ -151,7 +176,7 @@ class SaleItemSerializer(serializers.ModelSerializer):
         # Convertir Decimal a float para JSON
         return float(subtotal)
 
-class SaleSerializer(serializers.ModelSerializer):
+class SaleSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     items = SaleItemSerializer(many=True, read_only=True)
     client_name = serializers.CharField(source='client.name', read_only=True, allow_null=True)
     user_name = serializers.CharField(source='user.username', read_only=True)
@@ -162,6 +187,7 @@ class SaleSerializer(serializers.ModelSerializer):
             'id', 'client', 'client_name', 'user', 'user_name',
             'total_amount', 'sale_date', 'items'
         ]
+        lite_fields = ['id', 'client_name', 'user_name', 'total_amount', 'sale_date']
 
 class SupplierOrderItemSerializer(serializers.ModelSerializer):
     product_name = serializers.CharField(source='product.name', read_only=True)
@@ -171,15 +197,18 @@ class SupplierOrderItemSerializer(serializers.ModelSerializer):
         model = SupplierOrderItem
         fields = [
             'id', 'product', 'product_name', 'product_sku', 'quantity',
-            'unit_price', 'subtotal'
+            'received_quantity', 'unit_price', 'subtotal'
         ]
+        read_only_fields = ['received_quantity']
 
-class SupplierOrderSerializer(serializers.ModelSerializer):
+class SupplierOrderSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     items = SupplierOrderItemSerializer(many=True, read_only=True)
     supplier_name = serializers.CharField(source='supplier.nombre_display', read_only=True)
     warehouse_name = serializers.CharField(source='warehouse.name', read_only=True, allow_null=True)
     zone_name = serializers.CharField(source='zone.name', read_only=True, allow_null=True)
     requested_by_name = serializers.CharField(source='requested_by.username', read_only=True)
+    total_amount = serializers.SerializerMethodField()
+    observaciones = serializers.CharField(source='notes', read_only=True, allow_null=True)
     
     class Meta:
         model = SupplierOrder
@@ -189,6 +218,18 @@ class SupplierOrderSerializer(serializers.ModelSerializer):
             'received_date', 'status', 'total_amount', 'requested_by',
             'requested_by_name', 'observaciones', 'items'
         ]
+        lite_fields = [
+            'id', 'supplier', 'supplier_name', 'warehouse_name', 'zone_name',
+            'order_date', 'received_date', 'status',
+        ]
+        field_requires = {'supplier_name': ['supplier__nombre_fantasia', 'supplier__razon_social']}
+
+    def get_total_amount(self, obj):
+        """Suma de subtotales (anotada en el listado; si no, desde los ítems)"""
+        total = getattr(obj, 'items_total', None)
+        if total is None:
+            total = sum((item.subtotal for item in obj.items.all()), Decimal('0'))
+        return Decimal(total).quantize(Decimal('0.01'))
 
 class ProductSupplierSerializer(serializers.ModelSerializer):
     product_name = serializers.CharField(source='product.name', read_only=True)
@@ -204,3 +245,14 @@ class ProductSupplierSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['created_at', 'updated_at']
 
+class JobSerializer(serializers.ModelSerializer):
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    created_by_name = serializers.CharField(source='created_by.username', read_only=True, allow_null=True)
+
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'name', 'status', 'status_display', 'progress', 'progress_message',
+            'attempts', 'max_attempts', 'run_after', 'result', 'error',
+            'created_by', 'created_by_name', 'created_at', 'started_at', 'finished_at'
+        ]
@@ -0,0 +1,128 @@
+# gestion/slow_queries.py
+"""
+Registro de consultas lentas.
+
+execute_wrapper que detecta consultas por sobre SLOW_QUERY_THRESHOLD_MS y
+registra SQL, parámetros, vista, ubicación en el código y el plan de
+ejecución (EXPLAIN / EXPLAIN QUERY PLAN en SQLite). Cada registro incluye
+una huella (fingerprint) de la consulta normalizada para agrupar reportes.
+"""
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+import traceback
+
+from django.conf import settings
+
+logger = logging.getLogger('gestion.slow_queries')
+
+_state = threading.local()
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)')
+_SPACES_RE = re.compile(r'\s+')
+
+
+def normalize_sql(sql):
+    """Reemplaza literales y listas de parámetros para agrupar consultas equivalentes"""
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _IN_LIST_RE.sub('(...)', sql)
+    return _SPACES_RE.sub(' ', sql).strip()
+
+
+def fingerprint(sql):
+    return hashlib.sha1(normalize_sql(sql).encode('utf-8')).hexdigest()[:12]
+
+
+def threshold_seconds():
+    threshold_ms = getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', 0)
+    return threshold_ms / 1000 if threshold_ms and threshold_ms > 0 else None
+
+
+def _code_location():
+    """
+    Frame que originó la consulta: el más interno del proyecto (fuera de
+    middlewares y de este módulo) o, si no hay, el más interno fuera del ORM.
+    """
+    base_dir = str(settings.BASE_DIR)
+    app_dir = str(settings.BASE_DIR / 'gestion')
+    skip = (__file__, 'instrumentation.py', 'middleware.py')
+    fallback = None
+    for frame in reversed(traceback.extract_stack()[:-3]):
+        filename = frame.filename
+        if filename.startswith(app_dir) and not any(part in filename for part in skip):
+            return f'{filename[len(base_dir) + 1:]}:{frame.lineno} in {frame.name}'
+        if fallback is None and 'django/db/' not in filename and not any(part in filename for part in skip):
+            fallback = f'{filename}:{frame.lineno} in {frame.name}'
+    return fallback
+
+
+def _explain(connection, sql, params):
+    """Obtiene el plan de ejecución de un SELECT (sin ejecutarlo con ANALYZE)"""
+    if not getattr(settings, 'SLOW_QUERY_EXPLAIN', True):
+        return None
+    if not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+        return None
+    if connection.needs_rollback:
+        return None
+    try:
+        prefix = connection.ops.explain_query_prefix()
+        with connection.cursor() as cursor:
+            cursor.execute(f'{prefix} {sql}', params)
+            return [' '.join(str(col) for col in row) for row in cursor.fetchall()]
+    except Exception as e:
+        return [f'EXPLAIN no disponible: {e}']
+
+
+def _format_params(params):
+    if params is None:
+        return None
+    try:
+        return [p if isinstance(p, (int, float, str, bool, type(None))) else str(p) for p in params]
+    except TypeError:
+        return str(params)
+
+
+def record_slow_query(connection, sql, params, duration, many=False):
+    from .instrumentation import get_request_stats
+
+    stats = get_request_stats()
+    entry = {
+        'fingerprint': fingerprint(sql),
+        'duration_ms': round(duration * 1000, 2),
+        'database': connection.alias,
+        'sql': sql,
+        'params': None if many else _format_params(params),
+        'view': getattr(stats, 'view', None),
+        'location': _code_location(),
+        'plan': None if many else _explain(connection, sql, params),
+    }
+
+    logger.warning(json.dumps(entry, ensure_ascii=False, default=str))
+
+
+def slow_query_wrapper(execute, sql, params, many, context):
+    """execute_wrapper que registra las consultas que superan el umbral"""
+    limit = threshold_seconds()
+    if limit is None or getattr(_state, 'active', False):
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    result = execute(sql, params, many, context)
+    duration = time.perf_counter() - start
+    if duration >= limit:
+        # Evitar registrar recursivamente el EXPLAIN
+        _state.active = True
+        try:
+            record_slow_query(context['connection'], sql, params, duration, many)
+        except Exception:
+            logger.exception('Error al registrar consulta lenta')
+        finally:
+            _state.active = False
+    return result
@@ -0,0 +1,42 @@
+# gestion/stock_alerts.py
+"""
+Alertas de stock en SQL: stock total anotado (Sum sobre Inventory, cubierto por
+el índice (product, quantity)) comparado con el punto de reorden efectivo
+(punto_reorden o stock_minimo) y con stock_maximo. Los filtros van en el
+HAVING de la misma consulta, así el listado se filtra y pagina en la base.
+"""
+from django.db.models import DecimalField, F, Q, Sum
+from django.db.models.functions import Coalesce
+
+ALERT_FILTERS = {
+    'out_of_stock': Q(total_stock__lte=0),
+    'low_stock': Q(total_stock__lt=F('reorder_point')),
+    'over_max': Q(stock_maximo__isnull=False, total_stock__gt=F('stock_maximo')),
+}
+
+
+def annotate_stock(queryset, warehouse_id=None):
+    """Anota total_stock (de una bodega si se indica) y reorder_point"""
+    stock_filter = Q(stock__zone__warehouse_id=warehouse_id) if warehouse_id else None
+    annotations = {
+        'reorder_point': Coalesce('punto_reorden', 'stock_minimo', output_field=DecimalField(max_digits=18, decimal_places=4)),
+    }
+    if warehouse_id or 'total_stock' not in queryset.query.annotations:
+        annotations['total_stock'] = Coalesce(Sum('stock__quantity', filter=stock_filter), 0)
+    return queryset.annotate(**annotations)
+
+
+def alert_filter(types):
+    """Q que cumple cualquiera de las alertas indicadas"""
+    condition = Q()
+    for alert in types:
+        condition |= ALERT_FILTERS[alert]
+    return condition
+
+
+def alert_type(row):
+    if row['total_stock'] <= 0:
+        return 'out_of_stock'
+    if row['total_stock'] < row['reorder_point']:
+        return 'low_stock'
+    return 'over_max'
@@ -0,0 +1,234 @@
+# gestion/stock_ledger.py
+"""
+Libro de stock (Kardex) calculado en SQL sobre ProductMovement.
+
+Cada movimiento se convierte en una o dos entradas por zona, con la misma
+semántica que aplica ProductMovementViewSet.create al inventario:
+- ingreso / devolución: +cantidad en la zona destino
+- salida: -cantidad en la zona origen (o destino si no hay origen)
+- transferencia: par salida (-cantidad en origen) / entrada (+cantidad en destino)
+- ajuste: fija la cantidad de la zona destino en `cantidad`
+
+El saldo se calcula con funciones de ventana: cada ajuste abre un segmento
+por zona (suma acumulada de ajustes) y el saldo es la suma acumulada de las
+entradas dentro del segmento. El saldo del producto (todas las zonas) suma el
+cambio de cada entrada respecto al saldo anterior de su zona.
+
+La paginación es por cursor (fecha, id, tramo): cada página lee solo las
+siguientes `limit` entradas en orden cronológico.
+
+Los movimientos archivados (ver movement_archive.py) se reemplazan por una
+entrada de apertura por zona al corte (MovementOpeningBalance, tipo
+'apertura'), que fija el saldo como un ajuste.
+"""
+import base64
+import json
+from datetime import datetime, time as dt_time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connections, router
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import MovementArchiveRun, MovementOpeningBalance, ProductMovement, Zone
+
+KARDEX_MAX_LIMIT = 500
+
+
+class CursorError(ValueError):
+    """Cursor de paginación inválido"""
+
+
+class ArchivedPeriodError(ValueError):
+    """Consulta de un período cerrado (movimientos archivados)"""
+
+
+def opening_sql(connection, where):
+    """
+    Entradas de apertura (id 0, fijan el saldo de la zona) al corte del
+    archivado vigente, de los saldos que cumplen `where` (condiciones sobre
+    b.* y r.cutoff). Sin archivado no retorna filas.
+    """
+    qn = connection.ops.quote_name
+    return f"""
+            SELECT 0 AS id, 0 AS leg, b.{qn('product_id')} AS product_id,
+                r.{qn('cutoff')} AS fecha, r.{qn('cutoff')} AS applied_at,
+                'apertura' AS tipo, b.{qn('ledger_quantity')} AS cantidad, b.{qn('zone_id')} AS zone_id,
+                b.{qn('ledger_quantity')} AS delta, 1 AS is_set
+            FROM {qn(MovementOpeningBalance._meta.db_table)} b
+            CROSS JOIN (
+                SELECT MAX({qn('cutoff')}) AS cutoff FROM {qn(MovementArchiveRun._meta.db_table)}
+            ) r
+            WHERE r.{qn('cutoff')} IS NOT NULL AND {where}
+    """
+
+
+def entries_sql(connection, where, zone_filter=False, opening_where=None):
+    """
+    SELECT de las entradas (id, leg, product_id, fecha, applied_at, tipo,
+    cantidad, zone_id, delta, is_set) de los movimientos que cumplen `where`
+    (condiciones sobre m.*, con sus parámetros), y zone_id = %s si `zone_filter`.
+    applied_at es cuándo se aplicó al inventario (created_at; `fecha` es editable).
+    Con `opening_where` se agregan las entradas de apertura (ver opening_sql);
+    sus parámetros van después de los de `where`.
+    """
+    qn = connection.ops.quote_name
+    table = qn(ProductMovement._meta.db_table)
+    opening = f"UNION ALL {opening_sql(connection, opening_where)}" if opening_where else ''
+    return f"""
+        SELECT * FROM (
+            SELECT m.{qn('id')} AS id, legs.leg AS leg, m.{qn('product_id')} AS product_id,
+                m.{qn('fecha')} AS fecha, COALESCE(m.{qn('created_at')}, m.{qn('fecha')}) AS applied_at,
+                m.{qn('tipo')} AS tipo, m.{qn('cantidad')} AS cantidad,
+                CASE
+                    WHEN m.{qn('tipo')} = 'transferencia' AND legs.leg = 0 THEN m.{qn('origin_zone_id')}
+                    WHEN m.{qn('tipo')} = 'salida' THEN COALESCE(m.{qn('origin_zone_id')}, m.{qn('destination_zone_id')})
+                    ELSE m.{qn('destination_zone_id')}
+                END AS zone_id,
+                CASE
+                    WHEN m.{qn('tipo')} = 'salida' OR (m.{qn('tipo')} = 'transferencia' AND legs.leg = 0)
+                    THEN -m.{qn('cantidad')} ELSE m.{qn('cantidad')}
+                END AS delta,
+                CASE WHEN m.{qn('tipo')} = 'ajuste' THEN 1 ELSE 0 END AS is_set
+            FROM {table} m CROSS JOIN (SELECT 0 AS leg UNION ALL SELECT 1 AS leg) legs
+            WHERE {where}
+                AND (legs.leg = 0 OR m.{qn('tipo')} = 'transferencia')
+                AND (m.{qn('tipo')} <> 'transferencia'
+                     OR (m.{qn('origin_zone_id')} IS NOT NULL AND m.{qn('destination_zone_id')} IS NOT NULL))
+            {opening}
+        ) entries
+        WHERE zone_id IS NOT NULL {'AND zone_id = %s' if zone_filter else ''}
+    """
+
+
+def to_datetime(value):
+    """Los backends sin tipo datetime nativo (SQLite) retornan texto"""
+    if isinstance(value, str):
+        value = parse_datetime(value)
+    if settings.USE_TZ and timezone.is_naive(value):
+        value = timezone.make_aware(value, dt_timezone.utc)
+    return value
+
+
+def to_decimal(value):
+    return value if isinstance(value, Decimal) else Decimal(str(value or 0))
+
+
+def encode_cursor(fecha, movement_id, leg):
+    raw = json.dumps([fecha.isoformat(), movement_id, leg]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        fecha, movement_id, leg = json.loads(raw)
+        fecha = parse_datetime(fecha)
+        if fecha is None:
+            raise ValueError
+        return fecha, int(movement_id), int(leg)
+    except (ValueError, TypeError):
+        raise CursorError('Cursor inválido')
+
+
+def kardex(product_id, zone_id=None, date_from=None, date_to=None, cursor=None, limit=100, using=None):
+    """
+    Entradas del Kardex de un producto en orden cronológico con saldo por zona
+    y saldo del producto. Los saldos consideran todo el historial anterior
+    aunque se filtre por fecha (los movimientos archivados, con la entrada de
+    apertura al corte). Retorna (filas, cursor siguiente o None).
+    """
+    using = using or router.db_for_read(ProductMovement)
+    connection = connections[using]
+    ops = connection.ops
+    order = 'fecha, id, leg'
+
+    where, params = f"m.{ops.quote_name('product_id')} = %s", [product_id]
+    opening_where = f"b.{ops.quote_name('product_id')} = %s"
+    if date_to:
+        # Las entradas posteriores no cambian los saldos anteriores
+        end = timezone.make_aware(datetime.combine(date_to + timedelta(days=1), dt_time.min))
+        archive = MovementArchiveRun.current(using)
+        if archive is not None and end <= archive.cutoff:
+            raise ArchivedPeriodError(
+                f'Los movimientos anteriores a {archive.cutoff:%Y-%m-%d} están archivados (ver movements/archive/)'
+            )
+        where += f" AND m.{ops.quote_name('fecha')} < %s"
+        params.append(ops.adapt_datetimefield_value(end))
+    params.append(product_id)
+    if zone_id:
+        params.append(zone_id)
+
+    filters, filter_params = [], []
+    if date_from:
+        start = timezone.make_aware(datetime.combine(date_from, dt_time.min))
+        filters.append('fecha >= %s')
+        filter_params.append(ops.adapt_datetimefield_value(start))
+    if cursor:
+        fecha, movement_id, leg = decode_cursor(cursor)
+        fecha = ops.adapt_datetimefield_value(fecha)
+        filters.append('(fecha > %s OR (fecha = %s AND (id > %s OR (id = %s AND leg > %s))))')
+        filter_params += [fecha, fecha, movement_id, movement_id, leg]
+
+    sql = f"""
+        WITH segmented AS (
+            SELECT e.*, SUM(is_set) OVER (PARTITION BY zone_id ORDER BY {order} ROWS UNBOUNDED PRECEDING) AS segment
+            FROM ({entries_sql(connection, where, zone_filter=bool(zone_id), opening_where=opening_where)}) e
+        ), balances AS (
+            SELECT s.*, SUM(delta) OVER (
+                PARTITION BY zone_id, segment ORDER BY {order} ROWS UNBOUNDED PRECEDING
+            ) AS balance
+            FROM segmented s
+        ), changes AS (
+            SELECT b.*, balance - COALESCE(LAG(balance) OVER (PARTITION BY zone_id ORDER BY {order}), 0) AS change
+            FROM balances b
+        ), ledger AS (
+            SELECT c.*, SUM(change) OVER (ORDER BY {order} ROWS UNBOUNDED PRECEDING) AS product_balance
+            FROM changes c
+        )
+        SELECT id, leg, fecha, tipo, cantidad, zone_id, change, balance, product_balance
+        FROM ledger {'WHERE ' + ' AND '.join(filters) if filters else ''}
+        ORDER BY {order}
+        LIMIT %s
+    """
+    with connection.cursor() as db_cursor:
+        db_cursor.execute(sql, params + filter_params + [limit + 1])
+        rows = db_cursor.fetchall()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    movement_ids = {row[0] for row in rows if row[0]}
+    movements = {
+        movement['id']: movement
+        for movement in ProductMovement.objects.using(using).filter(id__in=movement_ids).values(
+            'id', 'lote', 'doc_referencia', 'motivo', 'performed_by__username',
+        )
+    }
+    zones = dict(Zone.objects.using(using).filter(id__in={row[5] for row in rows}).values_list('id', 'name'))
+
+    results = []
+    for movement_id, leg, fecha, tipo, cantidad, row_zone, change, balance, product_balance in rows:
+        movement = movements.get(movement_id, {})
+        change = to_decimal(change)
+        results.append({
+            'movement_id': movement_id or None,
+            'fecha': to_datetime(fecha),
+            'tipo': tipo,
+            'zone_id': row_zone,
+            'zone': zones.get(row_zone),
+            'cantidad': to_decimal(cantidad),
+            'entrada': change if change > 0 else Decimal('0'),
+            'salida': -change if change < 0 else Decimal('0'),
+            'balance': to_decimal(balance),
+            'product_balance': to_decimal(product_balance),
+            'lote': movement.get('lote'),
+            'doc_referencia': movement.get('doc_referencia'),
+            'motivo': movement.get('motivo'),
+            'performed_by': movement.get('performed_by__username'),
+        })
+    next_cursor = None
+    if has_more and results:
+        last = rows[-1]
+        next_cursor = encode_cursor(to_datetime(last[2]), last[0], last[1])
+    return results, next_cursor
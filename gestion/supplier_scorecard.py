@@ -0,0 +1,230 @@
+# gestion/supplier_scorecard.py
+"""
+Scorecard de proveedores: lead time real vs declarado, tasa de cumplimiento
+(fill rate), entregas a tiempo, cancelaciones y gasto por mes.
+
+- compute(): una consulta agrupada por (proveedor, mes de emisión) sobre
+  SupplierOrder; los totales de ítems de cada orden (unidades pedidas y
+  recibidas, valor recibido) son subconsultas correlacionadas. Las órdenes en
+  borrador no cuentan.
+- El resultado se cachea en SupplierScoreMonth (solo conteos y sumas).
+  refresh() recalcula solo los meses de los proveedores con órdenes
+  modificadas desde la última actualización (SupplierOrder.updated_at); las
+  órdenes eliminadas o cambiadas de proveedor se reflejan con force
+  (programar a diario).
+- scorecard() y actual_lead_times() leen solo la tabla cacheada (el reporte
+  también: refresh() corre en la tarea reports.suppliers o el comando
+  supplier_scorecard, nunca en un GET): la reposición (reorder.py) y el pronóstico (forecasting.py) usan el lead time
+  real sin recorrer el historial de órdenes.
+"""
+import time
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (
+    Avg, Count, DateField, DecimalField, DurationField, ExpressionWrapper, F, Max, OuterRef, Q, Subquery, Sum,
+)
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+from .models import ProductSupplier, SupplierOrder, SupplierOrderItem, SupplierScoreMonth, SupplierScorecardRun
+
+# Órdenes recibidas mínimas para confiar en el lead time real de un proveedor
+LEAD_TIME_MIN_ORDERS = getattr(settings, 'SUPPLIER_LEAD_TIME_MIN_ORDERS', 3)
+# Meses considerados para el lead time real
+LEAD_TIME_MONTHS = getattr(settings, 'SUPPLIER_LEAD_TIME_MONTHS', 12)
+SUM_FIELDS = (
+    'orders', 'received_orders', 'cancelled_orders', 'orders_with_expected', 'on_time_orders',
+    'lead_time_days_total', 'units_ordered', 'units_received', 'spend',
+)
+
+
+def _month_start(day):
+    return timezone.make_aware(datetime(day.year, day.month, 1))
+
+
+def _next_month(day):
+    return day.replace(year=day.year + day.month // 12, month=day.month % 12 + 1, day=1)
+
+
+def _months_ago(months):
+    today = timezone.localdate().replace(day=1)
+    total = today.year * 12 + today.month - 1 - (months - 1)
+    return today.replace(year=total // 12, month=total % 12 + 1)
+
+
+# ==================== CÁLCULO ====================
+def compute(condition=Q()):
+    """Filas SupplierScoreMonth de las órdenes (no borrador) que cumplen `condition`"""
+    items = SupplierOrderItem.objects.filter(order_id=OuterRef('pk')).values('order_id')
+    received_units = Coalesce('received_quantity', 'quantity')
+
+    def items_total(expression, output_field):
+        return Subquery(items.annotate(total=Sum(expression)).values('total')[:1], output_field=output_field)
+
+    received = Q(status='RECEIVED', received_date__isnull=False)
+    rows = SupplierOrder.objects.exclude(status='DRAFT').filter(condition).annotate(
+        month=TruncMonth('order_date', output_field=DateField()),
+        ordered_units=items_total('quantity', DecimalField(max_digits=18, decimal_places=0)),
+        received_units=items_total(received_units, DecimalField(max_digits=18, decimal_places=0)),
+        received_value=items_total(received_units * F('unit_price'), DecimalField(max_digits=16, decimal_places=2)),
+        lead_time=ExpressionWrapper(F('received_date') - F('order_date'), output_field=DurationField()),
+    ).values('supplier_id', 'month').annotate(
+        order_count=Count('id'),
+        received_count=Count('id', filter=received),
+        cancelled_count=Count('id', filter=Q(status='CANCELLED')),
+        expected_count=Count('id', filter=received & Q(expected_delivery_date__isnull=False)),
+        on_time_count=Count('id', filter=received & Q(received_date__date__lte=F('expected_delivery_date'))),
+        lead_time_total=Sum('lead_time', filter=received),
+        ordered_total=Sum('ordered_units', filter=received),
+        received_total=Sum('received_units', filter=received),
+        spend_total=Sum('received_value', filter=received),
+    ).order_by()
+
+    return [
+        SupplierScoreMonth(
+            supplier_id=row['supplier_id'], month=row['month'],
+            orders=row['order_count'], received_orders=row['received_count'],
+            cancelled_orders=row['cancelled_count'], orders_with_expected=row['expected_count'],
+            on_time_orders=row['on_time_count'],
+            lead_time_days_total=Decimal(row['lead_time_total'].total_seconds() / 86400).quantize(Decimal('0.0001'))
+            if row['lead_time_total'] else Decimal('0'),
+            units_ordered=row['ordered_total'] or 0, units_received=row['received_total'] or 0,
+            spend=row['spend_total'] or Decimal('0'),
+        )
+        for row in rows
+    ]
+
+
+def refresh(force=False):
+    """
+    Actualiza la tabla cacheada: completa la primera vez o con force; si no,
+    solo los meses de los proveedores con órdenes modificadas. Retorna
+    (SupplierScorecardRun, recalculado).
+    """
+    started = time.monotonic()
+    last_run = SupplierScorecardRun.objects.first()
+    # La marca de agua se lee antes de calcular: lo modificado durante el cálculo entra la próxima vez
+    watermark = SupplierOrder.objects.aggregate(last=Max('updated_at'))['last']
+    full = force or last_run is None or last_run.last_updated_at is None
+
+    if not full and (watermark is None or watermark <= last_run.last_updated_at):
+        return last_run, False
+
+    with transaction.atomic():
+        if full:
+            rows = compute()
+            SupplierScoreMonth.objects.all().delete()
+        else:
+            # Rango de meses tocados por proveedor (un rango por proveedor, no por mes)
+            touched = defaultdict(list)
+            for supplier_id, month in SupplierOrder.objects.filter(
+                updated_at__gt=last_run.last_updated_at,
+            ).annotate(month=TruncMonth('order_date', output_field=DateField())).values_list(
+                'supplier_id', 'month',
+            ).distinct():
+                touched[supplier_id].append(month)
+            orders, buckets = Q(pk__in=[]), Q(pk__in=[])
+            for supplier_id, months in touched.items():
+                first, last = min(months), max(months)
+                orders |= Q(
+                    supplier_id=supplier_id,
+                    order_date__gte=_month_start(first), order_date__lt=_month_start(_next_month(last)),
+                )
+                buckets |= Q(supplier_id=supplier_id, month__gte=first, month__lte=last)
+            rows = compute(orders)
+            SupplierScoreMonth.objects.filter(buckets).delete()
+        SupplierScoreMonth.objects.bulk_create(rows, batch_size=1000)
+        run = SupplierScorecardRun.objects.create(
+            last_updated_at=watermark, full=full, rows_written=len(rows),
+            duration_ms=int((time.monotonic() - started) * 1000),
+        )
+        # Solo se conserva el historial reciente de actualizaciones
+        SupplierScorecardRun.objects.filter(
+            pk__in=list(SupplierScorecardRun.objects.values_list('pk', flat=True)[20:]),
+        ).delete()
+    return run, True
+
+
+# ==================== CONSULTAS ====================
+def _ratio(numerator, denominator, digits=4):
+    return round(float(numerator) / float(denominator), digits) if denominator else None
+
+
+def _indicators(totals):
+    """Indicadores derivados de las sumas de un conjunto de meses"""
+    actual = _ratio(totals['lead_time_days_total'], totals['received_orders'], 2)
+    closed = totals['received_orders'] + totals['cancelled_orders']
+    return {
+        'orders': totals['orders'],
+        'received_orders': totals['received_orders'],
+        'cancelled_orders': totals['cancelled_orders'],
+        'cancellation_rate': _ratio(totals['cancelled_orders'], closed),
+        'fill_rate': _ratio(totals['units_received'], totals['units_ordered']),
+        'on_time_rate': _ratio(totals['on_time_orders'], totals['orders_with_expected']),
+        'actual_lead_time': actual,
+        'units_ordered': totals['units_ordered'],
+        'units_received': totals['units_received'],
+        'spend': Decimal(totals['spend'] or 0).quantize(Decimal('0.01')),
+    }
+
+
+def scorecard(month_from=None, month_to=None, supplier_id=None, monthly=False):
+    """
+    Indicadores por proveedor en el rango de meses (desde la tabla cacheada),
+    con el lead time declarado (promedio de ProductSupplier.lead_time_dias) y
+    la diferencia con el real. Con monthly, la serie mensual de cada proveedor.
+    """
+    rows = SupplierScoreMonth.objects.all()
+    if month_from:
+        rows = rows.filter(month__gte=month_from.replace(day=1))
+    if month_to:
+        rows = rows.filter(month__lte=month_to)
+    if supplier_id:
+        rows = rows.filter(supplier_id=supplier_id)
+
+    declared = dict(
+        ProductSupplier.objects.filter(**({'supplier_id': supplier_id} if supplier_id else {}))
+        .values('supplier_id').annotate(avg=Avg('lead_time_dias')).order_by().values_list('supplier_id', 'avg')
+    )
+    results = []
+    for totals in rows.values('supplier_id', 'supplier__razon_social').annotate(
+        **{field: Sum(field) for field in SUM_FIELDS},
+    ).order_by('-spend', 'supplier_id'):
+        result = {'supplier_id': totals['supplier_id'], 'supplier': totals['supplier__razon_social']}
+        result.update(_indicators(totals))
+        result['declared_lead_time'] = round(float(declared[totals['supplier_id']]), 2) if declared.get(totals['supplier_id']) is not None else None
+        result['lead_time_delta'] = (
+            round(result['actual_lead_time'] - result['declared_lead_time'], 2)
+            if result['actual_lead_time'] is not None and result['declared_lead_time'] is not None else None
+        )
+        results.append(result)
+
+    if monthly:
+        series = defaultdict(list)
+        for row in rows.order_by('supplier_id', 'month').values('supplier_id', 'month', *SUM_FIELDS):
+            series[row['supplier_id']].append(dict(_indicators(row), month=row['month']))
+        for result in results:
+            result['months'] = series[result['supplier_id']]
+    return results
+
+
+def actual_lead_times(supplier_ids=None, months=None, min_orders=None):
+    """
+    Lead time real promedio (días) por proveedor en los últimos `months` meses,
+    solo para proveedores con al menos `min_orders` órdenes recibidas.
+    """
+    min_orders = LEAD_TIME_MIN_ORDERS if min_orders is None else min_orders
+    rows = SupplierScoreMonth.objects.filter(month__gte=_months_ago(months or LEAD_TIME_MONTHS))
+    if supplier_ids is not None:
+        rows = rows.filter(supplier_id__in=supplier_ids)
+    return {
+        row['supplier_id']: float(row['lead_time']) / row['received']
+        for row in rows.values('supplier_id').annotate(
+            lead_time=Sum('lead_time_days_total'), received=Sum('received_orders'),
+        ).order_by()
+        if row['received'] and row['received'] >= min_orders
+    }
@@ -0,0 +1,147 @@
+# gestion/tasks.py
+"""
+Tareas en segundo plano (ver gestion/jobs.py). Cada tarea recibe el contexto
+(ctx.job, ctx.progress) y los parámetros JSON del Job, y retorna un resultado
+serializable a JSON.
+"""
+import os
+
+from django.contrib.auth.models import User
+
+from .abc_analysis import refresh
+from .exports import DATASETS, iter_csv, write_xlsx
+from .forecasting import apply_suggestions, forecast
+from .inventory_snapshots import take_snapshot
+from .jobs import JobError, job_file, job_files_dir, task
+from .models import Zone
+from .movement_archive import archive as archive_movements, cutoff_for
+from .product_import import import_products
+from .reorder import create_draft_orders, reorder_suggestions
+from .sales_rollups import catch_up
+from .supplier_scorecard import refresh as refresh_scorecard
+
+
+@task('products.import', max_attempts=1, public=False)
+def import_products_task(ctx, upload, filename, dry_run=False):
+    """
+    Importación masiva de productos desde un archivo subido (ver product_import.py).
+    `upload` es el nombre del archivo en job_files_dir() que guardó la vista.
+    """
+    path = job_file(upload)
+    if path is None or not upload.startswith('import_'):
+        raise JobError('Archivo de importación inválido')
+    if not path.is_file():
+        raise JobError('El archivo a importar ya no existe')
+    size = os.path.getsize(path) or 1
+
+    with open(path, 'rb') as fh:
+        def progress(report):
+            ctx.progress(min(99, fh.tell() * 100 // size), f'{report.rows} filas procesadas')
+
+        report = import_products(fh, filename, dry_run=dry_run, progress=progress)
+
+    os.remove(path)
+    result = report.to_dict()
+    result['dry_run'] = dry_run
+    return result
+
+
+@task('exports.export', max_attempts=2)
+def export_task(ctx, dataset, file_format, params=None):
+    """Exportación CSV/XLSX a un archivo descargable en /api/jobs/<id>/download/"""
+    export = DATASETS.get(dataset)
+    if export is None or file_format not in ('csv', 'xlsx'):
+        raise JobError('Exportación no encontrada')
+
+    path = job_files_dir() / f'job_{ctx.job.pk}.{file_format}'
+    ctx.progress(0, 'Generando archivo', force=True)
+    if file_format == 'csv':
+        with open(path, 'w', encoding='utf-8', newline='') as fh:
+            for written, chunk in enumerate(iter_csv(export, params or {})):
+                fh.write(chunk)
+                ctx.progress(0, f'{written} bloques escritos')
+    else:
+        with open(path, 'wb') as fh:
+            write_xlsx(export, params or {}, fh)
+    return {'file': path.name, 'size': path.stat().st_size}
+
+
+@task('firebase.sync_users', max_attempts=3)
+def sync_firebase_users_task(ctx, user_ids=None):
+    """Sincroniza usuarios de Django con Firebase (todos o los indicados)"""
+    from .firebase_service import initialize_firebase, sync_django_user_to_firebase
+
+    initialize_firebase()
+    users = User.objects.exclude(email='').exclude(email__isnull=True).order_by('id')
+    if user_ids:
+        users = users.filter(id__in=user_ids)
+    total = users.count() or 1
+    synced, failed = 0, []
+    for index, user in enumerate(users.iterator(), start=1):
+        if sync_django_user_to_firebase(user):
+            synced += 1
+        else:
+            failed.append(user.username)
+        ctx.progress(index * 100 // total, f'{index}/{total} usuarios')
+    return {'synced': synced, 'failed': failed}
+
+
+@task('reports.sales_rollup', max_attempts=3)
+def sales_rollup_task(ctx):
+    """Catch-up de los resúmenes de ventas (días cerrados desde la marca de agua)"""
+    return catch_up()
+
+
+@task('reports.abc', max_attempts=2)
+def abc_refresh_task(ctx, window_days=None, force=False):
+    """Actualiza la clasificación ABC de productos (solo si hay datos nuevos o con force)"""
+    run, computed = refresh(window_days=window_days, force=force)
+    return {'computed': computed, 'run': run.pk, 'products': run.products, 'duration_ms': run.duration_ms}
+
+
+@task('inventory.snapshot', max_attempts=3)
+def inventory_snapshot_task(ctx):
+    """Foto diaria del inventario (filas cambiadas desde la anterior)"""
+    run = take_snapshot()
+    return {'date': run.date.isoformat(), 'rows': run.rows_written, 'duration_ms': run.duration_ms}
+
+
+@task('orders.reorder', max_attempts=1)
+def reorder_task(ctx, zone_id, warehouse_id=None, categoria=None, supplier_id=None):
+    """Órdenes borrador por proveedor para los productos bajo su punto de reorden"""
+    zone = Zone.objects.filter(pk=zone_id, is_active=True).first()
+    if zone is None:
+        raise JobError('Zona no encontrada o inactiva')
+    suggestions, without_supplier = reorder_suggestions(
+        warehouse_id=warehouse_id or zone.warehouse_id, categoria=categoria, supplier_id=supplier_id,
+    )
+    orders = create_draft_orders(suggestions, zone, user=ctx.job.created_by)
+    return {'orders': [order.pk for order in orders], 'items': len(suggestions), 'without_supplier': len(without_supplier)}
+
+
+@task('products.forecast', max_attempts=1)
+def forecast_task(ctx, window_days=None, categoria=None, apply=False, min_sale_days=7):
+    """Pronóstico de demanda del catálogo; con apply escribe punto_reorden / stock_minimo sugeridos"""
+    results, summary = forecast(window_days=window_days, categoria=categoria)
+    ctx.progress(90, f"{summary['products']} productos calculados")
+    result = {key: str(value) if key in ('date_from', 'date_to') else value for key, value in summary.items()}
+    if apply:
+        result['updated'], result['over_max'] = apply_suggestions(results, min_sale_days=min_sale_days)
+    return result
+
+
+@task('reports.suppliers', max_attempts=2)
+def supplier_scorecard_task(ctx, force=False):
+    """Actualiza el scorecard de proveedores (incremental, o completo con force)"""
+    run, computed = refresh_scorecard(force=force)
+    return {'computed': computed, 'full': run.full, 'rows': run.rows_written, 'duration_ms': run.duration_ms}
+
+
+@task('movements.archive', max_attempts=1)
+def archive_movements_task(ctx, months=None):
+    """Archiva los movimientos anteriores a los últimos `months` meses (ver movement_archive.py)"""
+    run, archived = archive_movements(cutoff_for(months))
+    return {
+        'archived': archived, 'cutoff': run.cutoff.isoformat(),
+        'rows': run.rows_archived if archived else 0, 'chunks': run.chunks_written if archived else 0,
+    }
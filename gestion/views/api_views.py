@@ -10,6 +10,7 @@ import json
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from .. import lots
 from ..models import Inventory, Zone, Product, Sale, SaleItem, Client, SupplierOrder, SupplierOrderItem, ProductSupplier
 
 @login_required
@@ -275,9 +276,10 @@ def process_sale(request):
                     price_at_sale=sale_price
                 )
                 
-                # Descontar stock
+                # Descontar stock (y de los lotes en orden FEFO)
                 inventory.quantity -= quantity
                 inventory.save()
+                lots.allocate(product.pk, sales_zone.pk, quantity)
                 
                 total_amount += item_price
             
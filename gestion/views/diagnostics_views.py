@@ -0,0 +1,53 @@
+# gestion/views/diagnostics_views.py
+
+import hmac
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from ..auth_utils import is_admin
+from ..metrics import render_exposition
+from ..profiling import list_profiles, get_profile_path
+
+
+# ==================== MÉTRICAS ====================
+def metrics(request):
+    """
+    Exposición de métricas en formato Prometheus.
+    Acceso con METRICS_TOKEN (Authorization: Bearer) o sesión de administrador.
+    """
+    token = settings.METRICS_TOKEN
+    auth_header = request.META.get('HTTP_AUTHORIZATION', '')
+    if token and hmac.compare_digest(auth_header, f'Bearer {token}'):
+        allowed = True
+    else:
+        allowed = request.user.is_authenticated and is_admin(request.user)
+    if not allowed:
+        return HttpResponse('Forbidden\n', status=403, content_type='text/plain')
+    return HttpResponse(render_exposition(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# ==================== PERFILES DE REQUESTS ====================
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def profile_list(request):
+    """Lista los perfiles guardados por ProfilingMiddleware (solo admin)"""
+    if not is_admin(request.user):
+        return Response({'error': 'No tienes permisos'}, status=status.HTTP_403_FORBIDDEN)
+    return Response({'results': list_profiles()})
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def profile_download(request, profile_id):
+    """Descarga un perfil (.prof o .collapsed) por su id (solo admin)"""
+    if not is_admin(request.user):
+        return Response({'error': 'No tienes permisos'}, status=status.HTTP_403_FORBIDDEN)
+    path = get_profile_path(profile_id)
+    if path is None:
+        return Response({'error': 'Perfil no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+    return FileResponse(path.open('rb'), as_attachment=True, filename=path.name)
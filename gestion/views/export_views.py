@@ -0,0 +1,65 @@
+# gestion/views/export_views.py
+
+import tempfile
+
+from django.db import router
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from ..auth_utils import is_admin, is_bodega_or_admin, is_ventas_or_admin
+from ..exports import DATASETS, FORMATS, iter_csv, write_xlsx
+from ..jobs import enqueue
+from ..serializers import JobSerializer
+
+# Permiso requerido por exportación
+EXPORT_PERMISSIONS = {
+    'products': is_bodega_or_admin,
+    'inventory': is_bodega_or_admin,
+    'movements': is_bodega_or_admin,
+    'sales': is_ventas_or_admin,
+    'valuation': is_admin,
+}
+
+
+# ==================== EXPORTACIONES ====================
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_data(request, dataset, file_format):
+    """
+    Exporta productos, inventario, movimientos, ventas o valorización a CSV/XLSX.
+    Ej: /api/export/movements.csv?date_from=2025-01-01&date_to=2025-01-31
+    Con ?async=1 se genera en segundo plano: retorna 202 con la tarea y el archivo
+    se descarga en /api/jobs/<id>/download/.
+    """
+    export = DATASETS.get(dataset)
+    if export is None or file_format not in FORMATS:
+        return Response({'error': 'Exportación no encontrada'}, status=status.HTTP_404_NOT_FOUND)
+    if not EXPORT_PERMISSIONS[dataset](request.user):
+        return Response({'error': 'No tienes permisos'}, status=status.HTTP_403_FORBIDDEN)
+
+    params = request.query_params
+    error = export.validate(params)
+    if error:
+        return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+    if params.get('async') in ('1', 'true'):
+        job_params = {key: value for key, value in params.dict().items() if key != 'async'}
+        job = enqueue('exports.export', {'dataset': dataset, 'file_format': file_format, 'params': job_params}, user=request.user)
+        return Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+    # La base se elige aquí: el cuerpo se genera después de que los middlewares terminan
+    using = router.db_for_read(export.model)
+    filename = f"{dataset}_{timezone.localtime().strftime('%Y%m%d_%H%M%S')}.{file_format}"
+
+    if file_format == 'csv':
+        response = StreamingHttpResponse(iter_csv(export, params, using), content_type=FORMATS['csv'])
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    tmp = tempfile.TemporaryFile()
+    write_xlsx(export, params, tmp, using)
+    tmp.seek(0)
+    return FileResponse(tmp, as_attachment=True, filename=filename, content_type=FORMATS['xlsx'])
@@ -0,0 +1,79 @@
+# gestion/views/job_views.py
+
+from django.http import FileResponse
+from django.shortcuts import get_object_or_404
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from ..auth_utils import is_admin
+from ..db_routers import read_from_primary
+from ..jobs import enqueue, job_files_dir, public_tasks
+from ..models import Job
+from ..serializers import JobSerializer
+
+JOB_LIST_LIMIT = 50
+
+
+def _can_view(user, job):
+    return is_admin(user) or user.is_superuser or job.created_by_id == user.id
+
+
+# ==================== TAREAS EN SEGUNDO PLANO ====================
+# El estado de las tareas lo escriben los workers: se lee siempre de la base principal
+# (con la réplica, el polling vería el avance con retraso y la descarga podría dar 404)
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+@read_from_primary()
+def job_list(request):
+    """
+    GET: últimas tareas del usuario (todas para admin, ?status=PENDING|RUNNING|...).
+    POST (admin): encola una tarea pública {"name": "firebase.sync_users", "params": {}}.
+    """
+    admin = is_admin(request.user) or request.user.is_superuser
+    if request.method == 'POST':
+        if not admin:
+            return Response({'error': 'No tienes permisos'}, status=status.HTTP_403_FORBIDDEN)
+        available = public_tasks()
+        name = request.data.get('name')
+        params = request.data.get('params') or {}
+        if name not in available:
+            return Response({'error': 'Tarea no registrada', 'available': available}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(params, dict):
+            return Response({'error': 'params debe ser un objeto'}, status=status.HTTP_400_BAD_REQUEST)
+        job = enqueue(name, params, user=request.user)
+        return Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+    jobs = Job.objects.select_related('created_by')
+    if not admin:
+        jobs = jobs.filter(created_by=request.user)
+    if request.query_params.get('status'):
+        jobs = jobs.filter(status=request.query_params['status'].upper())
+    return Response({'results': JobSerializer(jobs[:JOB_LIST_LIMIT], many=True).data})
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@read_from_primary()
+def job_detail(request, job_id):
+    """Estado y avance de una tarea (para polling desde el frontend)"""
+    job = get_object_or_404(Job.objects.select_related('created_by'), pk=job_id)
+    if not _can_view(request.user, job):
+        return Response({'error': 'No tienes permisos'}, status=status.HTTP_403_FORBIDDEN)
+    return Response(JobSerializer(job).data)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@read_from_primary()
+def job_download(request, job_id):
+    """Descarga el archivo generado por una tarea (ej. exportación)"""
+    job = get_object_or_404(Job, pk=job_id)
+    if not _can_view(request.user, job):
+        return Response({'error': 'No tienes permisos'}, status=status.HTTP_403_FORBIDDEN)
+    filename = (job.result or {}).get('file') if job.status == Job.STATUS_SUCCEEDED else None
+    path = job_files_dir() / filename if filename else None
+    if path is None or not path.is_file():
+        return Response({'error': 'La tarea no tiene un archivo disponible'}, status=status.HTTP_404_NOT_FOUND)
+    return FileResponse(path.open('rb'), as_attachment=True, filename=f'{job.name.split(".")[-1]}_{job.pk}{path.suffix}')
@@ -0,0 +1,269 @@
+# gestion/views/report_views.py
+
+from datetime import timedelta
+
+from django.db import router
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from ..abc_analysis import CLASS_FIELDS, abc_summary
+from ..auth_utils import is_admin, is_bodega_or_admin, is_ventas_or_admin
+from ..db_routers import read_from_primary
+from ..exports import DATASETS, FORMATS, iter_csv, iter_json, parse_date_param, unit_cost
+from ..jobs import enqueue
+from ..lots import EXPIRY_ALERT_DAYS, expiring
+from ..models import AbcRun, Job, SupplierScorecardRun
+from ..sales_rollups import DIMENSIONS, sales_summary
+from ..supplier_scorecard import scorecard
+
+# Rango máximo de días por consulta
+REPORT_MAX_DAYS = 3660
+
+
+def _date_range(params, default_days=30):
+    """
+    Rango date_from/date_to (YYYY-MM-DD); por defecto los últimos `default_days` días.
+    Retorna (date_from, date_to, error); con error las fechas son None.
+    """
+    for name in ('date_from', 'date_to'):
+        if params.get(name) and parse_date_param(params[name]) is None:
+            return None, None, f'{name} debe ser YYYY-MM-DD'
+    date_to = parse_date_param(params.get('date_to')) or timezone.localdate()
+    date_from = parse_date_param(params.get('date_from')) or date_to - timedelta(days=default_days - 1)
+    if date_from > date_to:
+        return None, None, 'date_from debe ser anterior a date_to'
+    return date_from, date_to, None
+
+
+# ==================== REPORTES DE VENTAS ====================
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def sales_summary_report(request):
+    """
+    Resumen de ventas desde las tablas de resumen diario.
+    Ej: /api/reports/sales-summary/?date_from=2025-01-01&date_to=2025-01-31&group_by=product&limit=10
+    group_by: day (default), product, category, user, client
+    """
+    if not is_ventas_or_admin(request.user):
+        return Response({'error': 'No tienes permisos'}, status=status.HTTP_403_FORBIDDEN)
+
+    params = request.query_params
+    date_from, date_to, error = _date_range(params)
+    if error:
+        return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+    if (date_to - date_from).days > REPORT_MAX_DAYS:
+        return Response({'error': f'El rango máximo es de {REPORT_MAX_DAYS} días'}, status=status.HTTP_400_BAD_REQUEST)
+
+    group_by = params.get('group_by', 'day')
+    if group_by not in DIMENSIONS:
+        return Response({'error': f'group_by debe ser uno de: {", ".join(DIMENSIONS)}'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = min(max(int(params.get('limit', 20)), 1), 500)
+    except ValueError:
+        limit = 20
+
+    data = sales_summary(date_from, date_to, group_by, limit)
+    data['date_from'] = date_from
+    data['date_to'] = date_to
+    return Response(data)
+
+
+# ==================== CLASIFICACIÓN ABC ====================
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def abc_report(request):
+    """
+    Clasificación ABC (Pareto) cacheada de productos.
+    Ej: /api/reports/abc/?by=revenue&scope=category&categoria=Harinas&class=A&limit=50
+    by: revenue (default), volume. scope: global (default), category, warehouse (&warehouse=<id>, solo volumen)
+    Lee solo la tabla cacheada; si aún no hay cálculo encola la tarea reports.abc y responde
+    vacío con pending=true y job_id (la mantienen el comando abc_analysis y la tarea).
+    POST (admin): encola el recálculo {"force": true, "window_days": 90}
+    """
+    if request.method == 'POST':
+        if not (is_admin(request.user) or request.user.is_superuser):
+            return Response({'error': 'No tienes permisos'}, status=status.HTTP_403_FORBIDDEN)
+        params = {'force': bool(request.data.get('force', True))}
+        if request.data.get('window_days'):
+            try:
+                params['window_days'] = max(int(request.data['window_days']), 1)
+            except (TypeError, ValueError):
+                return Response({'error': 'window_days debe ser un entero'}, status=status.HTTP_400_BAD_REQUEST)
+        job = enqueue('reports.abc', params, user=request.user)
+        return Response({'job_id': job.pk, 'status': job.status}, status=status.HTTP_202_ACCEPTED)
+
+    if not is_ventas_or_admin(request.user):
+        return Response({'error': 'No tienes permisos'}, status=status.HTTP_403_FORBIDDEN)
+
+    params = request.query_params
+    by = params.get('by', 'revenue')
+    scope = params.get('scope', 'global')
+    if (by, scope) not in CLASS_FIELDS:
+        return Response({'error': 'by debe ser revenue o volume; scope global, category o warehouse (solo volume)'}, status=status.HTTP_400_BAD_REQUEST)
+    warehouse_id = params.get('warehouse')
+    if scope == 'warehouse' and not (warehouse_id or '').isdigit():
+        return Response({'error': 'scope=warehouse requiere warehouse=<id>'}, status=status.HTTP_400_BAD_REQUEST)
+    abc_class = (params.get('class') or '').upper() or None
+    if abc_class not in (None, 'A', 'B', 'C'):
+        return Response({'error': 'class debe ser A, B o C'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = min(max(int(params.get('limit', 50)), 0), 1000)
+    except ValueError:
+        limit = 50
+
+    data = abc_summary(
+        by=by, scope=scope, categoria=params.get('categoria'),
+        warehouse_id=int(warehouse_id) if scope == 'warehouse' else None, abc_class=abc_class, limit=limit,
+    )
+    run = AbcRun.objects.first()
+    if run is None:
+        # Nunca calculada: el cálculo (con el catch-up de ventas) no se hace dentro del request.
+        # La tarea pendiente se busca en la principal para no encolarla dos veces por el retraso de la réplica
+        with read_from_primary():
+            job = Job.objects.filter(
+                name='reports.abc', status__in=[Job.STATUS_PENDING, Job.STATUS_RUNNING],
+            ).order_by('-id').first() or enqueue('reports.abc', {}, user=request.user)
+        data.update({'date_from': None, 'date_to': None, 'computed_at': None, 'pending': True, 'job_id': job.pk})
+        return Response(data)
+    data.update({'date_from': run.date_from, 'date_to': run.date_to, 'computed_at': run.computed_at, 'pending': False})
+    return Response(data)
+
+
+# ==================== VALORIZACIÓN DE INVENTARIO ====================
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def inventory_valuation_report(request):
+    """
+    Valorización de inventario (stock × costo promedio, o estándar si no hay) en streaming.
+    Ej: /api/reports/valuation/?group_by=warehouse&categoria=Harinas&output=csv
+    group_by: detail (default), warehouse, zone, category, product. output: json (default), csv
+    (?format lo reserva DRF para la negociación de contenido).
+    Filtros: warehouse, zone, categoria, include_zero=1. Stock a una fecha: as_of=YYYY-MM-DD[THH:MM].
+    """
+    if not is_admin(request.user):
+        return Response({'error': 'No tienes permisos'}, status=status.HTTP_403_FORBIDDEN)
+
+    export = DATASETS['valuation']
+    params = request.query_params
+    group_by = params.get('group_by', 'detail')
+    if group_by not in export.GROUPINGS:
+        return Response({'error': f'group_by debe ser uno de: {", ".join(export.GROUPINGS)}'}, status=status.HTTP_400_BAD_REQUEST)
+    file_format = params.get('output', 'json')
+    if file_format not in ('json', 'csv'):
+        return Response({'error': 'output debe ser json o csv'}, status=status.HTTP_400_BAD_REQUEST)
+
+    error = export.validate(params)
+    if error:
+        return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+
+    # La base se elige aquí: el cuerpo se genera después de que los middlewares terminan
+    using = router.db_for_read(export.model)
+    if file_format == 'csv':
+        filename = f"valorizacion_{group_by}_{timezone.localtime().strftime('%Y%m%d_%H%M%S')}.csv"
+        response = StreamingHttpResponse(iter_csv(export, params, using), content_type=FORMATS['csv'])
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    extra = {'group_by': group_by, 'as_of': params.get('as_of'), 'generated_at': timezone.now()}
+    return StreamingHttpResponse(
+        iter_json(export, params, using, totals=('quantity', 'value'), extra=extra),
+        content_type='application/json',
+    )
+
+
+# ==================== PROVEEDORES ====================
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def supplier_scorecard_report(request):
+    """
+    Scorecard de proveedores: lead time real vs declarado, fill rate, entregas a tiempo,
+    cancelaciones y gasto. Ej: /api/reports/suppliers/?date_from=2025-01-01&date_to=2025-12-31&supplier=3&monthly=1
+    Rango por mes de emisión de las órdenes (default: últimos 12 meses). monthly=1 agrega la serie mensual.
+    Lee solo la tabla cacheada (refreshed_at indica su última actualización); la actualizan
+    la tarea reports.suppliers y el comando supplier_scorecard.
+    POST (admin): encola el recálculo completo (refleja órdenes eliminadas).
+    """
+    if request.method == 'POST':
+        if not is_admin(request.user):
+            return Response({'error': 'No tienes permisos'}, status=status.HTTP_403_FORBIDDEN)
+        job = enqueue('reports.suppliers', {'force': True}, user=request.user)
+        return Response({'job_id': job.pk, 'status': job.status}, status=status.HTTP_202_ACCEPTED)
+
+    if not is_bodega_or_admin(request.user):
+        return Response({'error': 'No tienes permisos'}, status=status.HTTP_403_FORBIDDEN)
+
+    params = request.query_params
+    date_from, date_to, error = _date_range(params, default_days=365)
+    if error:
+        return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+    supplier_id = params.get('supplier')
+    if supplier_id and not supplier_id.isdigit():
+        return Response({'error': 'supplier debe ser un id'}, status=status.HTTP_400_BAD_REQUEST)
+
+    run = SupplierScorecardRun.objects.first()
+    results = scorecard(
+        month_from=date_from, month_to=date_to, supplier_id=int(supplier_id) if supplier_id else None,
+        monthly=params.get('monthly') in ('1', 'true'),
+    )
+    return Response({
+        'date_from': date_from.replace(day=1), 'date_to': date_to,
+        'refreshed_at': run.refreshed_at if run else None,
+        'results': results,
+    })
+
+
+# ==================== LOTES POR VENCER ====================
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def expiring_lots_report(request):
+    """
+    Lotes con stock que vencen en los próximos días (y los ya vencidos), del más próximo al más lejano.
+    Ej: /api/reports/expiring/?days=15&warehouse=1&categoria=Helados&include_expired=0&limit=200
+    days: por defecto LOT_EXPIRY_ALERT_DAYS. Filtros: warehouse, zone, categoria.
+    """
+    if not is_bodega_or_admin(request.user):
+        return Response({'error': 'No tienes permisos'}, status=status.HTTP_403_FORBIDDEN)
+
+    params = request.query_params
+    try:
+        days = max(int(params.get('days', EXPIRY_ALERT_DAYS)), 0)
+        limit = min(max(int(params.get('limit', 500)), 0), 5000)
+    except ValueError:
+        return Response({'error': 'days y limit deben ser enteros'}, status=status.HTTP_400_BAD_REQUEST)
+    for key in ('warehouse', 'zone'):
+        if params.get(key) and not params[key].isdigit():
+            return Response({'error': f'{key} debe ser un id'}, status=status.HTTP_400_BAD_REQUEST)
+
+    lots = expiring(
+        days=days, warehouse_id=params.get('warehouse'), zone_id=params.get('zone'),
+        categoria=params.get('categoria'), include_expired=params.get('include_expired', '1') not in ('0', 'false'),
+    ).annotate(unit_cost=unit_cost()).values(
+        'id', 'product_id', 'product__sku', 'product__name', 'product__categoria', 'zone_id', 'zone__name',
+        'zone__warehouse__name', 'lote', 'fecha_vencimiento', 'quantity', 'unit_cost',
+    )[:limit]
+
+    today = timezone.localdate()
+    results = [
+        {
+            'lot_id': lot['id'], 'product_id': lot['product_id'], 'sku': lot['product__sku'],
+            'name': lot['product__name'], 'categoria': lot['product__categoria'],
+            'zone_id': lot['zone_id'], 'zone': lot['zone__name'], 'warehouse': lot['zone__warehouse__name'],
+            'lote': lot['lote'], 'fecha_vencimiento': lot['fecha_vencimiento'],
+            'days_left': (lot['fecha_vencimiento'] - today).days, 'quantity': lot['quantity'],
+            'value': round(lot['unit_cost'] * lot['quantity'], 2),
+        }
+        for lot in lots
+    ]
+    return Response({
+        'days': days,
+        'until': today + timedelta(days=days),
+        'count': len(results),
+        'expired': sum(1 for row in results if row['days_left'] < 0),
+        'total_quantity': sum(row['quantity'] for row in results),
+        'total_value': sum(row['value'] for row in results),
+        'results': results,
+    })
@@ -3,27 +3,33 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from django.db.models import Q, Sum, Prefetch
+from django.db.models import DecimalField, Exists, F, OuterRef, Q, Sum, Prefetch
 from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
 from django.contrib.auth import logout as django_logout
 from django.shortcuts import get_object_or_404
+from django.utils.dateparse import parse_date
 from django.db import transaction
 from django.conf import settings
 from decimal import Decimal
 import json
+import logging
+import os
+import traceback
+import uuid
+from collections import defaultdict
 
 from ..models import (
     Product, Supplier, UserProfile, ProductMovement,
     Sale, SaleItem, SupplierOrder, SupplierOrderItem,
-    Client, Warehouse, Zone, Inventory, ProductSupplier
+    Client, Warehouse, Zone, Inventory, InventoryLot, ProductSupplier
 )
 from ..serializers import (
     ProductSerializer, SupplierSerializer, UserSerializer, UserProfileSerializer,
     ProductMovementSerializer, SaleSerializer, SaleItemSerializer,
     SupplierOrderSerializer, SupplierOrderItemSerializer,
     ClientSerializer, WarehouseSerializer, ZoneSerializer, InventorySerializer,
-    ProductSupplierSerializer
+    ProductSupplierSerializer, JobSerializer
 )
 from ..auth_utils import is_admin, is_bodega_or_admin
 from ..forms.product_forms import ProductForm
@@ -32,10 +38,26 @@ from ..forms.user_forms import UserCreateForm, UserUpdateForm, UserPasswordChang
 from ..forms.movement_forms import ProductMovementForm
 from ..forms.supplier_order_forms import SupplierOrderForm
 from ..pagination import OptimizedPageNumberPagination
+from ..product_import import import_products
+from ..product_bulk import BULK_MAX_OPERATIONS, apply_bulk_operations
+from ..jobs import enqueue, job_files_dir
+from ..sales_rollups import record_sale
+from ..abc_analysis import CLASS_FIELDS as ABC_CLASS_FIELDS
+from ..stock_ledger import KARDEX_MAX_LIMIT, ArchivedPeriodError, CursorError, kardex
+from ..inventory_snapshots import StockHistoryError, parse_moment, stock_as_of
+from ..exports import parse_date_param
+from ..reorder import create_draft_orders, reorder_suggestions
+from .. import lots
+from ..stock_alerts import ALERT_FILTERS, alert_filter, alert_type, annotate_stock
+from ..fieldsets import SparseFieldsetViewMixin
+from ..movement_archive import archived_movements, archived_periods
+from ..metrics import CHECKOUT_LINES, MOVEMENTS, INVENTORY_CONFLICTS
+
+logger = logging.getLogger(__name__)
 
 
 # ==================== PRODUCTOS ====================
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     queryset = Product.objects.filter(is_active=True)
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticated]
@@ -43,22 +65,39 @@ class ProductViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         queryset = super().get_queryset()
+        sort_by = self.request.query_params.get('sort', 'name')
         
         # OPTIMIZACIÓN CRÍTICA: Prefetch con Prefetch object para optimizar stock
         # Solo traer campos necesarios para reducir memoria y mejorar velocidad
-        stock_prefetch = Prefetch(
-            'stock',
-            queryset=Inventory.objects.select_related('zone', 'zone__warehouse').only(
-                'product_id', 'quantity', 'zone_id', 'zone__name', 'zone__warehouse__name'
+        # (solo si se van a serializar campos que leen el stock; con ?fields= inválido
+        # el serializer vuelve a la representación completa y field_requested lo refleja)
+        if any(self.field_requested(name) for name in ('stock_actual', 'alerta_bajo_stock')):
+            stock_prefetch = Prefetch(
+                'stock',
+                queryset=Inventory.objects.select_related('zone', 'zone__warehouse').only(
+                    'product_id', 'quantity', 'zone_id', 'zone__name', 'zone__warehouse__name'
+                )
             )
-        )
-        queryset = queryset.prefetch_related(stock_prefetch)
+            queryset = queryset.prefetch_related(stock_prefetch)
         
         # OPTIMIZACIÓN: Anotar stock total usando agregación directa (más rápido que Subquery)
         # Los índices compuestos en Inventory mejoran significativamente esta consulta
-        queryset = queryset.annotate(
-            total_stock=Coalesce(Sum('stock__quantity'), 0)
-        )
+        # (stock_actual y alerta_bajo_stock también la usan en vez de una consulta por fila)
+        params = self.request.query_params
+        alerts = [name for name in ALERT_FILTERS if params.get(name) in ('1', 'true')]
+        if (alerts or sort_by in ('stock', '-stock')
+                or any(self.field_requested(name) for name in ('total_stock', 'stock_actual', 'alerta_bajo_stock'))):
+            queryset = annotate_stock(queryset)
+        
+        # Lotes por vencer: un EXISTS por fila en la misma consulta
+        if self.field_requested('alerta_por_vencer'):
+            queryset = queryset.annotate(expiring_soon=Exists(
+                InventoryLot.objects.filter(lots.expiring_filter(), product_id=OuterRef('pk')),
+            ))
+        
+        # ?low_stock=true, ?out_of_stock=true, ?over_max=true (varios: cualquiera de ellos)
+        if alerts:
+            queryset = queryset.filter(alert_filter(alerts))
         
         search_query = self.request.query_params.get('q', None)
         if search_query:
@@ -70,7 +109,21 @@ class ProductViewSet(viewsets.ModelViewSet):
                 Q(categoria__icontains=search_query)
             )
         
-        sort_by = self.request.query_params.get('sort', 'name')
+        # Clasificación ABC cacheada (ver abc_analysis.py): ?abc=A o ?abc=A,B
+        # &abc_by=revenue|volume &abc_scope=global|category, o &abc_warehouse=<id> (volumen en la bodega)
+        abc = self.request.query_params.get('abc')
+        if abc:
+            classes = [value for value in abc.upper().split(',') if value in ('A', 'B', 'C')]
+            abc_by = self.request.query_params.get('abc_by', 'revenue')
+            abc_warehouse = self.request.query_params.get('abc_warehouse')
+            if abc_warehouse and abc_warehouse.isdigit():
+                abc_filter = {'abc_rows__warehouse_id': int(abc_warehouse), 'abc_rows__volume_class__in': classes}
+            else:
+                scope = 'category' if self.request.query_params.get('abc_scope') == 'category' else 'global'
+                class_field = ABC_CLASS_FIELDS.get((abc_by, scope), 'revenue_class')
+                abc_filter = {'abc_rows__warehouse__isnull': True, f'abc_rows__{class_field}__in': classes}
+            queryset = queryset.filter(**abc_filter)
+        
         sort_options = {
             'name': 'name',
             '-name': '-name',
@@ -127,9 +180,184 @@ class ProductViewSet(viewsets.ModelViewSet):
             return Response(serializer.data)
         return Response(form.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_file(self, request):
+        """
+        Importación masiva desde CSV/XLSX (campo multipart `file`).
+        Upsert por SKU; ?dry_run=1 solo valida. Retorna errores por fila y throughput.
+        Con ?async=1 se procesa en segundo plano y retorna 202 con la tarea (/api/jobs/<id>/).
+        """
+        if not (is_admin(request.user) or request.user.is_superuser):
+            return Response({'error': 'No tienes permisos'}, status=status.HTTP_403_FORBIDDEN)
+
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'Debe adjuntar un archivo CSV o XLSX en el campo "file"'}, status=status.HTTP_400_BAD_REQUEST)
+        if not upload.name.lower().endswith(('.csv', '.xlsx')):
+            return Response({'error': 'Formato no soportado (use .csv o .xlsx)'}, status=status.HTTP_400_BAD_REQUEST)
+
+        dry_run = request.query_params.get('dry_run') in ('1', 'true')
+        if request.query_params.get('async') in ('1', 'true'):
+            path = job_files_dir() / f'import_{uuid.uuid4().hex}{os.path.splitext(upload.name)[1].lower()}'
+            with open(path, 'wb') as fh:
+                for chunk in upload.chunks():
+                    fh.write(chunk)
+            job = enqueue('products.import', {'upload': path.name, 'filename': upload.name, 'dry_run': dry_run}, user=request.user)
+            return Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+        try:
+            report = import_products(upload.file, upload.name, dry_run=dry_run)
+        except Exception as e:
+            logger.warning('Importación de productos fallida (%s): %s', upload.name, e)
+            return Response({'error': f'No se pudo leer el archivo: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+
+        result = report.to_dict()
+        result['dry_run'] = dry_run
+        logger.info(
+            'Importación de productos %s: %d filas, %d creadas, %d actualizadas, %d con error',
+            upload.name, report.rows, report.created, report.updated, report.failed,
+        )
+        return Response(result)
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request):
+        """
+        Altas, ediciones parciales y desactivaciones masivas en una sola petición.
+        Body: {"operations": [{"op": "update", "id": 1, "data": {"precio_venta": "990"}}, ...],
+               "atomic": false}
+        Retorna un resultado compacto por operación (sin re-serializar productos).
+        """
+        if not (is_admin(request.user) or request.user.is_superuser):
+            return Response({'error': 'No tienes permisos'}, status=status.HTTP_403_FORBIDDEN)
+
+        operations = request.data.get('operations') if isinstance(request.data, dict) else request.data
+        if not isinstance(operations, list) or not operations:
+            return Response({'error': 'Debe enviar una lista de operaciones en "operations"'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(operations) > BULK_MAX_OPERATIONS:
+            return Response(
+                {'error': f'Máximo {BULK_MAX_OPERATIONS} operaciones por petición'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        atomic = isinstance(request.data, dict) and request.data.get('atomic') in (True, 'true', '1')
+        results, summary = apply_bulk_operations(operations, atomic=atomic)
+        response_status = status.HTTP_200_OK
+        if summary['failed'] and (atomic or summary['failed'] == len(operations)):
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response({'summary': summary, 'results': results}, status=response_status)
+
+    @action(detail=False, methods=['get'], url_path='stock-alerts')
+    def stock_alerts(self, request):
+        """
+        Productos con alerta de stock y su déficit/exceso (paginado, mayor déficit primero).
+        Filtros: ?type=low_stock,out_of_stock,over_max (default todas), ?warehouse=<id>, ?categoria=
+        """
+        if not is_bodega_or_admin(request.user):
+            return Response({'error': 'No tienes permisos'}, status=status.HTTP_403_FORBIDDEN)
+
+        params = request.query_params
+        types = [name for name in (params.get('type') or '').split(',') if name] or list(ALERT_FILTERS)
+        if any(name not in ALERT_FILTERS for name in types):
+            return Response({'error': f'type debe ser: {", ".join(ALERT_FILTERS)}'}, status=status.HTTP_400_BAD_REQUEST)
+        warehouse_id = params.get('warehouse')
+        if warehouse_id and not warehouse_id.isdigit():
+            return Response({'error': 'warehouse debe ser un id'}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = Product.objects.filter(is_active=True)
+        if params.get('categoria'):
+            queryset = queryset.filter(categoria=params['categoria'])
+        queryset = annotate_stock(queryset, warehouse_id=int(warehouse_id) if warehouse_id else None)
+        queryset = queryset.filter(alert_filter(types)).annotate(
+            deficit=F('reorder_point') - F('total_stock'),
+        ).order_by('-deficit', 'sku').values(
+            'id', 'sku', 'name', 'categoria', 'total_stock', 'reorder_point', 'stock_maximo', 'deficit',
+        )
+
+        page = self.paginate_queryset(queryset)
+        rows = page if page is not None else list(queryset)
+        results = [
+            {
+                'id': row['id'], 'sku': row['sku'], 'name': row['name'], 'categoria': row['categoria'],
+                'alert': alert_type(row), 'stock': row['total_stock'], 'reorder_point': row['reorder_point'],
+                'stock_maximo': row['stock_maximo'],
+                'deficit': max(row['deficit'], 0),
+                'excess': max(row['total_stock'] - row['stock_maximo'], 0) if row['stock_maximo'] is not None else 0,
+            }
+            for row in rows
+        ]
+        if page is not None:
+            return self.get_paginated_response(results)
+        return Response(results)
+
+    @action(detail=True, methods=['get'], url_path='kardex')
+    def kardex(self, request, pk=None):
+        """
+        Kardex del producto: movimientos en orden cronológico con saldo por zona y total.
+        Filtros: ?zone=<id>&date_from=YYYY-MM-DD&date_to=YYYY-MM-DD&limit=100
+        Paginación por cursor: ?cursor=<next_cursor de la página anterior>
+        """
+        if not is_bodega_or_admin(request.user):
+            return Response({'error': 'No tienes permisos'}, status=status.HTTP_403_FORBIDDEN)
+
+        product = get_object_or_404(Product.objects.only('id', 'sku', 'name'), pk=pk)
+        params = request.query_params
+        zone_id = params.get('zone')
+        if zone_id and not zone_id.isdigit():
+            return Response({'error': 'zone debe ser un id'}, status=status.HTTP_400_BAD_REQUEST)
+        for name in ('date_from', 'date_to'):
+            if params.get(name) and parse_date_param(params[name]) is None:
+                return Response({'error': f'{name} debe ser YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+        date_from = parse_date_param(params.get('date_from'))
+        date_to = parse_date_param(params.get('date_to'))
+        try:
+            limit = min(max(int(params.get('limit', 100)), 1), KARDEX_MAX_LIMIT)
+        except ValueError:
+            limit = 100
+
+        try:
+            results, next_cursor = kardex(
+                product.pk, zone_id=int(zone_id) if zone_id else None,
+                date_from=date_from, date_to=date_to, cursor=params.get('cursor'), limit=limit,
+            )
+        except (CursorError, ArchivedPeriodError) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'product': {'id': product.pk, 'sku': product.sku, 'name': product.name},
+            'next_cursor': next_cursor,
+            'results': results,
+        })
+
+    @action(detail=True, methods=['get'], url_path='stock-as-of')
+    def stock_as_of(self, request, pk=None):
+        """Stock del producto por zona a una fecha: ?as_of=YYYY-MM-DD (fin del día) o fecha y hora ISO"""
+        if not is_bodega_or_admin(request.user):
+            return Response({'error': 'No tienes permisos'}, status=status.HTTP_403_FORBIDDEN)
+
+        product = get_object_or_404(Product.objects.only('id', 'sku', 'name'), pk=pk)
+        moment = parse_moment(request.query_params.get('as_of'))
+        if moment is None:
+            return Response({'error': 'as_of debe ser YYYY-MM-DD o fecha y hora ISO'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            state, run = stock_as_of(moment, product_id=product.pk)
+        except (ArchivedPeriodError, StockHistoryError) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        zones = Zone.objects.filter(id__in=[zone_id for _, zone_id in state]).select_related('warehouse')
+        results = [
+            {'zone_id': zone.id, 'zone': zone.name, 'warehouse': zone.warehouse.name, 'quantity': state[(product.pk, zone.id)]}
+            for zone in zones
+        ]
+        return Response({
+            'product': {'id': product.pk, 'sku': product.sku, 'name': product.name},
+            'as_of': moment,
+            'snapshot_date': run.date if run else None,
+            'total': sum(row['quantity'] for row in results),
+            'results': results,
+        })
+
 
 # ==================== PROVEEDORES ====================
-class SupplierViewSet(viewsets.ModelViewSet):
+class SupplierViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     queryset = Supplier.objects.all()
     serializer_class = SupplierSerializer
     permission_classes = [IsAuthenticated]
@@ -264,7 +492,7 @@ class SupplierViewSet(viewsets.ModelViewSet):
 
 
 # ==================== USUARIOS ====================
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     queryset = User.objects.all().select_related('profile')
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated]
@@ -385,9 +613,8 @@ class UserViewSet(viewsets.ModelViewSet):
                     # Sincronizar con Firebase (esto manejará correctamente el caso cuando el email no cambió)
                     firebase_result = sync_django_user_to_firebase(user, password=None, old_email=old_email)
                     if not firebase_result:
-                        # Si Firebase no está configurado o hay un error, continuar pero mostrar advertencia en DEBUG
-                        if settings.DEBUG:
-                            print(f"ADVERTENCIA: No se pudo sincronizar usuario {user.username} con Firebase")
+                        # Si Firebase no está configurado o hay un error, continuar pero registrar advertencia
+                        logger.warning('No se pudo sincronizar usuario %s con Firebase', user.username)
                 
                 serializer = self.get_serializer(user)
                 return Response(serializer.data)
@@ -471,7 +698,7 @@ class UserViewSet(viewsets.ModelViewSet):
 
 
 # ==================== MOVIMIENTOS ====================
-class ProductMovementViewSet(viewsets.ModelViewSet):
+class ProductMovementViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     queryset = ProductMovement.objects.all().select_related(
         'product', 'origin_zone', 'destination_zone', 'supplier', 'warehouse', 'performed_by'
     )
@@ -488,7 +715,40 @@ class ProductMovementViewSet(viewsets.ModelViewSet):
                 Q(product__sku__icontains=search_query)
             )
         
-        return queryset.order_by('-fecha')
+        # Índice movement_fecha_idx (fecha, id) recorrido al revés, sin ordenar en memoria
+        return queryset.order_by('-fecha', '-id')
+    
+    @action(detail=False, methods=['get'], url_path='archive')
+    def archived(self, request):
+        """
+        Movimientos archivados (solo lectura, ver movement_archive.py).
+        Sin ?month: los meses archivados. Con ?month=YYYY-MM: sus movimientos,
+        paginados. Filtros: &product=<id>&tipo=<tipo>
+        """
+        if not is_bodega_or_admin(request.user):
+            return Response({'error': 'No tienes permisos'}, status=status.HTTP_403_FORBIDDEN)
+
+        params = request.query_params
+        if not params.get('month'):
+            return Response({'results': archived_periods()})
+        try:
+            period = parse_date(f"{params['month']}-01")
+        except ValueError:
+            period = None
+        if period is None:
+            return Response({'error': 'month debe ser YYYY-MM'}, status=status.HTTP_400_BAD_REQUEST)
+        product_id = params.get('product')
+        if product_id and not product_id.isdigit():
+            return Response({'error': 'product debe ser un id'}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = sorted(
+            archived_movements(period=period, product_id=int(product_id) if product_id else None, tipo=params.get('tipo')),
+            key=lambda row: (row['fecha'] or '', row['id']), reverse=True,
+        )
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(page)
+        return Response(rows)
     
     def create(self, request, *args, **kwargs):
         if not (is_admin(request.user) or is_bodega_or_admin(request.user) or request.user.is_superuser):
@@ -506,12 +766,11 @@ class ProductMovementViewSet(viewsets.ModelViewSet):
                 from django.utils import timezone
                 movement.fecha = timezone.now()
             
-            # Guardar movimiento
-            movement.save()
-            
-            # Actualizar inventario según el tipo de movimiento
+            # Guardar el movimiento y actualizar el inventario en la misma transacción:
+            # si la actualización se rechaza, el movimiento no queda registrado (Kardex)
             try:
                 with transaction.atomic():
+                    movement.save()
                     cantidad = movement.cantidad
                     product = movement.product
                     
@@ -525,6 +784,8 @@ class ProductMovementViewSet(viewsets.ModelViewSet):
                             )
                             inventory.quantity += int(cantidad)
                             inventory.save()
+                            lots.receive(product.pk, movement.destination_zone_id, int(cantidad),
+                                         movement.lote, movement.fecha_vencimiento)
                     
                     elif movement.tipo == 'salida':
                         # Salida: restar de zona origen o destino
@@ -533,12 +794,16 @@ class ProductMovementViewSet(viewsets.ModelViewSet):
                             try:
                                 inventory = Inventory.objects.get(product=product, zone=zone)
                                 if inventory.quantity < int(cantidad):
+                                    transaction.set_rollback(True)
                                     return Response({
                                         'error': f'Stock insuficiente. Disponible: {inventory.quantity}, Solicitado: {int(cantidad)}'
                                     }, status=status.HTTP_400_BAD_REQUEST)
                                 inventory.quantity -= int(cantidad)
                                 inventory.save()
+                                # FEFO: primero el lote indicado (si hay) y luego lo que vence antes
+                                lots.allocate(product.pk, zone.pk, int(cantidad), movement.lote)
                             except Inventory.DoesNotExist:
+                                transaction.set_rollback(True)
                                 return Response({
                                     'error': f'No hay stock del producto en la zona seleccionada'
                                 }, status=status.HTTP_400_BAD_REQUEST)
@@ -553,6 +818,7 @@ class ProductMovementViewSet(viewsets.ModelViewSet):
                             )
                             inventory.quantity = int(cantidad)
                             inventory.save()
+                            lots.trim(product.pk, movement.destination_zone_id, int(cantidad))
                     
                     elif movement.tipo == 'devolucion':
                         # Devolución: agregar a zona destino
@@ -564,6 +830,8 @@ class ProductMovementViewSet(viewsets.ModelViewSet):
                             )
                             inventory.quantity += int(cantidad)
                             inventory.save()
+                            lots.receive(product.pk, movement.destination_zone_id, int(cantidad),
+                                         movement.lote, movement.fecha_vencimiento)
                     
                     elif movement.tipo == 'transferencia':
                         # Transferencia: restar de origen, agregar a destino
@@ -572,12 +840,14 @@ class ProductMovementViewSet(viewsets.ModelViewSet):
                             try:
                                 origin_inventory = Inventory.objects.get(product=product, zone=movement.origin_zone)
                                 if origin_inventory.quantity < int(cantidad):
+                                    transaction.set_rollback(True)
                                     return Response({
                                         'error': f'Stock insuficiente en zona origen. Disponible: {origin_inventory.quantity}, Solicitado: {int(cantidad)}'
                                     }, status=status.HTTP_400_BAD_REQUEST)
                                 origin_inventory.quantity -= int(cantidad)
                                 origin_inventory.save()
                             except Inventory.DoesNotExist:
+                                transaction.set_rollback(True)
                                 return Response({
                                     'error': f'No hay stock del producto en la zona origen'
                                 }, status=status.HTTP_400_BAD_REQUEST)
@@ -590,29 +860,33 @@ class ProductMovementViewSet(viewsets.ModelViewSet):
                             )
                             destination_inventory.quantity += int(cantidad)
                             destination_inventory.save()
+                            # Los lotes pasan al destino con su vencimiento (FEFO en el origen)
+                            lots.transfer(product.pk, movement.origin_zone_id, movement.destination_zone_id,
+                                          int(cantidad), movement.lote)
             
             except Exception as e:
-                import traceback
-                print(f"Error al actualizar inventario: {str(e)}")
-                print(traceback.format_exc())
+                logger.exception('Error al actualizar inventario (movimiento %s)', movement.pk)
                 return Response({
                     'error': f'Error al actualizar inventario: {str(e)}'
                 }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
             
+            MOVEMENTS.inc(tipo=movement.tipo)
             serializer = self.get_serializer(movement)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(form.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 # ==================== VENTAS ====================
-class SaleViewSet(viewsets.ModelViewSet):
-    queryset = Sale.objects.all().select_related('client', 'user').prefetch_related('items__product')
+class SaleViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
+    queryset = Sale.objects.all().select_related('client', 'user')
     serializer_class = SaleSerializer
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
         try:
             queryset = super().get_queryset()
+            if self.field_requested('items'):
+                queryset = queryset.prefetch_related('items__product')
             params = self.request.query_params
             
             # Filtro de búsqueda por texto (ID, cliente o usuario)
@@ -680,10 +954,8 @@ class SaleViewSet(viewsets.ModelViewSet):
             
             order_field = valid_orders.get(order_by, '-sale_date')
             return queryset.order_by(order_field)
-        except Exception as e:
-            import traceback
-            print(f"Error en get_queryset de SaleViewSet: {str(e)}")
-            print(traceback.format_exc())
+        except Exception:
+            logger.exception('Error en get_queryset de SaleViewSet')
             # Retornar queryset vacío en caso de error
             return Sale.objects.none()
     
@@ -691,13 +963,10 @@ class SaleViewSet(viewsets.ModelViewSet):
         try:
             return super().list(request, *args, **kwargs)
         except Exception as e:
-            import traceback
-            error_trace = traceback.format_exc()
-            print(f"Error al listar ventas: {str(e)}")
-            print(f"Traceback: {error_trace}")
+            logger.exception('Error al listar ventas')
             return Response({
                 'error': f'Error al cargar ventas: {str(e)}',
-                'detail': error_trace if settings.DEBUG else None
+                'detail': traceback.format_exc() if settings.DEBUG else None
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
     def create(self, request, *args, **kwargs):
@@ -711,6 +980,8 @@ class SaleViewSet(viewsets.ModelViewSet):
         if not cart:
             return Response({'error': 'El carrito está vacío'}, status=status.HTTP_400_BAD_REQUEST)
         
+        CHECKOUT_LINES.observe(len(cart))
+        
         # Obtener zona de ventas
         from ..views.api_views import get_sales_zone
         sales_zone = get_sales_zone()
@@ -766,6 +1037,7 @@ class SaleViewSet(viewsets.ModelViewSet):
                 )
                 
                 total_amount = Decimal('0.00')
+                sale_items = []
                 
                 for item in cart:
                     product_id = item.get('id')
@@ -789,6 +1061,8 @@ class SaleViewSet(viewsets.ModelViewSet):
                     
                     # Validar stock antes de procesar
                     if inventory.quantity < quantity:
+                        # El stock cambió desde la validación previa (venta concurrente)
+                        INVENTORY_CONFLICTS.inc(operation='sale')
                         raise ValueError(
                             f"Stock insuficiente para {product.name}. "
                             f"Disponible: {inventory.quantity}, Solicitado: {quantity}"
@@ -802,21 +1076,25 @@ class SaleViewSet(viewsets.ModelViewSet):
                     
                     item_price = sale_price * Decimal(str(quantity))
                     
-                    SaleItem.objects.create(
+                    sale_items.append(SaleItem.objects.create(
                         sale=sale,
                         product=product,
                         quantity=quantity,
                         price_at_sale=sale_price
-                    )
+                    ))
                     
-                    # Descontar stock
+                    # Descontar stock (y de los lotes en orden FEFO)
                     inventory.quantity -= quantity
                     inventory.save()
+                    lots.allocate(product.pk, sales_zone.pk, quantity)
                     
                     total_amount += item_price
                 
                 sale.total_amount = total_amount
                 sale.save()
+                
+                # Resúmenes de ventas para reportes (misma transacción que la venta)
+                record_sale(sale, sale_items)
             
             serializer = self.get_serializer(sale)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -825,14 +1103,9 @@ class SaleViewSet(viewsets.ModelViewSet):
             # Errores de validación (stock, productos no encontrados, etc.)
             return Response({'error': str(e), 'errors': [str(e)]}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            import traceback
-            error_trace = traceback.format_exc()
             error_message = str(e)
-            
-            # Log del error para debugging
-            print(f"ERROR al procesar venta: {error_message}")
-            print(f"Traceback completo:")
-            print(error_trace)
+            # El traceback se formatea en el hilo del handler, no en el request
+            logger.exception('Error al procesar venta')
             
             # Mensaje de error más amigable
             if 'DoesNotExist' in str(type(e)):
@@ -845,18 +1118,31 @@ class SaleViewSet(viewsets.ModelViewSet):
             return Response({
                 'error': error_message,
                 'errors': [error_message],
-                'detail': error_trace if settings.DEBUG else None
+                'detail': traceback.format_exc() if settings.DEBUG else None
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    def perform_destroy(self, instance):
+        # Restar la venta de los resúmenes en la misma transacción
+        with transaction.atomic():
+            record_sale(instance, list(instance.items.select_related('product')), sign=-1)
+            instance.delete()
 
 
 # ==================== ÓRDENES A PROVEEDORES ====================
-class SupplierOrderViewSet(viewsets.ModelViewSet):
-    queryset = SupplierOrder.objects.all().select_related('supplier', 'warehouse', 'zone', 'requested_by').prefetch_related('items__product')
+class SupplierOrderViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
+    queryset = SupplierOrder.objects.all().select_related('supplier', 'warehouse', 'zone', 'requested_by')
     serializer_class = SupplierOrderSerializer
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
         queryset = super().get_queryset()
+        if self.field_requested('items'):
+            queryset = queryset.prefetch_related('items__product')
+        elif self.field_requested('total_amount'):
+            queryset = queryset.annotate(items_total=Coalesce(
+                Sum(F('items__quantity') * F('items__unit_price'), output_field=DecimalField(max_digits=14, decimal_places=2)),
+                Decimal('0'),
+            ))
         search_query = self.request.query_params.get('q', None)
         order_status = self.request.query_params.get('status', None)
         
@@ -894,7 +1180,7 @@ class SupplierOrderViewSet(viewsets.ModelViewSet):
         
         order = self.get_object()
         
-        if order.status != 'PENDING':
+        if order.status not in ('DRAFT', 'PENDING'):
             return Response({'error': 'No se pueden modificar órdenes que no están pendientes'}, status=status.HTTP_400_BAD_REQUEST)
         
         product_id = request.data.get('product_id')
@@ -935,8 +1221,77 @@ class SupplierOrderViewSet(viewsets.ModelViewSet):
         serializer = SupplierOrderItemSerializer(item)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     
+    @action(detail=True, methods=['post'])
+    def confirm(self, request, pk=None):
+        """Confirma una orden borrador (DRAFT -> PENDING)"""
+        if not (is_admin(request.user) or is_bodega_or_admin(request.user) or request.user.is_superuser):
+            return Response({'error': 'No tienes permisos'}, status=status.HTTP_403_FORBIDDEN)
+        
+        order = self.get_object()
+        if order.status != 'DRAFT':
+            return Response({'error': 'Solo se pueden confirmar órdenes en borrador'}, status=status.HTTP_400_BAD_REQUEST)
+        if not order.items.exists():
+            return Response({'error': 'La orden no tiene items'}, status=status.HTTP_400_BAD_REQUEST)
+        order.status = 'PENDING'
+        order.save(update_fields=['status', 'updated_at'])
+        return Response(self.get_serializer(order).data)
+    
+    @action(detail=False, methods=['get', 'post'], url_path='reorder')
+    def reorder(self, request):
+        """
+        GET: productos bajo su punto de reorden con cantidad y proveedor sugeridos.
+        POST: crea una orden borrador por proveedor con esas sugerencias.
+        Filtros (query o body): warehouse, categoria, supplier. POST requiere zone (zona destino).
+        """
+        if not (is_admin(request.user) or is_bodega_or_admin(request.user) or request.user.is_superuser):
+            return Response({'error': 'No tienes permisos'}, status=status.HTTP_403_FORBIDDEN)
+        
+        params = request.query_params if request.method == 'GET' else request.data
+        filters = {}
+        for name, key in (('warehouse', 'warehouse_id'), ('supplier', 'supplier_id')):
+            value = params.get(name)
+            if value not in (None, ''):
+                if not str(value).isdigit():
+                    return Response({'error': f'{name} debe ser un id'}, status=status.HTTP_400_BAD_REQUEST)
+                filters[key] = int(value)
+        
+        zone = None
+        if request.method == 'POST':
+            zone_id = str(params.get('zone') or '')
+            zone = Zone.objects.filter(pk=zone_id, is_active=True).first() if zone_id.isdigit() else None
+            if zone is None:
+                return Response({'error': 'Debe indicar una zona destino activa (zone)'}, status=status.HTTP_400_BAD_REQUEST)
+            # Sin bodega explícita se repone el stock de la bodega destino
+            filters.setdefault('warehouse_id', zone.warehouse_id)
+        
+        suggestions, without_supplier = reorder_suggestions(categoria=params.get('categoria') or None, **filters)
+        if request.method == 'GET':
+            return Response({'count': len(suggestions), 'results': suggestions, 'without_supplier': without_supplier})
+        
+        orders = create_draft_orders(suggestions, zone, user=request.user)
+        totals = defaultdict(lambda: [0, Decimal('0')])
+        for suggestion in suggestions:
+            totals[suggestion['supplier_id']][0] += 1
+            totals[suggestion['supplier_id']][1] += suggestion['quantity'] * suggestion['unit_cost']
+        return Response({
+            'orders': [
+                {
+                    'id': order.pk, 'supplier': order.supplier_id, 'items': totals[order.supplier_id][0],
+                    'total_amount': totals[order.supplier_id][1].quantize(Decimal('0.01')),
+                    'expected_delivery_date': order.expected_delivery_date,
+                }
+                for order in orders
+            ],
+            'items': len(suggestions),
+            'without_supplier': without_supplier,
+        }, status=status.HTTP_201_CREATED)
+    
     @action(detail=True, methods=['post'])
     def receive(self, request, pk=None):
+        """
+        Recibe la orden. Recepción parcial: {"items": {"<item_id>": cantidad_recibida}};
+        los ítems no indicados se reciben completos.
+        """
         if not (is_admin(request.user) or is_bodega_or_admin(request.user) or request.user.is_superuser):
             return Response({'error': 'No tienes permisos'}, status=status.HTTP_403_FORBIDDEN)
         
@@ -948,6 +1303,29 @@ class SupplierOrderViewSet(viewsets.ModelViewSet):
         if order.items.count() == 0:
             return Response({'error': 'La orden no tiene items. Agrega productos antes de recibirla.'}, status=status.HTTP_400_BAD_REQUEST)
         
+        received_quantities = request.data.get('items') or {}
+        if not isinstance(received_quantities, dict):
+            return Response({'error': 'items debe ser un objeto {item_id: cantidad}'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            received_quantities = {str(item_id): int(quantity) for item_id, quantity in received_quantities.items()}
+        except (TypeError, ValueError):
+            return Response({'error': 'Las cantidades recibidas deben ser enteros'}, status=status.HTTP_400_BAD_REQUEST)
+        if any(quantity < 0 for quantity in received_quantities.values()):
+            return Response({'error': 'Las cantidades recibidas no pueden ser negativas'}, status=status.HTTP_400_BAD_REQUEST)
+        ordered = {str(item_id): quantity for item_id, quantity in order.items.values_list('id', 'quantity')}
+        unknown = sorted(item_id for item_id in received_quantities if item_id not in ordered)
+        if unknown:
+            return Response({
+                'error': 'Ítems que no pertenecen a la orden',
+                'items': unknown,
+            }, status=status.HTTP_400_BAD_REQUEST)
+        exceeded = sorted(item_id for item_id, quantity in received_quantities.items() if quantity > ordered[item_id])
+        if exceeded:
+            return Response({
+                'error': 'La cantidad recibida no puede superar la pedida',
+                'items': exceeded,
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
         # Procesar recepción de orden
         from django.utils import timezone
         try:
@@ -959,19 +1337,24 @@ class SupplierOrderViewSet(viewsets.ModelViewSet):
                 
                 # Procesar cada item
                 for item in order.items.select_related('product').all():
+                    item.received_quantity = received_quantities.get(str(item.pk), item.quantity)
+                    item.save(update_fields=['received_quantity'])
+                    if not item.received_quantity:
+                        continue
+                    
                     # Crear o actualizar inventario
                     inventory, created = Inventory.objects.get_or_create(
                         product=item.product,
                         zone=order.zone,
                         defaults={'quantity': 0}
                     )
-                    inventory.quantity += item.quantity
+                    inventory.quantity += item.received_quantity
                     inventory.save()
                     
                     # Crear movimiento de entrada
                     ProductMovement.objects.create(
                         product=item.product,
-                        cantidad=item.quantity,
+                        cantidad=item.received_quantity,
                         tipo='ingreso',
                         destination_zone=order.zone,
                         performed_by=request.user,
@@ -979,7 +1362,8 @@ class SupplierOrderViewSet(viewsets.ModelViewSet):
                         fecha=timezone.now()
                     )
             
-            serializer = self.get_serializer(order)
+            # Releer: los ítems prefetcheados no tienen received_quantity
+            serializer = self.get_serializer(self.get_object())
             return Response(serializer.data)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -991,7 +1375,7 @@ class SupplierOrderViewSet(viewsets.ModelViewSet):
         
         order = self.get_object()
         
-        if order.status != 'PENDING':
+        if order.status not in ('DRAFT', 'PENDING'):
             return Response({'error': 'No se pueden modificar órdenes que no están pendientes'}, status=status.HTTP_400_BAD_REQUEST)
         
         item = get_object_or_404(SupplierOrderItem, pk=item_pk, order=order)
@@ -1001,19 +1385,19 @@ class SupplierOrderViewSet(viewsets.ModelViewSet):
 
 
 # ==================== CLIENTES ====================
-class ClientViewSet(viewsets.ModelViewSet):
+class ClientViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     queryset = Client.objects.all()
     serializer_class = ClientSerializer
     permission_classes = [IsAuthenticated]
 
 
 # ==================== BODEGAS Y ZONAS ====================
-class WarehouseViewSet(viewsets.ReadOnlyModelViewSet):
+class WarehouseViewSet(SparseFieldsetViewMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Warehouse.objects.filter(is_active=True)
     serializer_class = WarehouseSerializer
     permission_classes = [IsAuthenticated]
 
-class ZoneViewSet(viewsets.ReadOnlyModelViewSet):
+class ZoneViewSet(SparseFieldsetViewMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Zone.objects.filter(is_active=True)
     serializer_class = ZoneSerializer
     permission_classes = [IsAuthenticated]
@@ -1055,9 +1439,8 @@ def reset_password(request):
                 {'error': 'Correo electrónico inválido'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-    except Exception as e:
-        if settings.DEBUG:
-            print(f"ERROR: Excepción al verificar email: {e}")
+    except Exception:
+        logger.exception('Excepción al verificar email para restablecimiento')
         # Por seguridad, devolver mensaje genérico
         return Response(
             {'error': 'Correo electrónico inválido'},
@@ -1076,17 +1459,13 @@ def reset_password(request):
         else:
             # Si Firebase falla, devolver mensaje genérico por seguridad
             error_msg = result.get('error', 'Error al enviar el correo de restablecimiento')
-            if settings.DEBUG:
-                print(f"DEBUG: Error al enviar email de restablecimiento: {error_msg}")
+            logger.info('Error al enviar email de restablecimiento: %s', error_msg)
             return Response(
                 {'error': 'Correo electrónico inválido'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-    except Exception as e:
-        if settings.DEBUG:
-            print(f"ERROR: Excepción al restablecer contraseña: {e}")
-            import traceback
-            traceback.print_exc()
+    except Exception:
+        logger.exception('Excepción al restablecer contraseña')
         # Por seguridad, devolver mensaje genérico
         return Response(
             {'error': 'Correo electrónico inválido'},
@@ -1146,11 +1525,8 @@ def reset_password_confirm(request):
                 {'error': error_msg},
                 status=status.HTTP_400_BAD_REQUEST
             )
-    except Exception as e:
-        if settings.DEBUG:
-            print(f"ERROR: Excepción al confirmar restablecimiento de contraseña: {e}")
-            import traceback
-            traceback.print_exc()
+    except Exception:
+        logger.exception('Excepción al confirmar restablecimiento de contraseña')
         return Response(
             {'error': 'Error al procesar la solicitud. Por favor, intenta más tarde.'},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -1161,7 +1537,6 @@ def reset_password_confirm(request):
 def api_login(request):
     """API de login que devuelve JSON"""
     from django.contrib.auth import authenticate, login
-    from django.conf import settings
     
     username = request.data.get('username')
     password = request.data.get('password')
@@ -1173,42 +1548,29 @@ def api_login(request):
         )
     
     try:
-        if settings.DEBUG:
-            print(f"DEBUG api_login: Intentando autenticar usuario: {username}")
-        
+        logger.debug('api_login: intentando autenticar usuario %s', username)
         user = authenticate(request, username=username, password=password)
         
-        if settings.DEBUG:
-            print(f"DEBUG api_login: Resultado authenticate: {user}")
-            if user:
-                print(f"DEBUG api_login: Usuario encontrado: {user.username}, Activo: {user.is_active}")
-        
         if user is not None:
             if user.is_active:
                 login(request, user)
                 serializer = UserSerializer(user)
-                if settings.DEBUG:
-                    print(f"DEBUG api_login: Login exitoso, devolviendo datos del usuario")
+                logger.debug('api_login: login exitoso para %s', user.username)
                 return Response(serializer.data)
             else:
-                if settings.DEBUG:
-                    print(f"DEBUG api_login: Usuario inactivo")
+                logger.info('api_login: usuario inactivo %s', user.username)
                 return Response(
                     {'error': 'Usuario inactivo'},
                     status=status.HTTP_403_FORBIDDEN
                 )
         else:
-            if settings.DEBUG:
-                print(f"DEBUG api_login: Usuario o contraseña incorrectos")
+            logger.info('api_login: credenciales incorrectas para %s', username)
             return Response(
                 {'error': 'Usuario o contraseña incorrectos'},
                 status=status.HTTP_401_UNAUTHORIZED
             )
     except Exception as e:
-        if settings.DEBUG:
-            import traceback
-            print(f"ERROR api_login: Excepción: {e}")
-            traceback.print_exc()
+        logger.exception('api_login: excepción al autenticar %s', username)
         return Response(
             {'error': f'Error al iniciar sesión: {str(e)}'},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR